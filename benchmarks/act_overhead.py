@@ -0,0 +1,93 @@
+"""
+Pure Python overhead of a long llm.act run, against the synthetic backend with no model loaded.
+
+    python -m benchmarks.act_overhead --rounds 200 --calls-per-round 2
+    python -m benchmarks.act_overhead --profile --top 25
+
+Every round the synthetic model answers instantly with response_tokens of text and scripted
+no-op tool calls, so the measured time is chat handling, conversion, token counting,
+tool call extraction and dispatch. The workload is the same on every run.
+"""
+
+import argparse
+import cProfile
+import json
+import pstats
+import statistics
+import time
+
+from langchain_core.tools import StructuredTool
+
+from radarange_orchestrator import LLM_Config, llm
+from radarange_orchestrator.backend.synthetic_model import (
+    SyntheticConfig,
+    SyntheticToolCall,
+)
+from radarange_orchestrator.chat import Chat
+
+noop_tool = StructuredTool.from_function(
+    name='noop',
+    func=lambda value='': 'ok',
+    description='Does nothing and returns "ok".',
+)
+
+
+def make_bot(args: argparse.Namespace) -> llm:
+    calls = [SyntheticToolCall(name='noop', args={'value': 'x' * args.arg_chars})]
+    synthetic = SyntheticConfig(
+        response_tokens=args.response_tokens,
+        tool_rounds=[calls * args.calls_per_round],
+        loop_tool_rounds=True,
+    )
+    config = LLM_Config(early_tool_dispatch=args.early_dispatch)
+    return llm(
+        'synthetic', backend='synthetic', config=config, backend_options=synthetic
+    )
+
+
+def run_act(bot: llm, args: argparse.Namespace) -> float:
+    chat = Chat(system_prompt='You are a benchmark agent.')
+    chat.add_user_message('Call noop until told otherwise.')
+    start = time.perf_counter()
+    bot.act(chat, tools=[noop_tool], max_prediction_rounds=args.rounds)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--calls-per-round', type=int, default=2)
+    parser.add_argument('--response-tokens', type=int, default=64)
+    parser.add_argument('--arg-chars', type=int, default=32)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--early-dispatch', action='store_true')
+    parser.add_argument(
+        '--profile', action='store_true', help='print cProfile of one run'
+    )
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    bot = make_bot(args)
+    run_act(bot, args)  # warm up
+    samples = [run_act(bot, args) for _ in range(args.runs)]
+    elapsed = statistics.median(samples)
+    print(
+        json.dumps(
+            {
+                'rounds': args.rounds,
+                'tool_calls': args.rounds * args.calls_per_round,
+                'act_s': elapsed,
+                'per_round_ms': elapsed / args.rounds * 1000,
+            },
+            indent=2,
+        )
+    )
+
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(run_act, bot, args)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Cold start benchmark: imports a module in fresh interpreters and reports the wall time.
+
+Fails if modules that have to load on first use (backends, pdf and html parsers, IPython)
+are imported along with it, or if the median exceeds --max-ms.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --module radarange_orchestrator.tools --max-ms 1500
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Imported only when a backend, tool or display helper is used
+LAZY_MODULES = [
+    'IPython',
+    'llama_cpp',
+    'lmstudio',
+    'pymupdf',
+    'readability',
+    'html2text',
+]
+
+_PROBE = """
+import sys, time
+ts = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - ts
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """Import time of module and the lazy modules it pulled in, in a fresh interpreter"""
+    code = 'import json\n' + _PROBE.format(module=module, lazy=LAZY_MODULES)
+    out = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int) -> list[tuple[float, str]]:
+    """Packages loaded by importing module, by cumulative import time from -X importtime"""
+    err = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    entries = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:') :].split('|')
+        name = name.strip()
+        # top-level packages only: their time includes submodules and dependencies
+        if '.' not in name:
+            entries.append((int(cumulative) / 1e6, name))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--module', default='radarange_orchestrator')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    seconds = [run['seconds'] for run in runs]
+    loaded = sorted({name for run in runs for name in run['loaded']})
+
+    print(
+        f'import {args.module}: median {statistics.median(seconds) * 1000:.0f} ms, '
+        f'min {min(seconds) * 1000:.0f} ms over {args.runs} runs'
+    )
+    print('slowest packages (cumulative):')
+    for cumulative, name in slowest_imports(args.module, args.top):
+        print(f'  {cumulative * 1000:8.1f} ms  {name}')
+
+    failed = False
+    if loaded:
+        print(f'FAIL: imported eagerly: {", ".join(loaded)}')
+        failed = True
+    if args.max_ms is not None and statistics.median(seconds) * 1000 > args.max_ms:
+        print(f'FAIL: median import time exceeds {args.max_ms:.0f} ms')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
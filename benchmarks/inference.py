@@ -0,0 +1,274 @@
+"""
+Inference benchmarks of the orchestrator across backends, with regression checks against a baseline.
+
+    python -m benchmarks.inference --out results.json
+    python -m benchmarks.inference --save-baseline benchmarks/baseline.json
+    python -m benchmarks.inference --baseline benchmarks/baseline.json --tolerance 0.25
+
+Backends:
+- llama_cpp: LlamaModel on a tiny random GGUF written on first run, on cpu
+- lmstudio: LMSModel against an in-process stand-in of the LM Studio server (see lms_standin)
+
+Metrics, medians over runs:
+- ttft_s: from request to the first streamed chunk
+- prompt_tokens_per_s: prompt tokens over ttft
+- generation_tokens_per_s: tokens after the first over the rest of the stream
+- act_round_s: wall time of llm.act per prediction round
+- tool_overhead_s: orchestration time per call of a no-op tool. For llama_cpp it is llm.invoke_tool_calls
+  per call; for lmstudio, act() time beyond the stand-in's simulated model time, per tool call
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from langchain_core.tools import StructuredTool
+
+from radarange_orchestrator import LLM_Config, config, llm
+from radarange_orchestrator.chat import Chat
+from radarange_orchestrator.tools import ToolCall
+
+BACKENDS = ['llama_cpp', 'lmstudio']
+
+# lower is better for every metric, except rates
+HIGHER_IS_BETTER = {'prompt_tokens_per_s', 'generation_tokens_per_s'}
+
+noop_tool = StructuredTool.from_function(
+    name='noop', func=lambda: 'ok', description='Does nothing and returns "ok".'
+)
+
+
+def _prompt(run: int, n_chars: int) -> Chat:
+    """Chat unique per run, so that no backend reuses a cached prompt prefix"""
+    chat = Chat()
+    chat.add_user_message(
+        f'run {run}: ' + ('benchmark prompt text ' * n_chars)[:n_chars]
+    )
+    return chat
+
+
+def measure_stream(bot: llm, chat: Chat, max_tokens: int) -> dict[str, float]:
+    start = time.perf_counter()
+    first = None
+    for _ in bot.respond_stream(chat, max_tokens=max_tokens, temperature=0.0):
+        if first is None:
+            first = time.perf_counter()
+    end = time.perf_counter()
+
+    usage = chat[-1].usage_metadata or {}
+    ttft = (first or end) - start
+    generated = usage.get('output_tokens', 0)
+    return {
+        'ttft_s': ttft,
+        'prompt_tokens_per_s': usage.get('input_tokens', 0) / ttft if ttft > 0 else 0.0,
+        'generation_tokens_per_s': (generated - 1) / (end - first)
+        if first is not None and generated > 1 and end > first
+        else 0.0,
+    }
+
+
+def measure_act(
+    bot: llm, chat: Chat, max_tokens: int, rounds: int
+) -> tuple[float, int, int]:
+    """Wall time of act, prediction rounds and tool calls it made"""
+    messages = []
+    start = time.perf_counter()
+    bot.act(
+        chat,
+        tools=[noop_tool],
+        on_message=messages.append,
+        max_tokens_per_message=max_tokens,
+        max_prediction_rounds=rounds,
+    )
+    elapsed = time.perf_counter() - start
+    n_rounds = sum(1 for message in messages if message.type == 'ai')
+    n_calls = sum(1 for message in messages if message.type == 'tool')
+    return elapsed, max(n_rounds, 1), n_calls
+
+
+def measure_tool_calls(bot: llm, n_calls: int) -> float:
+    calls = [
+        ToolCall(name='noop', args={}, id=f'call_{i}', type='tool_call')
+        for i in range(n_calls)
+    ]
+    start = time.perf_counter()
+    bot.invoke_tool_calls(calls, [noop_tool])
+    return (time.perf_counter() - start) / n_calls
+
+
+def _median(samples: list[dict[str, float]]) -> dict[str, float]:
+    return {
+        key: statistics.median(sample[key] for sample in samples) for key in samples[0]
+    }
+
+
+def bench_llama_cpp(args: argparse.Namespace) -> dict[str, float]:
+    from .tiny_gguf import write_tiny_gguf
+
+    model_path = os.path.join(args.cache_dir, 'tiny.gguf')
+    if not os.path.exists(model_path):
+        write_tiny_gguf(model_path, context_length=args.ctx_size)
+    config.MODELS_DIR = args.cache_dir
+
+    bot = llm(
+        'tiny.gguf',
+        backend='llama_cpp',
+        config=LLM_Config(gpus=[], ctx_size=args.ctx_size, auto_config=True),
+    )
+    try:
+        return _run_backend(
+            bot,
+            args,
+            act_rounds=1,  # random weights never call tools, one round is a plain response
+            tool_overhead=lambda: measure_tool_calls(bot, args.tool_calls),
+        )
+    finally:
+        bot.close()
+
+
+def bench_lmstudio(args: argparse.Namespace) -> dict[str, float]:
+    from .lms_standin import StandInTimings, standin_server
+
+    timings = StandInTimings(
+        ttft=args.standin_ttft,
+        tokens_per_s=args.standin_tokens_per_s,
+        response_tokens=args.max_tokens,
+        tool_rounds=2,
+        tool_calls_per_round=args.tool_calls // 2 or 1,
+    )
+    config.LMSTUDIO_ENDPOINTS = []
+    with standin_server(timings):
+        bot = llm(
+            'standin', backend='lmstudio', config=LLM_Config(ctx_size=args.ctx_size)
+        )
+    standin = bot.model.model.model
+
+    def tool_overhead() -> float:
+        simulated = standin.simulated_s
+        elapsed, _, n_calls = measure_act(
+            bot, _prompt(-1, args.prompt_chars), args.max_tokens, 3
+        )
+        return max(elapsed - (standin.simulated_s - simulated), 0.0) / max(n_calls, 1)
+
+    return _run_backend(bot, args, act_rounds=3, tool_overhead=tool_overhead)
+
+
+def _run_backend(
+    bot: llm,
+    args: argparse.Namespace,
+    act_rounds: int,
+    tool_overhead: Callable[[], float],
+) -> dict[str, float]:
+    measure_stream(bot, _prompt(-1, args.prompt_chars), args.max_tokens)  # warm up
+    samples = []
+    for run in range(args.runs):
+        sample = measure_stream(bot, _prompt(run, args.prompt_chars), args.max_tokens)
+        elapsed, n_rounds, _ = measure_act(
+            bot,
+            _prompt(args.runs + run, args.prompt_chars),
+            args.max_tokens,
+            act_rounds,
+        )
+        sample['act_round_s'] = elapsed / n_rounds
+        sample['tool_overhead_s'] = tool_overhead()
+        samples.append(sample)
+    return _median(samples)
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Prints the change of every metric present in both, returns the ones worse by more than tolerance"""
+    regressions = []
+    for backend, metrics in results.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(backend, {}).get(metric)
+            if not reference:
+                continue
+            change = (value - reference) / reference
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ''
+            if worse > tolerance:
+                flag = '  REGRESSION'
+                regressions.append(f'{backend}.{metric}')
+            print(
+                f'  {backend:10} {metric:24} {reference:12.6g} -> {value:12.6g} '
+                f'({change:+.1%}){flag}'
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--prompt-chars', type=int, default=1024)
+    parser.add_argument('--max-tokens', type=int, default=64)
+    parser.add_argument('--ctx-size', type=int, default=2048)
+    parser.add_argument('--tool-calls', type=int, default=8)
+    parser.add_argument('--standin-ttft', type=float, default=0.05)
+    parser.add_argument('--standin-tokens-per-s', type=float, default=200.0)
+    parser.add_argument(
+        '--cache-dir',
+        default=os.path.join(tempfile.gettempdir(), 'radarange_benchmarks'),
+    )
+    parser.add_argument('--out', help='write results as json')
+    parser.add_argument(
+        '--baseline', help='compare with results stored by --save-baseline'
+    )
+    parser.add_argument('--save-baseline', help='store results as the new baseline')
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.25,
+        help='relative slowdown counted as regression',
+    )
+    args = parser.parse_args()
+
+    benches = {'llama_cpp': bench_llama_cpp, 'lmstudio': bench_lmstudio}
+    results: dict[str, dict[str, float]] = {}
+    skipped: dict[str, str] = {}
+    for backend in args.backends:
+        if backend == 'llama_cpp' and not config.LLAMA_CPP_AVAILABLE:
+            skipped[backend] = 'llama_cpp is not installed'
+            continue
+        print(f'benchmarking {backend}...', flush=True)
+        results[backend] = benches[backend](args)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+            'skipped': skipped,
+        },
+        'results': results,
+    }
+    print(json.dumps(report, indent=2))
+    for path in (args.out, args.save_baseline):
+        if path is not None:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        print(f'compared with {args.baseline}:')
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'FAIL: regressions in {", ".join(regressions)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
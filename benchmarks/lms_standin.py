@@ -0,0 +1,259 @@
+"""
+In-process stand-in for an LM Studio server, at the level of the lmstudio SDK client.
+
+StandInClient replaces lms.Client while LMSModel is built, so that everything above the SDK
+(LMSModel, bindings, chat conversion, the act() message handler and tool wrappers) runs as it does
+against a real server. Responses are real SDK result objects, paced by simulated timings.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+from unittest import mock
+
+import lmstudio as lms
+from pydantic import BaseModel
+
+_CHARS_PER_TOKEN = 4
+
+
+class StandInTimings(BaseModel):
+    ttft: float = 0.05  # seconds before prompt processing starts
+    prompt_tokens_per_s: float = 2000.0
+    tokens_per_s: float = 100.0
+    response_tokens: int = 64
+    # act(): rounds that end in tool calls before the final answer, and calls per such round
+    tool_rounds: int = 2
+    tool_calls_per_round: int = 2
+    tool_name: str = 'noop'
+
+
+def _count_tokens(text: str) -> int:
+    return max(len(text) // _CHARS_PER_TOKEN, 1)
+
+
+def _chat_text(chat: lms.Chat) -> str:
+    parts = []
+    for message in chat._messages:
+        for part in message.content:
+            # text of TextData, output of ToolCallResultData; requests are left out
+            text = getattr(part, 'text', None) or getattr(part, 'content', None)
+            if isinstance(text, str):
+                parts.append(text)
+    return '\n'.join(parts)
+
+
+class _StandInStream:
+    def __init__(
+        self, fragments: Iterator[lms.LlmPredictionFragment], result: Callable
+    ):
+        self._fragments = fragments
+        self._result = result
+
+    def __enter__(self) -> '_StandInStream':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def __iter__(self) -> Iterator[lms.LlmPredictionFragment]:
+        return self._fragments
+
+    def result(self) -> lms.PredictionResult:
+        return self._result()
+
+
+class StandInLLM:
+    """Handle of a loaded model, answering with text of timings.response_tokens tokens"""
+
+    def __init__(self, model_key: str, timings: StandInTimings):
+        self.identifier = model_key
+        self.timings = timings
+        self.simulated_s = 0.0  # time spent pretending to compute
+
+    def _sleep(self, seconds: float) -> None:
+        self.simulated_s += seconds
+        time.sleep(seconds)
+
+    def count_tokens(self, text: str) -> int:
+        return _count_tokens(text)
+
+    def apply_prompt_template(self, chat: lms.Chat, opts: dict = {}) -> str:
+        tools = opts.get('toolDefinitions')
+        return _chat_text(chat) + (json.dumps(tools) if tools else '')
+
+    def unload(self) -> None:
+        pass
+
+    def _prompt(self, history: lms.Chat) -> int:
+        prompt_tokens = _count_tokens(_chat_text(history))
+        self._sleep(
+            self.timings.ttft + prompt_tokens / self.timings.prompt_tokens_per_s
+        )
+        return prompt_tokens
+
+    def _result(
+        self,
+        content: str,
+        prompt_tokens: int,
+        started: float,
+        stop_reason: str = 'eosFound',
+    ) -> lms.PredictionResult:
+        predicted = _count_tokens(content)
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        stats = lms.LlmPredictionStats.from_dict(
+            {
+                'stopReason': stop_reason,
+                'tokensPerSecond': predicted / elapsed,
+                'timeToFirstTokenSec': self.timings.ttft,
+                'promptTokensCount': prompt_tokens,
+                'predictedTokensCount': predicted,
+                'totalTokensCount': prompt_tokens + predicted,
+            }
+        )
+        return lms.PredictionResult(
+            content=content,
+            parsed=content,
+            stats=stats,
+            model_info=None,
+            load_config=None,
+            prediction_config=None,
+        )
+
+    def _fragments(
+        self, config: Optional[dict] = None
+    ) -> Iterator[lms.LlmPredictionFragment]:
+        n_tokens = self.timings.response_tokens
+        if config is not None and config.get('maxTokens'):
+            n_tokens = min(n_tokens, config['maxTokens'])
+        for _ in range(n_tokens):
+            self._sleep(1 / self.timings.tokens_per_s)
+            yield lms.LlmPredictionFragment(
+                content='word',
+                tokens_count=1,
+                contains_drafted=False,
+                reasoning_type='none',
+            )
+
+    def respond(
+        self, history: lms.Chat, response_format=None, config=None
+    ) -> lms.PredictionResult:
+        started = time.perf_counter()
+        prompt_tokens = self._prompt(history)
+        content = ''.join(fragment.content for fragment in self._fragments(config))
+        return self._result(content, prompt_tokens, started)
+
+    def respond_stream(
+        self, history: lms.Chat, response_format=None, config=None
+    ) -> _StandInStream:
+        started = time.perf_counter()
+        content = []
+        prompt_tokens = []
+
+        def fragments() -> Iterator[lms.LlmPredictionFragment]:
+            prompt_tokens.append(self._prompt(history))
+            for fragment in self._fragments(config):
+                content.append(fragment.content)
+                yield fragment
+
+        return _StandInStream(
+            fragments(),
+            lambda: self._result(''.join(content), prompt_tokens[0], started),
+        )
+
+    def act(
+        self,
+        chat: lms.Chat,
+        tools: list[lms.ToolFunctionDef],
+        on_message: Callable,
+        max_prediction_rounds: int,
+        config=None,
+        on_round_start: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """
+        Scripted rounds of tool calls followed by a final answer, as lms act() reports them:
+        tools run first, then the response with its requests and the results go to on_message
+        """
+        implementations = {tool.name: tool.implementation for tool in tools}
+        for round_index in range(max_prediction_rounds):
+            if on_round_start is not None:
+                on_round_start(round_index)
+            self._prompt(chat)
+            text = ''.join(fragment.content for fragment in self._fragments())
+            content = [{'type': 'text', 'text': text}]
+            calls = []
+            if (
+                round_index < self.timings.tool_rounds
+                and round_index < max_prediction_rounds - 1
+            ):
+                for i in range(self.timings.tool_calls_per_round):
+                    calls.append(
+                        {
+                            'type': 'function',
+                            'id': f'call_{round_index}_{i}',
+                            'name': self.timings.tool_name,
+                            'arguments': {},
+                        }
+                    )
+            content += [
+                {'type': 'toolCallRequest', 'toolCallRequest': call} for call in calls
+            ]
+
+            response = lms.AssistantResponse.from_dict(
+                {'role': 'assistant', 'content': content}
+            )
+            chat.append(response)
+            if not calls:
+                on_message(response)
+                return
+
+            results = []
+            for call in calls:
+                output = implementations[call['name']](**call['arguments'])
+                results.append(
+                    {
+                        'type': 'toolCallResult',
+                        # as lms act() encodes results
+                        'content': json.dumps(output, ensure_ascii=False),
+                        'toolCallId': call['id'],
+                    }
+                )
+            tool_message = lms.ToolResultMessage.from_dict(
+                {'role': 'tool', 'content': results}
+            )
+            chat.append(tool_message)
+            on_message(response)
+            on_message(tool_message)
+
+
+class _StandInModels:
+    def __init__(self, timings: StandInTimings):
+        self.timings = timings
+        self.loaded: Optional[StandInLLM] = None
+
+    def model(
+        self, model_key: str, ttl: Optional[int] = None, config=None
+    ) -> StandInLLM:
+        if self.loaded is None or self.loaded.identifier != model_key:
+            self.loaded = StandInLLM(model_key, self.timings)
+        return self.loaded
+
+    def list_loaded(self) -> list[StandInLLM]:
+        return [self.loaded] if self.loaded is not None else []
+
+
+class StandInClient:
+    def __init__(self, host: str, timings: StandInTimings):
+        self.host = host
+        self.llm = _StandInModels(timings)
+
+    def _get_session(self, session_type) -> _StandInModels:
+        return self.llm
+
+
+@contextmanager
+def standin_server(timings: StandInTimings) -> Iterator[None]:
+    """While active, LMSModel connects to the stand-in instead of a server"""
+    with mock.patch.object(lms, 'Client', lambda host: StandInClient(host, timings)):
+        yield
@@ -0,0 +1,149 @@
+"""
+Writes a tiny llama GGUF with random f32 weights and a byte-level BPE vocabulary.
+Generates garbage, but runs through the same llama_cpp code paths as a real model, on any cpu.
+"""
+
+import os
+import random
+import struct
+
+_ALIGNMENT = 32
+
+CHATML_TEMPLATE = (
+    "{% for message in messages %}<|im_start|>{{ message['role'] }}\n"
+    "{{ message['content'] }}<|im_end|>\n{% endfor %}"
+    '{% if add_generation_prompt %}<|im_start|>assistant\n{% endif %}'
+)
+
+
+def _byte_tokens() -> list[str]:
+    """GPT-2 byte to unicode mapping, so that every byte is a token"""
+    printable = (
+        list(range(ord('!'), ord('~') + 1))
+        + list(range(ord('¡'), ord('¬') + 1))
+        + list(range(ord('®'), ord('ÿ') + 1))
+    )
+    mapping = {byte: byte for byte in printable}
+    shift = 0
+    for byte in range(256):
+        if byte not in mapping:
+            mapping[byte] = 256 + shift
+            shift += 1
+    return [chr(mapping[byte]) for byte in range(256)]
+
+
+def _string(value: str) -> bytes:
+    data = value.encode('utf-8')
+    return struct.pack('<Q', len(data)) + data
+
+
+def _value(value) -> bytes:
+    if isinstance(value, bool):
+        return struct.pack('<I?', 7, value)
+    if isinstance(value, int):
+        return struct.pack(
+            '<II', 4, value
+        )  # uint32, as llama.cpp expects for counts and ids
+    if isinstance(value, float):
+        return struct.pack('<If', 6, value)
+    if isinstance(value, str):
+        return struct.pack('<I', 8) + _string(value)
+    if all(isinstance(item, str) for item in value):
+        return struct.pack('<IIQ', 9, 8, len(value)) + b''.join(map(_string, value))
+    return struct.pack('<IIQ', 9, 5, len(value)) + struct.pack(
+        f'<{len(value)}i', *value
+    )
+
+
+def write_tiny_gguf(
+    path: str,
+    n_layer: int = 2,
+    n_embd: int = 64,
+    n_head: int = 4,
+    n_head_kv: int = 2,
+    n_ff: int = 128,
+    context_length: int = 2048,
+    seed: int = 0,
+) -> str:
+    tokens = _byte_tokens() + ['<|im_start|>', '<|im_end|>', '<|endoftext|>']
+    n_vocab = len(tokens)
+    metadata = {
+        'general.architecture': 'llama',
+        'general.name': 'tiny-benchmark',
+        'general.file_type': 0,
+        'llama.context_length': context_length,
+        'llama.embedding_length': n_embd,
+        'llama.block_count': n_layer,
+        'llama.feed_forward_length': n_ff,
+        'llama.attention.head_count': n_head,
+        'llama.attention.head_count_kv': n_head_kv,
+        'llama.rope.dimension_count': n_embd // n_head,
+        'llama.attention.layer_norm_rms_epsilon': 1e-5,
+        'llama.vocab_size': n_vocab,
+        'tokenizer.ggml.model': 'gpt2',
+        'tokenizer.ggml.pre': 'default',
+        'tokenizer.ggml.tokens': tokens,
+        'tokenizer.ggml.token_type': [1] * 256
+        + [3, 3, 3],  # normal bytes, control specials
+        'tokenizer.ggml.merges': ['Ġ t'],
+        'tokenizer.ggml.bos_token_id': n_vocab - 1,
+        'tokenizer.ggml.eos_token_id': n_vocab - 2,
+        'tokenizer.ggml.add_bos_token': False,
+        'tokenizer.chat_template': CHATML_TEMPLATE,
+    }
+
+    head_dim = n_embd // n_head
+    shapes = {
+        'token_embd.weight': (n_vocab, n_embd),
+        'output_norm.weight': (n_embd,),
+        'output.weight': (n_vocab, n_embd),
+    }
+    for i in range(n_layer):
+        shapes.update(
+            {
+                f'blk.{i}.attn_norm.weight': (n_embd,),
+                f'blk.{i}.attn_q.weight': (n_embd, n_embd),
+                f'blk.{i}.attn_k.weight': (n_head_kv * head_dim, n_embd),
+                f'blk.{i}.attn_v.weight': (n_head_kv * head_dim, n_embd),
+                f'blk.{i}.attn_output.weight': (n_embd, n_embd),
+                f'blk.{i}.ffn_norm.weight': (n_embd,),
+                f'blk.{i}.ffn_gate.weight': (n_ff, n_embd),
+                f'blk.{i}.ffn_up.weight': (n_ff, n_embd),
+                f'blk.{i}.ffn_down.weight': (n_embd, n_ff),
+            }
+        )
+
+    rng = random.Random(seed)
+    infos = []
+    data = []
+    offset = 0
+    for name, shape in shapes.items():
+        n = 1
+        for dim in shape:
+            n *= dim
+        if name.endswith('norm.weight'):
+            values = [1.0] * n
+        else:
+            values = [rng.gauss(0.0, 0.5) for _ in range(n)]
+        blob = struct.pack(f'<{n}f', *values)
+        blob += b'\0' * (-len(blob) % _ALIGNMENT)
+        # GGUF lists dimensions innermost first
+        infos.append(
+            _string(name)
+            + struct.pack('<I', len(shape))
+            + b''.join(struct.pack('<Q', dim) for dim in reversed(shape))
+            + struct.pack('<IQ', 0, offset)  # f32
+        )
+        data.append(blob)
+        offset += len(blob)
+
+    header = b'GGUF' + struct.pack('<IQQ', 3, len(shapes), len(metadata))
+    header += b''.join(_string(key) + _value(value) for key, value in metadata.items())
+    header += b''.join(infos)
+    header += b'\0' * (-len(header) % _ALIGNMENT)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.writelines(data)
+    return path
@@ -6,8 +6,11 @@ Llama_cpp backend lists all .gguf files located in models directory
 """
 
 print('Local available models:')
-for model in Model.available_models(backend='llama_cpp'):
-    print(model)
+for model in Model.local_models():
+    print(
+        f'{model.filename}: {model.architecture}, {model.parameter_count / 1e9:.1f}B params, '
+        f'{model.quantization}, native context {model.context_length}'
+    )
 print()
 
 print('Available models on remote:')
@@ -2,10 +2,15 @@ from .tools import Tool
 from .llm import llm
 from .chat import Chat
 from .llm_backend import LLM_Config
+from .context import ContextPolicy, SlidingWindowPolicy, SummarizePolicy, pin
 
 __all__ = [
     'Tool',
     'llm',
     'Chat',
-    'LLM_Config'
+    'LLM_Config',
+    'ContextPolicy',
+    'SlidingWindowPolicy',
+    'SummarizePolicy',
+    'pin',
 ]
\ No newline at end of file
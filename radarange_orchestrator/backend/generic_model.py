@@ -1,8 +1,10 @@
-from typing import Iterator, Optional
+import asyncio
+from typing import AsyncIterator, Iterator, Optional
 
 from ..formatting import ResponseFormat
 from ..chat import Chat, AIMessage, AIMessageChunk
 from ..tools import Tool
+from ..utils.async_utils import iterate_in_thread
 
 
 class GenericModel:
@@ -24,4 +26,36 @@ class GenericModel:
         pass
 
     def assure_loaded(self) -> None:
-        pass
\ No newline at end of file
+        pass
+
+    async def acreate_chat_completion(
+        self,
+        chat: Chat,
+        tools: list[Tool],
+        response_format: Optional[ResponseFormat] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 5000,
+        stream: bool = False,
+    ) -> AIMessage | AsyncIterator[AIMessageChunk]:
+        """Default implementation runs blocking create_chat_completion in a worker thread"""
+        if stream:
+            return iterate_in_thread(
+                self.create_chat_completion(
+                    chat, tools, response_format, temperature, max_tokens, True
+                )
+            )
+        return await asyncio.to_thread(
+            self.create_chat_completion,
+            chat,
+            tools,
+            response_format,
+            temperature,
+            max_tokens,
+            False,
+        )
+
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self.close)
+
+    async def aassure_loaded(self) -> None:
+        await asyncio.to_thread(self.assure_loaded)
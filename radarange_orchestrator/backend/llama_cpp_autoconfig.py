@@ -0,0 +1,265 @@
+import glob
+import os
+import subprocess
+from typing import Optional
+
+from pydantic import BaseModel
+
+from ..utils.model_registry import ModelInfo
+
+_GB = 1024**3
+
+# Memory left to the rest of the system: a share of the free memory, but not less than the minimum
+_RESERVE_SHARE = 0.1
+_MIN_RAM_RESERVE = _GB
+_MIN_VRAM_RESERVE = _GB // 4
+
+_KV_ELEMENT_BYTES = 2  # f16 cache
+_CTX_ALIGN = 256
+_MIN_CTX = 512
+# Smallest context worth keeping every layer on gpu for; below it layers are offloaded to cpu
+_MIN_GPU_CTX = 8192
+_DEFAULT_CTX = 4096  # for models without context length in metadata
+
+# llama_cpp defaults: logical and physical batch
+_GPU_BATCH = 2048
+_CPU_BATCH = 512
+_UBATCH = 512
+
+_GGML_NUMA_STRATEGY_DISTRIBUTE = 1
+
+
+class HostResources(BaseModel):
+    available_ram: int
+    physical_cores: int
+    numa_nodes: int = 1
+    gpu_free_memory: list[int] = []  # bytes per gpu in use, empty on cpu-only machines
+
+
+class MemoryEstimate(BaseModel):
+    """Bytes needed to load a model with a given context, and bytes available for it"""
+
+    weights: int
+    kv_cache: int
+    compute: int  # activations and logits of one physical batch, roughly
+    gpu_budget: int = 0
+    ram_budget: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.weights + self.kv_cache + self.compute
+
+
+class LlamaLoadPlan(BaseModel):
+    """Llama() arguments chosen for a model and a machine"""
+
+    n_ctx: int
+    n_batch: int
+    n_ubatch: int
+    n_threads: int
+    n_threads_batch: int
+    n_gpu_layers: int  # -1 is all
+    tensor_split: Optional[list[float]] = None
+    numa: int | bool = False
+    memory: MemoryEstimate
+
+
+def _available_ram() -> int:
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+
+
+def _usable_cpus() -> set[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return os.sched_getaffinity(0)
+    return set(range(os.cpu_count() or 1))
+
+
+def _physical_cores() -> int:
+    """Cores available to the process, not counting SMT siblings"""
+    cpus = _usable_cpus()
+    cores = set()
+    for cpu in cpus:
+        topology = f'/sys/devices/system/cpu/cpu{cpu}/topology'
+        try:
+            with open(f'{topology}/physical_package_id') as f:
+                package = f.read().strip()
+            with open(f'{topology}/core_id') as f:
+                core = f.read().strip()
+        except OSError:
+            return max(len(cpus), 1)
+        cores.add((package, core))
+    return max(len(cores), 1)
+
+
+def _numa_nodes() -> int:
+    return max(len(glob.glob('/sys/devices/system/node/node[0-9]*')), 1)
+
+
+def _gpu_free_memory(gpus: list[int]) -> list[int]:
+    """Free memory of the given nvidia gpus. Empty if it cannot be queried"""
+    if not gpus:
+        return []
+    try:
+        out = subprocess.run(
+            [
+                'nvidia-smi',
+                '--query-gpu=index,memory.free',
+                '--format=csv,noheader,nounits',
+            ],
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    free = {}
+    for line in out.splitlines():
+        index, memory = (field.strip() for field in line.split(','))
+        free[int(index)] = int(memory) * 1024**2
+    if not all(gpu in free for gpu in gpus):
+        return []
+    return [free[gpu] for gpu in gpus]
+
+
+def probe_resources(gpus: list[int]) -> HostResources:
+    return HostResources(
+        available_ram=_available_ram(),
+        physical_cores=_physical_cores(),
+        numa_nodes=_numa_nodes(),
+        gpu_free_memory=_gpu_free_memory(gpus),
+    )
+
+
+def _usable(free: int, min_reserve: int) -> int:
+    return max(free - max(int(free * _RESERVE_SHARE), min_reserve), 0)
+
+
+def _per_layer(value: int | list[int], n_layer: int) -> list[int]:
+    if isinstance(value, list):
+        return value
+    return [value] * n_layer
+
+
+def kv_bytes_per_token(info: ModelInfo) -> int:
+    """KV cache size of one context token, from attention shapes in the GGUF metadata"""
+    arch = info.architecture
+    metadata = info.metadata
+    n_layer = metadata.get(f'{arch}.block_count', 0)
+    n_embd = metadata.get(f'{arch}.embedding_length', 0)
+    n_head = metadata.get(f'{arch}.attention.head_count', 0)
+    if not n_layer or not n_head:
+        return 0  # no attention, e.g. recurrent models with a fixed-size state
+
+    heads = _per_layer(n_head, n_layer)
+    kv_heads = _per_layer(
+        metadata.get(f'{arch}.attention.head_count_kv', n_head), n_layer
+    )
+    total = 0
+    for q_heads, layer_kv_heads in zip(heads, kv_heads):
+        head_dim = n_embd // q_heads if q_heads else 0
+        key_length = metadata.get(f'{arch}.attention.key_length', head_dim)
+        value_length = metadata.get(f'{arch}.attention.value_length', head_dim)
+        total += layer_kv_heads * (key_length + value_length)
+    return total * _KV_ELEMENT_BYTES
+
+
+def compute_bytes(info: ModelInfo, n_ubatch: int) -> int:
+    n_embd = info.metadata.get(f'{info.architecture}.embedding_length', 0)
+    n_vocab = info.vocab_size or 0
+    # logits of the batch plus a few activations per token, in f32
+    return n_ubatch * (n_vocab + 8 * n_embd) * 4
+
+
+def plan_llama_load(
+    info: ModelInfo,
+    gpus: list[int],
+    max_ctx: int = 0,
+    resources: Optional[HostResources] = None,
+) -> LlamaLoadPlan:
+    """
+    Context, batch, threads and gpu offload for loading the model on this machine.
+
+    The context is the model's native one, limited by max_ctx (if > 0) and by the memory left
+    after weights for the KV cache. With gpus, all layers stay on gpu if that leaves
+    at least an 8k context (or the whole native one); otherwise layers are split between gpu
+    and cpu so that a longer context fits. Raises RuntimeError if even a minimal context does not fit.
+    """
+    if resources is None:
+        resources = probe_resources(gpus)
+    n_layer = info.metadata.get(f'{info.architecture}.block_count', 0)
+
+    ctx_limit = info.context_length or _DEFAULT_CTX
+    if max_ctx > 0:
+        ctx_limit = min(ctx_limit, max_ctx)
+
+    gpu_budget = sum(
+        _usable(free, _MIN_VRAM_RESERVE) for free in resources.gpu_free_memory
+    )
+    ram_budget = _usable(resources.available_ram, _MIN_RAM_RESERVE)
+    on_gpu = gpu_budget > 0
+    n_batch = min(_GPU_BATCH if on_gpu else _CPU_BATCH, ctx_limit)
+    n_ubatch = min(_UBATCH, n_batch)
+
+    weights = info.size
+    compute = compute_bytes(info, n_ubatch)
+    per_token = kv_bytes_per_token(info)
+
+    def fitting_ctx(budget: int) -> int:
+        if per_token == 0:
+            return ctx_limit if budget >= weights + compute else 0
+        ctx = (budget - weights - compute) // per_token
+        if ctx >= ctx_limit:
+            return ctx_limit
+        return ctx // _CTX_ALIGN * _CTX_ALIGN
+
+    n_gpu_layers = 0
+    n_ctx = fitting_ctx(gpu_budget) if on_gpu else 0
+    if on_gpu and n_ctx >= min(_MIN_GPU_CTX, ctx_limit):
+        n_gpu_layers = -1
+    else:
+        n_ctx = fitting_ctx(gpu_budget + ram_budget)
+        if on_gpu and n_layer > 0:
+            # layers take their share of weights and KV cache with them to gpu
+            share = (gpu_budget - compute) / (weights + per_token * max(n_ctx, 0))
+            n_gpu_layers = min(max(int(n_layer * share), 0), n_layer)
+
+    memory = MemoryEstimate(
+        weights=weights,
+        kv_cache=per_token * max(n_ctx, _MIN_CTX),
+        compute=compute,
+        gpu_budget=gpu_budget,
+        ram_budget=ram_budget,
+    )
+    if n_ctx < min(_MIN_CTX, ctx_limit):
+        raise RuntimeError(
+            f'{info.filename} does not fit in memory: needs {memory.total / _GB:.1f} GB '
+            f'with a {_MIN_CTX}-token context, {(gpu_budget + ram_budget) / _GB:.1f} GB available'
+        )
+    memory.kv_cache = per_token * n_ctx
+
+    tensor_split = None
+    if n_gpu_layers != 0 and len(resources.gpu_free_memory) > 1:
+        # layers are spread in proportion to free memory of each gpu
+        tensor_split = [
+            free / sum(resources.gpu_free_memory) for free in resources.gpu_free_memory
+        ]
+
+    return LlamaLoadPlan(
+        n_ctx=n_ctx,
+        n_batch=min(n_batch, n_ctx),
+        n_ubatch=min(n_ubatch, n_ctx),
+        n_threads=resources.physical_cores,
+        n_threads_batch=resources.physical_cores,
+        n_gpu_layers=n_gpu_layers,
+        tensor_split=tensor_split,
+        numa=_GGML_NUMA_STRATEGY_DISTRIBUTE if resources.numa_nodes > 1 else False,
+        memory=memory,
+    )
@@ -1,6 +1,7 @@
 import json
 from typing import overload
 
+from langchain_core.messages.ai import UsageMetadata
 from llama_cpp import (
     ChatCompletionRequestAssistantMessage,
     ChatCompletionRequestSystemMessage,
@@ -13,11 +14,13 @@ from llama_cpp.llama_types import (
     ChatCompletionRequestMessage,
     ChatCompletionTool,
     CreateChatCompletionResponse,
+    CreateChatCompletionStreamResponse,
 )
 
 from ..chat.chat import Chat
 from ..chat.messages import (
     AIMessage,
+    AIMessageChunk,
     AnyCompleteMessage,
     HumanMessage,
     SystemMessage,
@@ -85,10 +88,12 @@ def from_llama_message(
     | CreateChatCompletionResponse,
 ) -> AnyCompleteMessage:
     stop_reason = 'stop'
+    usage = None
 
     # if isinstance(message, CreateChatCompletionResponse):
     if 'role' not in message:
         stop_reason = message['choices'][0]['finish_reason']
+        usage = message.get('usage')
         message: ChatCompletionResponseMessage = message['choices'][0]['message']
 
     content = message['content']
@@ -106,6 +111,10 @@ def from_llama_message(
             )
         message = AIMessage(content=content, tool_calls=tool_calls)
         message.response_metadata['stop_reason'] = stop_reason
+        if usage is not None:
+            message.usage_metadata = to_usage_metadata(
+                usage['prompt_tokens'], usage['completion_tokens']
+            )
         return message
     elif message['role'] == 'user':
         return HumanMessage(content=content)
@@ -121,8 +130,24 @@ def from_llama_message(
         raise ValueError(f'Unknown role: {message["role"]}')
 
 
+def from_llama_chunk(chunk: CreateChatCompletionStreamResponse) -> AIMessageChunk:
+    choice = chunk['choices'][0]
+    message = AIMessageChunk(content=choice['delta'].get('content') or '')
+    if choice['finish_reason'] is not None:
+        message.response_metadata['stop_reason'] = choice['finish_reason']
+    return message
+
+
+def to_usage_metadata(prompt_tokens: int, completion_tokens: int) -> UsageMetadata:
+    return UsageMetadata(
+        input_tokens=prompt_tokens,
+        output_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+
 def to_llama_chat(chat: Chat) -> list[ChatCompletionRequestMessage]:
-    return [to_llama_message(message) for message in chat]
+    return chat.converted('llama_cpp', to_llama_message)
 
 
 def to_llama_tool(tool: Tool) -> ChatCompletionTool:
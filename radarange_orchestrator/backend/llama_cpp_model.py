@@ -1,23 +1,42 @@
 import atexit
 import os
+import queue
+import threading
 import weakref
-from typing import Literal, Optional
+from typing import Iterator, Literal, Optional
 
 from llama_cpp import (
     LLAMA_SPLIT_MODE_LAYER,
     LLAMA_SPLIT_MODE_NONE,
     LLAMA_SPLIT_MODE_ROW,
     Llama,
+    llama_supports_gpu_offload,
+    llama_vocab_is_eog,
 )
+from llama_cpp.llama_chat_format import Jinja2ChatFormatter
 from pydantic import BaseModel
 
-from ..chat import AIMessage, Chat
+from ..chat import AIMessage, AIMessageChunk, AnyCompleteMessage, Chat, HumanMessage
 from ..formatting import ResponseFormat
 from ..llm_backend import LLM_Config
 from ..tools import Tool
 from ..utils.extract_tool_calls import extract_tool_calls
+from ..utils.model_registry import model_registry
+from ..utils.token_counting import (
+    TemplateOverhead,
+    count_chat_tokens,
+    measure_template_overhead,
+)
 from .generic_model import GenericModel
-from .llama_cpp_bindings import from_llama_message, to_llama_chat, to_llama_tools
+from .llama_cpp_autoconfig import LlamaLoadPlan, plan_llama_load
+from .llama_cpp_bindings import (
+    from_llama_chunk,
+    from_llama_message,
+    to_llama_chat,
+    to_llama_message,
+    to_llama_tools,
+    to_usage_metadata,
+)
 
 
 # Since Llama destructs ill while interpreter shutdown
@@ -36,21 +55,65 @@ class LlamaConfig(BaseModel):
     split_mode: Literal[
         LLAMA_SPLIT_MODE_NONE, LLAMA_SPLIT_MODE_LAYER, LLAMA_SPLIT_MODE_ROW  # type: ignore
     ] = LLAMA_SPLIT_MODE_LAYER
+    auto: bool = False  # size the load from model metadata and free memory, see plan_llama_load
 
 
 def to_llama_cpp_config(config: LLM_Config) -> LlamaConfig:
     return LlamaConfig(
-        gpus=config.gpus, ctx_size=config.ctx_size, split_mode=LLAMA_SPLIT_MODE_LAYER
+        gpus=config.gpus,
+        ctx_size=config.ctx_size,
+        split_mode=LLAMA_SPLIT_MODE_LAYER,
+        auto=config.auto_config,
     )
 
 
+class PromptCacheStats(BaseModel):
+    """
+    Counters of KV cache reuse between consecutive completions. Only observes:
+    the prefix is reused by llama_cpp Llama.generate, as long as the rendered prompt keeps it.
+    A hit means the whole previously evaluated prompt was reused as a prefix of the new one.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    reused_tokens: int = 0
+    evaluated_tokens: int = 0
+
+
 _instances = weakref.WeakSet()
 
 
+class _CountingLlama(Llama):
+    """
+    Llama recording token counts of its last generation,
+    which llama_cpp does not report for streamed completions.
+    """
+
+    last_prompt_tokens: int = 0
+    last_completion_tokens: int = 0  # sampled tokens, except a final end-of-generation one
+
+    def generate(self, tokens, *args, **kwargs):
+        self.last_prompt_tokens = len(tokens)
+        self.last_completion_tokens = 0
+        generator = super().generate(tokens, *args, **kwargs)
+        try:
+            token = next(generator)
+            while True:
+                if not llama_vocab_is_eog(self._model.vocab, token):
+                    self.last_completion_tokens += 1
+                token = generator.send((yield token))
+        except StopIteration:
+            return
+        finally:
+            generator.close()
+
+
 class LlamaModel(GenericModel):
     model_path: str
     config: LlamaConfig
-    llm: Llama
+    llm: _CountingLlama
+    prompt_cache_stats: PromptCacheStats
+    load_plan: Optional[LlamaLoadPlan] = None  # chosen settings, if config.auto
 
     def __init__(self, model_path: str, config: Optional[LlamaConfig] = None):
         if config is None:
@@ -61,9 +124,18 @@ class LlamaModel(GenericModel):
 
         self.model_path = model_path
         self.config = config
+        self.prompt_cache_stats = PromptCacheStats()
+        self._last_prompt_tokens = 0
+        self._lock = threading.Lock()
+        self._template_overhead: Optional[TemplateOverhead] = None
+        self._tools_overhead: dict[tuple[str, ...], int] = {}
 
         os.environ['CUDA_VISIBLE_DEVICES'] = ','.join(map(str, self.config.gpus))
 
+        if self.config.auto:
+            self._load_auto()
+            return
+
         # fit all the context and weights on gpu to perform 30 t/s
         if self.config.ctx_size <= 0:
             if len(self.config.gpus) == 1:
@@ -78,7 +150,7 @@ class LlamaModel(GenericModel):
                 0.3910968437984273,
             ]  # from lm_studio logs
 
-        self.llm = Llama(
+        self.llm = _CountingLlama(
             seed=999,
             model_path=self.model_path,
             n_gpu_layers=-1,  # all
@@ -93,15 +165,90 @@ class LlamaModel(GenericModel):
             verbose=False,
         )
 
+    def _load_auto(self) -> None:
+        info = model_registry.info(self.model_path)
+        if info is None:
+            raise RuntimeError(f'Cannot read GGUF header of {self.model_path}')
+        gpus = self.config.gpus if llama_supports_gpu_offload() else []
+        plan = plan_llama_load(info, gpus, max_ctx=self.config.ctx_size)
+
+        self.load_plan = plan
+        self.config.ctx_size = plan.n_ctx
+        self.llm = _CountingLlama(
+            seed=999,
+            model_path=self.model_path,
+            n_gpu_layers=plan.n_gpu_layers,
+            split_mode=self.config.split_mode,
+            main_gpu=0,  # first of the visible gpus
+            tensor_split=plan.tensor_split,
+            n_ctx=plan.n_ctx,
+            n_batch=plan.n_batch,
+            n_ubatch=plan.n_ubatch,
+            n_threads=plan.n_threads,
+            n_threads_batch=plan.n_threads_batch,
+            flash_attn=True,
+            numa=plan.numa,
+            verbose=False,
+        )
+
     def close(self) -> None:
         self.llm.close()
 
     def count_tokens(self, prompt: str | Chat):
+        """
+        Counts tokens of a string, or of a chat prompt including chat template and chat.tools overhead.
+        Message content counts are cached per message, so recounting a grown chat
+        only tokenizes new or edited messages.
+        """
         if isinstance(prompt, Chat):
-            raise NotImplementedError('Counting tokens for chat is not yet implemented')
+            return count_chat_tokens(
+                prompt.messages,
+                self.model_path,
+                self._count_text,
+                self._get_template_overhead(),
+            ) + self._count_tools_overhead(prompt.tools)
 
         return len(self.llm.tokenize(prompt.encode('utf-8')))
 
+    def _count_text(self, text: str) -> int:
+        return len(self.llm.tokenize(text.encode('utf-8'), add_bos=False, special=True))
+
+    def _render_prompt(
+        self, messages: list[AnyCompleteMessage], tools: list[Tool] = []
+    ) -> str:
+        template = self.llm.metadata['tokenizer.chat_template']
+        eos_token = self.llm._model.token_get_text(self.llm.token_eos())
+        bos_token = self.llm._model.token_get_text(self.llm.token_bos())
+        formatter = Jinja2ChatFormatter(template, eos_token, bos_token)
+        return formatter(
+            messages=[to_llama_message(message) for message in messages],
+            tools=to_llama_tools(tools) if tools else None,
+        ).prompt
+
+    def _get_template_overhead(self) -> TemplateOverhead:
+        if self._template_overhead is None:
+            if 'tokenizer.chat_template' in self.llm.metadata:
+                self._template_overhead = measure_template_overhead(
+                    self._render_prompt, self._count_text
+                )
+            else:
+                self._template_overhead = TemplateOverhead()
+        return self._template_overhead
+
+    def _count_tools_overhead(self, tools: list[Tool]) -> int:
+        if not tools or 'tokenizer.chat_template' not in self.llm.metadata:
+            return 0
+
+        key = tuple(tool.name for tool in tools)
+        if key not in self._tools_overhead:
+            probe = [HumanMessage(content='x')]
+            self._tools_overhead[key] = max(
+                self._count_text(self._render_prompt(probe, tools))
+                - self._count_text(self._render_prompt(probe)),
+                0,
+            )
+        return self._tools_overhead[key]
+
     def create_chat_completion(
         self,
         chat: Chat,
@@ -110,29 +257,136 @@ class LlamaModel(GenericModel):
         temperature: float = 0.7,
         max_tokens: int = 5000,
         stream: bool = False,
-    ) -> AIMessage:
+    ) -> AIMessage | Iterator[AIMessageChunk]:
         grammar = response_format.grammar if response_format else None
 
         tools = tools + chat.tools
         tools = to_llama_tools(tools)
 
+        completion_kwargs = dict(
+            messages=to_llama_chat(chat),
+            tools=tools,
+            grammar=grammar,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
         if stream:
-            raise NotImplementedError('Stream mode is not yet implemented')
-        else:
+            return self._stream_chat_completion(chat, completion_kwargs)
+
+        # Llama is not thread-safe, completions from different threads are serialized
+        with self._lock:
+            # tokens already in the KV cache; llama_cpp only evaluates the suffix after their common prefix
+            evaluated_prefix = self.llm.input_ids.tolist()
+
             # response: CreateChatCompletionResponse
-            response = self.llm.create_chat_completion(
-                to_llama_chat(chat),
-                tools=tools,
-                grammar=grammar,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=stream,
-            )
+            response = self.llm.create_chat_completion(**completion_kwargs, stream=False)
 
             message: AIMessage = from_llama_message(response)
-            message.tool_calls = extract_tool_calls(message.content)
-            if len(message.tool_calls) > 0:
-                message.response_metadata['stop_reason'] = 'tool_call'
+            self._update_prompt_cache_stats(
+                evaluated_prefix, message.usage_metadata['input_tokens']
+            )
+        self._finalize_message(message)
+
+        chat.add_message(message)
+        return message
+
+    def _stream_chat_completion(
+        self, chat: Chat, completion_kwargs: dict
+    ) -> Iterator[AIMessageChunk]:
+        """
+        Yields AIMessageChunk per llama_cpp stream chunk.
+        Generation runs in a worker thread that holds the model lock and passes chunks through
+        a queue, so the lock is never held across yield: a nested completion waits for this one to
+        finish rather than deadlocking, and an abandoned stream releases the lock once its
+        generation ends. Closing the stream early stops generation.
+        Once the stream is exhausted or closed, the assembled AIMessage is added to chat.
+        """
+        chunks: queue.SimpleQueue = queue.SimpleQueue()
+        stop = threading.Event()
+        threading.Thread(
+            target=self._generate_stream,
+            args=(completion_kwargs, chunks, stop),
+            name='llama_stream',
+            daemon=True,
+        ).start()
+
+        def next_item() -> AIMessageChunk | AIMessage:
+            item = chunks.get()
+            if isinstance(item, BaseException):
+                raise item
+            return item
+
+        try:
+            while isinstance(item := next_item(), AIMessageChunk):
+                yield item
+        except GeneratorExit:
+            # e.g. stopped at a complete tool call, keep what was generated
+            stop.set()
+            while isinstance(item := next_item(), AIMessageChunk):
+                pass
+            chat.add_message(item)
+            raise
+        chat.add_message(item)
+
+    def _generate_stream(
+        self, completion_kwargs: dict, chunks: queue.SimpleQueue, stop: threading.Event
+    ) -> None:
+        """Puts stream chunks, then the assembled AIMessage (or an exception) to chunks"""
+        try:
+            with self._lock:
+                evaluated_prefix = self.llm.input_ids.tolist()
+
+                # response: Iterator[CreateChatCompletionStreamResponse]
+                response = self.llm.create_chat_completion(**completion_kwargs, stream=True)
+                assembled = AIMessageChunk(content='')
+                try:
+                    for chunk in response:
+                        message_chunk = from_llama_chunk(chunk)
+                        assembled += message_chunk
+                        chunks.put(message_chunk)
+                        if stop.is_set():
+                            break
+                finally:
+                    response.close()
+                chunks.put(self._assemble_streamed_message(assembled, evaluated_prefix))
+        except Exception as e:
+            chunks.put(e)
+
+    def _assemble_streamed_message(
+        self, assembled: AIMessageChunk, evaluated_prefix: list[int]
+    ) -> AIMessage:
+        message = AIMessage(
+            content=assembled.content,
+            response_metadata=assembled.response_metadata,
+        )
+        message.response_metadata.setdefault('stop_reason', 'stop')
+
+        # llama_cpp does not report usage for streamed completions, the generation was counted
+        prompt_tokens = self.llm.last_prompt_tokens
+        message.usage_metadata = to_usage_metadata(
+            prompt_tokens, self.llm.last_completion_tokens
+        )
+        self._update_prompt_cache_stats(evaluated_prefix, prompt_tokens)
+
+        self._finalize_message(message)
+        return message
+
+    def _update_prompt_cache_stats(
+        self, evaluated_prefix: list[int], prompt_tokens: int
+    ) -> None:
+        prompt = self.llm.input_ids[:prompt_tokens].tolist()
+        reused = Llama.longest_token_prefix(evaluated_prefix, prompt)
+
+        stats = self.prompt_cache_stats
+        if self._last_prompt_tokens > 0 and reused >= self._last_prompt_tokens:
+            stats.hits += 1
+        else:
+            stats.misses += 1
+        stats.reused_tokens += reused
+        stats.evaluated_tokens += prompt_tokens - reused
+        self._last_prompt_tokens = prompt_tokens
 
-            chat.add_message(message)
-            return message
+    def _finalize_message(self, message: AIMessage) -> None:
+        message.tool_calls = extract_tool_calls(message.content)
+        if len(message.tool_calls) > 0:
+            message.response_metadata['stop_reason'] = 'tool_call'
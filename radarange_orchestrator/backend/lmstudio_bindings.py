@@ -1,11 +1,14 @@
 import json
 from functools import wraps
-from typing import Any, Literal, overload
+from typing import Any, Callable, Literal, Optional, overload
 
 import lmstudio as lms
+from lmstudio.history import ChatHistoryData
+from langchain_core.messages.ai import UsageMetadata
 
 from ..chat import (
     AIMessage,
+    AIMessageChunk,
     AnyCompleteMessage,
     Chat,
     HumanMessage,
@@ -109,12 +112,34 @@ def from_lms_response(message: lms.PredictionResult) -> AIMessage:
 
     result = AIMessage(content=content)
     result.response_metadata['stop_reason'] = stop_reason
+    result.response_metadata['time_to_first_token'] = (
+        message.stats.time_to_first_token_sec
+    )
+    result.response_metadata['tokens_per_second'] = message.stats.tokens_per_second
+    result.usage_metadata = to_usage_metadata(message.stats)
     return result
 
 
+def from_lms_fragment(fragment: lms.LlmPredictionFragment) -> AIMessageChunk:
+    return AIMessageChunk(content=fragment.content)
+
+
+def to_usage_metadata(stats: lms.LlmPredictionStats) -> UsageMetadata:
+    prompt_tokens = stats.prompt_tokens_count or 0
+    completion_tokens = stats.predicted_tokens_count or 0
+    return UsageMetadata(
+        input_tokens=prompt_tokens,
+        output_tokens=completion_tokens,
+        total_tokens=stats.total_tokens_count or prompt_tokens + completion_tokens,
+    )
+
+
 def to_lms_chat(chat: Chat) -> lms.Chat:
-    return lms.Chat.from_history(
-        {'messages': [to_lms_message(message) for message in chat]}
+    # Cached messages are wrapped as they are through the private _initial_history argument:
+    # the public from_history deep-copies the whole history on every request.
+    # The argument is not part of the SDK api, so lmstudio is pinned below 1.5 in pyproject.toml
+    return lms.Chat(
+        _initial_history=ChatHistoryData(messages=chat.converted('lmstudio', to_lms_message))
     )
 
 
@@ -138,10 +163,13 @@ def convert_stop_reason(
     return finish_reason_mapping[stop_reason]
 
 
-def tool_to_fun(tool: Tool):
+def tool_to_fun(tool: Tool, postprocess: Optional[Callable[[str, dict, Any], Any]] = None):
     @wraps(tool.func)
     def wrapper(**kwargs):
-        return tool.run(kwargs)
+        output = tool.run(kwargs)
+        if postprocess is not None:
+            output = postprocess(tool.name, kwargs, output)
+        return output
 
     return wrapper
 
@@ -163,17 +191,45 @@ def to_lms_fun_params(args: dict[str, Any]) -> dict[str, Any]:
                 f'Revice to_lms_fun_params function with argument {args}'
             )
 
-        params[key] = parameter_type_map[args[key]['type']]
+        schema = args[key]
+        if 'type' not in schema and 'anyOf' in schema:
+            # Optional[X] arguments: the first non-null alternative
+            schema = next(
+                (option for option in schema['anyOf'] if option.get('type') != 'null'),
+                {'type': 'string'},
+            )
+        params[key] = parameter_type_map[schema.get('type', 'string')]
     return params
 
 
-def to_lms_tools(tools: list[Tool]) -> list[lms.ToolFunctionDef]:
+def to_lms_tool_definitions(tools: list[Tool]) -> list[dict[str, Any]]:
+    """Tool definitions as the prompt template renders them, same shape as llama_cpp tools"""
+    return [
+        {
+            'type': 'function',
+            'function': {
+                'name': tool.name,
+                'description': tool.description,
+                'parameters': {'type': 'object', 'properties': tool.args},
+            },
+        }
+        for tool in tools
+    ]
+
+
+def to_lms_tools(
+    tools: list[Tool], postprocess: Optional[Callable[[str, dict, Any], Any]] = None
+) -> list[lms.ToolFunctionDef]:
+    """
+    postprocess(tool_name, arguments, output) is applied to every tool output
+    before it goes to the model
+    """
     return [
         lms.ToolFunctionDef(
             name=tool.name,
             description=tool.description,
             parameters=to_lms_fun_params(tool.args),
-            implementation=tool_to_fun(tool),
+            implementation=tool_to_fun(tool, postprocess),
         )
         for tool in tools
     ]
@@ -0,0 +1,474 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, TypeVar
+
+import lmstudio as lms
+from pydantic import BaseModel
+
+from ..chat import (
+    AIMessage,
+    AIMessageChunk,
+    Chat,
+    EmptyMessageHandler,
+    MessageHandler,
+)
+from ..formatting import ResponseFormat
+from ..tools import Tool
+from .generic_model import GenericModel
+from .lmstudio_remote_model import LMSConfig, LMSModel
+
+T = TypeVar('T')
+
+# Errors that mean the host is unreachable or dropped the connection, as opposed to request errors
+HOST_ERRORS = (
+    lms.LMStudioWebsocketError,
+    lms.LMStudioChannelClosedError,
+    OSError,
+)
+
+
+class HostFailedError(RuntimeError):
+    """Host error after messages were delivered, so the request is not retried on another host"""
+
+
+class PoolConfig(BaseModel):
+    failure_threshold: int = 3  # consecutive host errors that open the circuit
+    cooldown: float = 30.0  # seconds before an open circuit is probed again
+    # seconds between background health checks, started by requests once the last one is older.
+    # 0 leaves health checks to health_check() and half-open probes
+    health_interval: float = 60.0
+
+
+class Endpoint:
+    """Runtime state of one LM Studio host in the pool"""
+
+    host: str
+    model: Optional[LMSModel] = None
+    in_flight: int = 0
+    served: int = 0
+    failures: int = 0
+    opened_at: Optional[float] = None
+    probing: bool = False  # a health probe is in progress, others wait for its outcome
+
+    def __init__(self, host: str):
+        self.host = host
+        self.lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return self.opened_at is None
+
+    def __repr__(self) -> str:
+        state = 'closed' if self.healthy else 'open'
+        return f'Endpoint({self.host}, in_flight={self.in_flight}, circuit={state})'
+
+
+class LMSPool(GenericModel):
+    """
+    Routes requests across several LM Studio hosts serving the same model.
+
+    Every request goes to the healthy host with the fewest requests in flight.
+    Consecutive host errors open a circuit breaker for the host. After the cooldown,
+    the host is probed by a health check before it gets traffic again, by one request at a time.
+    Requests also start a background health check of all hosts every health_interval seconds.
+    A request that fails with a host error is retried on the next host, unless
+    streamed tokens were already delivered.
+    """
+
+    model_id: str
+    config: LMSConfig
+    pool_config: PoolConfig
+    endpoints: list[Endpoint]
+
+    def __init__(
+        self,
+        hosts: list[str],
+        model: str,
+        config: Optional[LMSConfig] = None,
+        pool_config: Optional[PoolConfig] = None,
+        model_factory: Callable[[str, str, Optional[LMSConfig]], LMSModel] = LMSModel,
+    ):
+        if len(hosts) == 0:
+            raise ValueError('LMSPool requires at least one host')
+
+        self.model_id = model
+        self.config = config
+        self.pool_config = pool_config if pool_config is not None else PoolConfig()
+        self.model_factory = model_factory
+        self.endpoints = [Endpoint(host) for host in hosts]
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def close(self) -> None:
+        for endpoint in self.endpoints:
+            if endpoint.model is not None:
+                try:
+                    endpoint.model.close()
+                except HOST_ERRORS:
+                    pass
+                endpoint.model = None
+
+    def assure_loaded(self) -> None:
+        # checked per host right before each request
+        pass
+
+    def health_check(self) -> dict[str, bool]:
+        """
+        Probes every host, updating circuit breakers. Returns host -> healthy.
+        A host already being probed reports its current state instead.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+        return {endpoint.host: self._probe(endpoint) for endpoint in self.endpoints}
+
+    def count_tokens(self, prompt: str | Chat) -> int:
+        return self._call(lambda model: model.count_tokens(prompt))
+
+    def create_chat_completion(
+        self,
+        chat: Chat,
+        tools: list[Tool],
+        response_format: Optional[ResponseFormat] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 5000,
+        stream: bool = False,
+    ) -> AIMessage | Iterator[AIMessageChunk]:
+        if stream:
+            return self._stream_chat_completion(
+                chat, tools, response_format, temperature, max_tokens
+            )
+        return self._call(
+            lambda model: model.create_chat_completion(
+                chat, tools, response_format, temperature, max_tokens, False
+            )
+        )
+
+    async def acreate_chat_completion(
+        self,
+        chat: Chat,
+        tools: list[Tool],
+        response_format: Optional[ResponseFormat] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 5000,
+        stream: bool = False,
+    ) -> AIMessage | AsyncIterator[AIMessageChunk]:
+        if stream:
+            return self._astream_chat_completion(
+                chat, tools, response_format, temperature, max_tokens
+            )
+        return await self._acall(
+            lambda model: model.acreate_chat_completion(
+                chat, tools, response_format, temperature, max_tokens, False
+            )
+        )
+
+    def act(
+        self,
+        chat: Chat,
+        tools: list[Tool] = [],
+        on_message: MessageHandler = EmptyMessageHandler,
+        temperature: float = 0.7,
+        max_tokens_per_message: int = -1,
+        max_prediction_rounds: int = 3,
+    ) -> AIMessage:
+        n_messages = len(chat.messages)
+
+        def act(model: LMSModel) -> AIMessage:
+            try:
+                return model.act(
+                    chat,
+                    tools,
+                    on_message,
+                    temperature,
+                    max_tokens_per_message,
+                    max_prediction_rounds,
+                )
+            except HOST_ERRORS as e:
+                # messages were already delivered, retrying would duplicate them
+                if len(chat.messages) != n_messages:
+                    raise HostFailedError(
+                        f'LM Studio host failed during act: {e}'
+                    ) from e
+                raise
+
+        return self._call(act)
+
+    async def aact(
+        self,
+        chat: Chat,
+        tools: list[Tool] = [],
+        on_message: MessageHandler = EmptyMessageHandler,
+        temperature: float = 0.7,
+        max_tokens_per_message: int = -1,
+        max_prediction_rounds: int = 3,
+    ) -> AIMessage:
+        return await asyncio.to_thread(
+            self.act,
+            chat,
+            tools,
+            on_message,
+            temperature,
+            max_tokens_per_message,
+            max_prediction_rounds,
+        )
+
+    def _stream_chat_completion(
+        self,
+        chat: Chat,
+        tools: list[Tool],
+        response_format: Optional[ResponseFormat],
+        temperature: float,
+        max_tokens: int,
+    ) -> Iterator[AIMessageChunk]:
+        tried: set[Endpoint] = set()
+        last_error: Optional[Exception] = None
+        while (endpoint := self._acquire(tried)) is not None:
+            started = False
+            try:
+                model = self._connect(endpoint)
+                for chunk in model.create_chat_completion(
+                    chat, tools, response_format, temperature, max_tokens, True
+                ):
+                    started = True
+                    yield chunk
+            except HOST_ERRORS as e:
+                self._record_failure(endpoint)
+                if started:
+                    raise
+                tried.add(endpoint)
+                last_error = e
+            else:
+                self._record_success(endpoint)
+                return
+            finally:
+                self._release(endpoint)
+        raise self._exhausted_error() from last_error
+
+    async def _astream_chat_completion(
+        self,
+        chat: Chat,
+        tools: list[Tool],
+        response_format: Optional[ResponseFormat],
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[AIMessageChunk]:
+        tried: set[Endpoint] = set()
+        last_error: Optional[Exception] = None
+        while (endpoint := await self._aacquire(tried)) is not None:
+            started = False
+            try:
+                model = await self._aconnect(endpoint)
+                stream = await model.acreate_chat_completion(
+                    chat, tools, response_format, temperature, max_tokens, True
+                )
+                async for chunk in stream:
+                    started = True
+                    yield chunk
+            except HOST_ERRORS as e:
+                self._record_failure(endpoint)
+                if started:
+                    raise
+                tried.add(endpoint)
+                last_error = e
+            else:
+                self._record_success(endpoint)
+                return
+            finally:
+                self._release(endpoint)
+        raise self._exhausted_error() from last_error
+
+    def _call(self, fn: Callable[[LMSModel], T]) -> T:
+        tried: set[Endpoint] = set()
+        last_error: Optional[Exception] = None
+        while (endpoint := self._acquire(tried)) is not None:
+            try:
+                result = fn(self._connect(endpoint))
+            except HOST_ERRORS as e:
+                self._record_failure(endpoint)
+                tried.add(endpoint)
+                last_error = e
+            except HostFailedError:
+                self._record_failure(endpoint)
+                raise
+            else:
+                self._record_success(endpoint)
+                return result
+            finally:
+                self._release(endpoint)
+        raise self._exhausted_error() from last_error
+
+    async def _acall(self, fn: Callable[[LMSModel], Awaitable[T]]) -> T:
+        tried: set[Endpoint] = set()
+        last_error: Optional[Exception] = None
+        while (endpoint := await self._aacquire(tried)) is not None:
+            try:
+                result = await fn(await self._aconnect(endpoint))
+            except HOST_ERRORS as e:
+                self._record_failure(endpoint)
+                tried.add(endpoint)
+                last_error = e
+            else:
+                self._record_success(endpoint)
+                return result
+            finally:
+                self._release(endpoint)
+        raise self._exhausted_error() from last_error
+
+    def _exhausted_error(self) -> RuntimeError:
+        return RuntimeError(
+            f'No healthy LM Studio hosts left for {self.model_id}: {self.endpoints}'
+        )
+
+    def _acquire(self, tried: set[Endpoint]) -> Optional[Endpoint]:
+        """Picks the least loaded healthy host not tried yet by this request"""
+        while (endpoint := self._select(tried)) is not None:
+            if endpoint.healthy:
+                return endpoint
+            # circuit is half-open: let the host in only if it passes a health check
+            if self._run_probe(endpoint):
+                return self._admit(endpoint)
+            tried.add(endpoint)
+        return None
+
+    async def _aacquire(self, tried: set[Endpoint]) -> Optional[Endpoint]:
+        """Same as _acquire, probing half-open hosts without blocking the event loop"""
+        while (endpoint := self._select(tried)) is not None:
+            if endpoint.healthy:
+                return endpoint
+            if await self._arun_probe(endpoint):
+                return self._admit(endpoint)
+            tried.add(endpoint)
+        return None
+
+    def _select(self, tried: set[Endpoint]) -> Optional[Endpoint]:
+        """
+        Picks the least loaded host not tried yet. A healthy host is returned admitted,
+        a half-open one is returned claimed for probing. Hosts being probed are skipped.
+        """
+        self._refresh_health()
+        with self._lock:
+            now = time.monotonic()
+            candidates = [
+                e
+                for e in self.endpoints
+                if e not in tried
+                and (
+                    e.healthy
+                    or (
+                        not e.probing and now - e.opened_at >= self.pool_config.cooldown
+                    )
+                )
+            ]
+            if len(candidates) == 0:
+                return None
+            # ties between equally loaded hosts go to the one that served less
+            endpoint = min(
+                candidates, key=lambda e: (not e.healthy, e.in_flight, e.served)
+            )
+            if endpoint.healthy:
+                endpoint.in_flight += 1
+                endpoint.served += 1
+            else:
+                endpoint.probing = True
+            return endpoint
+
+    def _admit(self, endpoint: Endpoint) -> Endpoint:
+        with self._lock:
+            endpoint.in_flight += 1
+            endpoint.served += 1
+        return endpoint
+
+    def _refresh_health(self) -> None:
+        """Starts a background health check once the last one is older than health_interval"""
+        interval = self.pool_config.health_interval
+        if interval <= 0:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at < interval:
+                return
+            if self._health_thread is not None and self._health_thread.is_alive():
+                return
+            self._checked_at = time.monotonic()
+            self._health_thread = threading.Thread(
+                target=self.health_check, name='lms_pool_health', daemon=True
+            )
+            self._health_thread.start()
+
+    def _release(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+
+    def _connect(self, endpoint: Endpoint) -> LMSModel:
+        with endpoint.lock:
+            if endpoint.model is None:
+                endpoint.model = self.model_factory(
+                    endpoint.host, self.model_id, self.config
+                )
+            else:
+                endpoint.model.assure_loaded()
+            return endpoint.model
+
+    async def _aconnect(self, endpoint: Endpoint) -> LMSModel:
+        model = endpoint.model
+        if model is None:
+            # LMSModel connects its sync client on construction
+            return await asyncio.to_thread(self._connect, endpoint)
+        await model.aassure_loaded()
+        return model
+
+    def _probe(self, endpoint: Endpoint) -> bool:
+        with self._lock:
+            if endpoint.probing:
+                return endpoint.healthy
+            endpoint.probing = True
+        return self._run_probe(endpoint)
+
+    def _run_probe(self, endpoint: Endpoint) -> bool:
+        """Probes a host claimed for probing, releasing the claim"""
+        try:
+            self._connect(endpoint)
+        except HOST_ERRORS:
+            self._record_failure(endpoint)
+            return False
+        else:
+            self._record_success(endpoint)
+            return True
+        finally:
+            with self._lock:
+                endpoint.probing = False
+
+    async def _arun_probe(self, endpoint: Endpoint) -> bool:
+        try:
+            await self._aconnect(endpoint)
+        except HOST_ERRORS:
+            self._record_failure(endpoint)
+            return False
+        else:
+            self._record_success(endpoint)
+            return True
+        finally:
+            with self._lock:
+                endpoint.probing = False
+
+    def _record_success(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.failures = 0
+            endpoint.opened_at = None
+
+    def _record_failure(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.failures += 1
+            if (
+                endpoint.failures >= self.pool_config.failure_threshold
+                or not endpoint.healthy
+            ):
+                endpoint.opened_at = time.monotonic()
+            # the connection is likely broken, reconnect on next use
+            model, endpoint.model = endpoint.model, None
+        if model is not None:
+            try:
+                model.disconnect()
+            except HOST_ERRORS:
+                pass
@@ -1,4 +1,6 @@
-from typing import Iterator, Optional
+import asyncio
+import threading
+from typing import AsyncIterator, Iterator, Optional
 
 import lmstudio as lms
 from pydantic import BaseModel
@@ -7,15 +9,31 @@ from lmstudio.sync_api import SyncSessionLlm
 from ..chat import (
     AIMessage,
     AIMessageChunk,
+    AnyCompleteMessage,
     Chat,
     EmptyMessageHandler,
+    HumanMessage,
     MessageHandler,
 )
 from ..formatting import ResponseFormat
 from ..llm_backend import LLM_Config
 from ..tools import Tool
+from ..utils.async_utils import LoopThread
+from ..utils.token_counting import (
+    TemplateOverhead,
+    count_chat_tokens,
+    measure_template_overhead,
+)
+from ..utils.tool_budget import ToolBudget, ToolBudgetTracker
 from .generic_model import GenericModel
-from .lmstudio_bindings import from_lms_message, from_lms_response, to_lms_chat, to_lms_tools
+from .lmstudio_bindings import (
+    from_lms_fragment,
+    from_lms_message,
+    from_lms_response,
+    to_lms_chat,
+    to_lms_tool_definitions,
+    to_lms_tools,
+)
 
 
 class Gpu(BaseModel):
@@ -28,11 +46,17 @@ class LMSConfig(BaseModel):
     ttl: int = 300
     gpu: Gpu
     ctx_size: int = 80000
+    tool_budget: Optional[ToolBudget] = None  # token limits of tool outputs in act()
 
 
 def to_lms_config(config: LLM_Config) -> LMSConfig:
     gpu_config = Gpu(disabledGpus=list({0, 1} ^ set(config.gpus)))
-    return LMSConfig(gpu=gpu_config, ctx_size=config.ctx_size, ttl=config.ttl)
+    return LMSConfig(
+        gpu=gpu_config,
+        ctx_size=config.ctx_size,
+        ttl=config.ttl,
+        tool_budget=config.tool_budget,
+    )
 
 
 class LMSModel(GenericModel):
@@ -41,6 +65,8 @@ class LMSModel(GenericModel):
     config: LMSConfig
     client: lms.Client
     model: lms.LLM
+    async_client: Optional[lms.AsyncClient] = None
+    async_model: Optional[lms.AsyncLLM] = None
 
     def __init__(self, host: str, model: str, config: Optional[LMSConfig] = None):
         if config is None:
@@ -54,20 +80,76 @@ class LMSModel(GenericModel):
         self.model_id = model
         self.default_ttl = config.ttl
         self.config = lms_config
+        self.tool_budget = config.tool_budget
+
+        self.host = host
+        # the async client lives in its own loop thread, opened on first async use
+        self._client_loop: Optional[LoopThread] = None
+        self._client_loop_lock = threading.Lock()
+        self._template_overhead: Optional[TemplateOverhead] = None
+        self._tools_overhead: dict[tuple[str, ...], int] = {}
 
         print(f'Connecting to host: {host}')
         self.client = lms.Client(host)
         self.model = self.client.llm.model(self.model_id, ttl=self.default_ttl, config=self.config)
 
     def close(self) -> None:
-        self.model.unload()
+        try:
+            self.model.unload()
+        finally:
+            self.disconnect()
+
+    def disconnect(self) -> None:
+        """Closes connections to the host, leaving the model loaded"""
+        self.client.close()
+        with self._client_loop_lock:
+            client_loop, self._client_loop = self._client_loop, None
+        if client_loop is not None:
+            if self.async_client is not None:
+                client_loop.run_sync(self.async_client.aclose())
+            self.async_client = None
+            self.async_model = None
+            client_loop.stop()
 
     def count_tokens(self, prompt: str | Chat):
+        """
+        Counts tokens of a string, or of a chat prompt including chat template and chat.tools overhead,
+        as the llama_cpp backend does.
+        Message content counts are cached per message, so recounting a grown chat
+        only tokenizes new or edited messages.
+        """
         if isinstance(prompt, Chat):
-            raise NotImplementedError('Counting tokens for chat is not yet implemented')
+            if self._template_overhead is None:
+                self._template_overhead = measure_template_overhead(
+                    self._render_prompt, self.model.count_tokens
+                )
+            return count_chat_tokens(
+                prompt.messages,
+                self.model_id,
+                self.model.count_tokens,
+                self._template_overhead,
+            ) + self._count_tools_overhead(prompt.tools)
 
         return self.model.count_tokens(prompt)
-    
+
+    def _render_prompt(self, messages: list[AnyCompleteMessage], tools: list[Tool] = []) -> str:
+        opts = {'toolDefinitions': to_lms_tool_definitions(tools)} if tools else {}
+        return self.model.apply_prompt_template(to_lms_chat(Chat(messages=messages)), opts)
+
+    def _count_tools_overhead(self, tools: list[Tool]) -> int:
+        if not tools:
+            return 0
+
+        key = tuple(tool.name for tool in tools)
+        if key not in self._tools_overhead:
+            probe = [HumanMessage(content='x')]
+            self._tools_overhead[key] = max(
+                self.model.count_tokens(self._render_prompt(probe, tools))
+                - self.model.count_tokens(self._render_prompt(probe)),
+                0,
+            )
+        return self._tools_overhead[key]
+
     def assure_loaded(self) -> None:
         loaded = [m.identifier for m in self.client._get_session(SyncSessionLlm).list_loaded()]
         if self.model.identifier not in loaded:
@@ -88,29 +170,125 @@ class LMSModel(GenericModel):
 
         response_format_json = None if response_format is None else response_format.json_schema
 
-        # TODO: add fields
+        # TODO: add tools
+        if len(all_tools) > 0:
+            raise NotImplementedError('Tool support for lms.llm.respond is not implemented')
+
+        config = self._prediction_config(temperature, max_tokens)
+
         if stream:
             response: lms.PredictionStream = self.model.respond_stream(
-                history=to_lms_chat(chat)
+                history=to_lms_chat(chat),
+                response_format=response_format_json,
+                config=config,
             )
-            raise NotImplementedError('Stream support for lms is not implemented')
+            return self._stream_chat_completion(chat, response)
         else:
-            # TODO: add tools
-            if len(all_tools) > 0:
-                raise NotImplementedError('Tool support for lms.llm.respond is not implemented')
-
             response: lms.PredictionResult = self.model.respond(
                 history=to_lms_chat(chat),
                 response_format=response_format_json,
-                config={
-                    'temperature': temperature,
-                    'maxTokens': max_tokens if max_tokens > 0 else None,
-                },
+                config=config,
             )
             message = from_lms_response(response)
             chat.add_message(message)
             return message
 
+    def _stream_chat_completion(
+        self, chat: Chat, response: lms.PredictionStream
+    ) -> Iterator[AIMessageChunk]:
+        """
+        Yields AIMessageChunk per lms prediction fragment.
+        Once the stream is exhausted, the final AIMessage with prediction stats is added to chat.
+        """
+        with response:
+            for fragment in response:
+                yield from_lms_fragment(fragment)
+
+        message = from_lms_response(response.result())
+        chat.add_message(message)
+
+    async def acreate_chat_completion(
+        self,
+        chat: Chat,
+        tools: list[Tool],
+        response_format: Optional[ResponseFormat] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 5000,
+        stream: bool = False,
+    ) -> AIMessage | AsyncIterator[AIMessageChunk]:
+        if len(tools + chat.tools) > 0:
+            raise NotImplementedError('Tool support for lms.llm.respond is not implemented')
+
+        response_format_json = None if response_format is None else response_format.json_schema
+        config = self._prediction_config(temperature, max_tokens)
+        client_loop = self._get_client_loop()
+
+        async def respond() -> lms.PredictionResult | lms.AsyncPredictionStream:
+            model = await self._get_async_model()
+            predict = model.respond_stream if stream else model.respond
+            return await predict(
+                history=to_lms_chat(chat),
+                response_format=response_format_json,
+                config=config,
+            )
+
+        response = await client_loop.run(respond())
+        if stream:
+            return self._astream_chat_completion(chat, client_loop, response)
+        message = from_lms_response(response)
+        chat.add_message(message)
+        return message
+
+    async def _astream_chat_completion(
+        self, chat: Chat, client_loop: LoopThread, response: lms.AsyncPredictionStream
+    ) -> AsyncIterator[AIMessageChunk]:
+        async def fragments() -> AsyncIterator[lms.LlmPredictionFragment]:
+            async with response:
+                async for fragment in response:
+                    yield fragment
+
+        async for fragment in client_loop.iterate(fragments()):
+            yield from_lms_fragment(fragment)
+
+        message = from_lms_response(response.result())
+        chat.add_message(message)
+
+    def _get_client_loop(self) -> LoopThread:
+        with self._client_loop_lock:
+            if self._client_loop is None:
+                self._client_loop = LoopThread('lms_async_client')
+            return self._client_loop
+
+    async def _get_async_model(self) -> lms.AsyncLLM:
+        """Runs in the client loop, where the async client is opened once and stays bound"""
+        if self.async_client is None:
+            client = lms.AsyncClient(self.host)
+            await client.__aenter__()
+            self.async_client = client
+        if self.async_model is None:
+            self.async_model = await self.async_client.llm.model(
+                self.model_id, ttl=self.default_ttl, config=self.config
+            )
+        return self.async_model
+
+    async def aassure_loaded(self) -> None:
+        async def assure_loaded() -> None:
+            model = await self._get_async_model()
+            loaded = [m.identifier for m in await self.async_client.llm.list_loaded()]
+            if model.identifier not in loaded:
+                self.async_model = await self.async_client.llm.model(
+                    self.model_id, ttl=self.default_ttl, config=self.config
+                )
+
+        await self._get_client_loop().run(assure_loaded())
+
+    @staticmethod
+    def _prediction_config(temperature: float, max_tokens: int) -> dict:
+        return {
+            'temperature': temperature,
+            'maxTokens': max_tokens if max_tokens > 0 else None,
+        }
+
     def act(
         self,
         chat: Chat,
@@ -122,17 +300,36 @@ class LMSModel(GenericModel):
     ) -> AIMessage:
         assert max_prediction_rounds > 0
         
+        # tools run inside lms act(), so outputs are trimmed as each call returns
+        budget = (
+            ToolBudgetTracker(self.tool_budget, self.count_tokens)
+            if self.tool_budget is not None
+            else None
+        )
+
         all_tools = tools + chat.tools
-        all_tools = to_lms_tools(all_tools)
+        all_tools = to_lms_tools(all_tools, budget.limit if budget is not None else None)
+
+        def on_round_start(round_index: int) -> None:
+            if budget is not None:
+                budget.new_round()
 
         def on_message_handler(message: lms.AssistantResponse | lms.ToolResultMessage):
             if isinstance(message, lms.AssistantResponse):
                 normal_message: AIMessage = from_lms_message(message)
+                if budget is not None:
+                    # reported once the tools of the round returned, right before their results
+                    for part in message.content:
+                        if part.type == 'toolCallRequest':
+                            request = part.tool_call_request
+                            budget.expect(request.id, request.name, request.arguments)
                 on_message(normal_message)
                 if on_message != chat.add_message:
                     chat.add_message(normal_message)
             elif isinstance(message, lms.ToolResultMessage):
                 for normal_message in from_lms_message(message):
+                    if budget is not None:
+                        budget.annotate(normal_message)
                     on_message(normal_message)
                     if on_message != chat.add_message:
                         chat.add_message(normal_message)
@@ -146,6 +343,7 @@ class LMSModel(GenericModel):
             chat=to_lms_chat(chat),
             tools=all_tools,
             on_message=on_message_handler,
+            on_round_start=on_round_start,
             max_prediction_rounds=max_prediction_rounds,
             config=lms.LlmPredictionConfig(
                 max_tokens=max_tokens_per_message, temperature=temperature
@@ -153,3 +351,26 @@ class LMSModel(GenericModel):
         )
 
         return chat[-1]
+
+    async def aact(
+        self,
+        chat: Chat,
+        tools: list[Tool] = [],
+        on_message: MessageHandler = EmptyMessageHandler,
+        temperature: float = 0.7,
+        max_tokens_per_message: int = -1,
+        max_prediction_rounds: int = 3,
+    ) -> AIMessage:
+        """
+        Not natively async: lmstudio async api has no act(), so the sync act() runs
+        in a worker thread, which it occupies for the whole interaction.
+        """
+        return await asyncio.to_thread(
+            self.act,
+            chat,
+            tools,
+            on_message,
+            temperature,
+            max_tokens_per_message,
+            max_prediction_rounds,
+        )
@@ -0,0 +1,234 @@
+import json
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from langchain_core.messages.ai import UsageMetadata
+from pydantic import BaseModel
+
+from ..chat import AIMessage, AIMessageChunk, AnyCompleteMessage, Chat, ToolMessage
+from ..formatting import ResponseFormat
+from ..tools import Tool
+from ..utils.extract_tool_calls import (
+    TOOL_CALL_BEGIN,
+    TOOL_CALL_END,
+    extract_tool_calls,
+)
+from ..utils.token_counting import TemplateOverhead, count_chat_tokens
+from .generic_model import GenericModel
+
+_TEXT_TOKEN = 'tok '
+
+
+class SyntheticToolCall(BaseModel):
+    name: str
+    args: dict[str, Any] = {}
+
+
+class SyntheticConfig(BaseModel):
+    """
+    Timings and scripted responses of the synthetic backend.
+    Zero timings make it answer instantly, leaving only the orchestration work to measure.
+    """
+
+    ttft: float = 0.0  # seconds before prompt processing
+    prompt_tokens_per_s: float = 0.0  # 0 is instant
+    tokens_per_s: float = 0.0  # 0 is instant
+    response_tokens: int = 64  # text tokens of every response, before its tool calls
+    chars_per_token: int = 4
+    # tool calls of consecutive responses after the last user message, one list per response.
+    # Once the script is over the model answers without tool calls, unless it is looped
+    tool_rounds: list[list[SyntheticToolCall]] = []
+    loop_tool_rounds: bool = False
+    template_overhead: TemplateOverhead = TemplateOverhead(
+        fixed=1, per_message={'system': 4, 'human': 4, 'ai': 4, 'tool': 4}
+    )
+
+
+def to_synthetic_message(message: AnyCompleteMessage) -> dict:
+    """Same shape as chat completion request messages of the llama_cpp bindings"""
+    translate_roles = {
+        'ai': 'assistant',
+        'human': 'user',
+        'system': 'system',
+        'tool': 'tool',
+    }
+
+    result = {
+        'role': translate_roles[message.type],
+        'content': message.content,
+    }
+    if isinstance(message, ToolMessage):
+        result['tool_call_id'] = message.tool_call_id
+    elif isinstance(message, AIMessage):
+        result['tool_calls'] = [
+            {
+                'id': tc['id'],
+                'type': 'function',
+                'function': {'name': tc['name'], 'arguments': tc['args']},
+            }
+            for tc in message.tool_calls
+        ]
+    return result
+
+
+class SyntheticModel(GenericModel):
+    """
+    Model without weights: answers after simulated delays with deterministic text and scripted
+    tool calls in <tool_call> blocks, so responses go through the same chat conversion,
+    tool call extraction and act() loop as llama_cpp ones.
+    """
+
+    model_path: str
+    config: SyntheticConfig
+
+    def __init__(self, model_path: str, config: Optional[SyntheticConfig] = None):
+        if config is None:
+            config = SyntheticConfig()
+
+        self.model_path = model_path
+        self.config = config
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        pass
+
+    def count_tokens(self, prompt: str | Chat) -> int:
+        if isinstance(prompt, Chat):
+            return count_chat_tokens(
+                prompt.messages,
+                self.model_path,
+                self._count_text,
+                self.config.template_overhead,
+            )
+        return self._count_text(prompt)
+
+    def _count_text(self, text: str) -> int:
+        return -(-len(text) // self.config.chars_per_token)
+
+    def _round_index(self, messages: list[dict]) -> int:
+        """Responses since the last user message"""
+        index = 0
+        for message in reversed(messages):
+            if message['role'] == 'user':
+                break
+            if message['role'] == 'assistant':
+                index += 1
+        return index
+
+    def _script(self, messages: list[dict]) -> list[str]:
+        """Chunks of the next response, one per token"""
+        config = self.config
+        chunks = [_TEXT_TOKEN] * config.response_tokens
+
+        rounds = config.tool_rounds
+        index = self._round_index(messages)
+        if rounds and config.loop_tool_rounds:
+            index %= len(rounds)
+        if index < len(rounds):
+            for call in rounds[index]:
+                block = (
+                    TOOL_CALL_BEGIN
+                    + json.dumps({'name': call.name, 'arguments': call.args})
+                    + TOOL_CALL_END
+                )
+                step = config.chars_per_token
+                chunks += [block[i : i + step] for i in range(0, len(block), step)]
+        return chunks
+
+    def _prepare(self, chat: Chat, max_tokens: int) -> tuple[int, list[str], str]:
+        """Prompt tokens, chunks of the response and its stop reason"""
+        # the script follows the converted request messages, as a real backend's prompt would,
+        # so that conversion is part of the measured overhead
+        messages = chat.converted('synthetic', to_synthetic_message)
+        prompt_tokens = self.count_tokens(chat)
+
+        chunks = self._script(messages)
+        if 0 < max_tokens < len(chunks):
+            return prompt_tokens, chunks[:max_tokens], 'length'
+        return prompt_tokens, chunks, 'stop'
+
+    def _paced(self, chunks: list[str], prompt_tokens: int) -> Iterator[str]:
+        config = self.config
+        delay = config.ttft
+        if config.prompt_tokens_per_s > 0:
+            delay += prompt_tokens / config.prompt_tokens_per_s
+
+        start = time.perf_counter()
+        for i, chunk in enumerate(chunks):
+            # deadlines are counted from the start, so that sleep overshoot does not accumulate
+            deadline = start + delay
+            if config.tokens_per_s > 0:
+                deadline += i / config.tokens_per_s
+            remaining = deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            yield chunk
+
+    def create_chat_completion(
+        self,
+        chat: Chat,
+        tools: list[Tool],
+        response_format: Optional[ResponseFormat] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 5000,
+        stream: bool = False,
+    ) -> AIMessage | Iterator[AIMessageChunk]:
+        if stream:
+            return self._stream_chat_completion(chat, max_tokens)
+
+        with self._lock:
+            prompt_tokens, chunks, stop_reason = self._prepare(chat, max_tokens)
+            content = ''.join(self._paced(chunks, prompt_tokens))
+            message = self._finalize_message(
+                content, stop_reason, prompt_tokens, len(chunks)
+            )
+
+        chat.add_message(message)
+        return message
+
+    def _stream_chat_completion(
+        self, chat: Chat, max_tokens: int
+    ) -> Iterator[AIMessageChunk]:
+        """
+        Yields AIMessageChunk per token. Once the stream is exhausted, or closed early
+        by the consumer, the assembled AIMessage is added to chat.
+        """
+        with self._lock:
+            prompt_tokens, chunks, stop_reason = self._prepare(chat, max_tokens)
+            content = []
+            try:
+                for chunk in self._paced(chunks, prompt_tokens):
+                    content.append(chunk)
+                    message_chunk = AIMessageChunk(content=chunk)
+                    if len(content) == len(chunks):
+                        message_chunk.response_metadata['stop_reason'] = stop_reason
+                    yield message_chunk
+            except GeneratorExit:
+                chat.add_message(
+                    self._finalize_message(
+                        ''.join(content), 'stop', prompt_tokens, len(content)
+                    )
+                )
+                raise
+
+            message = self._finalize_message(
+                ''.join(content), stop_reason, prompt_tokens, len(content)
+            )
+        chat.add_message(message)
+
+    @staticmethod
+    def _finalize_message(
+        content: str, stop_reason: str, prompt_tokens: int, completion_tokens: int
+    ) -> AIMessage:
+        message = AIMessage(content=content)
+        message.response_metadata['stop_reason'] = stop_reason
+        message.usage_metadata = UsageMetadata(
+            input_tokens=prompt_tokens,
+            output_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+        message.tool_calls = extract_tool_calls(message.content)
+        if len(message.tool_calls) > 0:
+            message.response_metadata['stop_reason'] = 'tool_call'
+        return message
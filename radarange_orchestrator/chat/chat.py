@@ -1,14 +1,20 @@
+from __future__ import annotations
+
 from functools import wraps
-from typing import Iterator, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Sequence
 
-from IPython.display import Markdown, display
 from langchain_core.chat_history import InMemoryChatMessageHistory
+from pydantic import PrivateAttr
 
 from ..tools import Tool
 from ..utils import display_message
 from ..utils.extract_tool_calls import remove_think_block
+from .conversion_cache import ConversionCache
 from .messages import AnyCompleteMessage
 
+if TYPE_CHECKING:
+    from IPython.display import Markdown
+
 
 class Chat(InMemoryChatMessageHistory):
     """
@@ -21,6 +27,7 @@ class Chat(InMemoryChatMessageHistory):
     """
 
     tools: list[Tool] = []
+    _conversion_caches: dict[str, ConversionCache] = PrivateAttr(default_factory=dict)
 
     @wraps(InMemoryChatMessageHistory.add_message)
     def add_message(self, message: AnyCompleteMessage) -> None:
@@ -32,7 +39,19 @@ class Chat(InMemoryChatMessageHistory):
 
     @wraps(InMemoryChatMessageHistory.aadd_messages)
     async def aadd_messages(self, messages: Sequence[AnyCompleteMessage]) -> None:
-        super().aadd_messages(messages)
+        await super().aadd_messages(messages)
+
+    def converted(
+        self, backend: str, convert: Callable[[AnyCompleteMessage], Any]
+    ) -> list[Any]:
+        """
+        Messages converted to backend representation by convert.
+        Conversions are cached per backend, so only appended or edited messages are converted again.
+        """
+        cache = self._conversion_caches.get(backend)
+        if cache is None:
+            cache = self._conversion_caches[backend] = ConversionCache(convert)
+        return cache(self.messages)
 
     def __iter__(self) -> Iterator[AnyCompleteMessage]:
         return iter(self.messages)
@@ -51,6 +70,8 @@ class Chat(InMemoryChatMessageHistory):
             A Markdown object containing the processed final response.
         """
 
+        from IPython.display import Markdown, display
+
         last_message = self.messages[-1].content
         if hide_reasoning:
             text = remove_think_block(last_message)
@@ -80,5 +101,7 @@ class Chat(InMemoryChatMessageHistory):
         Args:
             skip_reasoning: If True, skips displaying thought/reasoning blocks.
         """
+        from IPython.display import display
+
         for message in self.messages:
             display(display_message(message, skip_reasoning))
@@ -0,0 +1,57 @@
+import threading
+from typing import Any, Callable, Hashable
+
+from .messages import AnyCompleteMessage
+
+
+def message_fingerprint(message: AnyCompleteMessage) -> Hashable:
+    """Changes whenever a field used by backend conversion is edited"""
+    content = (
+        message.content if isinstance(message.content, str) else str(message.content)
+    )
+    if message.type == 'tool':
+        extra = message.tool_call_id
+    elif message.type == 'ai':
+        # args are edited in place too, so they are compared by value
+        extra = tuple(
+            (tc['id'], tc['name'], repr(tc['args'])) for tc in message.tool_calls
+        )
+    else:
+        extra = None
+    # str hashes are cached by the interpreter, so unchanged contents are not rehashed
+    return (message.type, hash(content), extra)
+
+
+class ConversionCache:
+    """
+    Backend representations of chat messages, converted once per message.
+    Entries are reused while the chat keeps the same message objects with unchanged fingerprints.
+    From the first replaced or edited message on, messages are converted again.
+    """
+
+    def __init__(self, convert: Callable[[AnyCompleteMessage], Any]):
+        self.convert = convert
+        self.entries: list[tuple[AnyCompleteMessage, Hashable, Any]] = []
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo: dict) -> 'ConversionCache':
+        # copies of a chat start with an empty cache: entries refer to messages of the original
+        return ConversionCache(self.convert)
+
+    def __reduce__(self):
+        return ConversionCache, (self.convert,)
+
+    def __call__(self, messages: list[AnyCompleteMessage]) -> list[Any]:
+        with self._lock:
+            valid = 0
+            for message, (cached, fingerprint, _) in zip(messages, self.entries):
+                if cached is not message or fingerprint != message_fingerprint(message):
+                    break
+                valid += 1
+
+            del self.entries[valid:]
+            for message in messages[valid:]:
+                self.entries.append(
+                    (message, message_fingerprint(message), self.convert(message))
+                )
+            return [converted for _, _, converted in self.entries]
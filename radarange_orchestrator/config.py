@@ -1,34 +1,98 @@
+import os
+from functools import cache
 from importlib.util import find_spec
 
-# Check if llama_cpp is installed
+# Check if llama_cpp is installed (without importing it)
 LLAMA_CPP_AVAILABLE = find_spec("llama_cpp") is not None
 
-# Check if CUDA is available (only relevant if llama_cpp is installed)
-CUDA_AVAILABLE = False
-if LLAMA_CPP_AVAILABLE:
-    try:
-        from llama_cpp.llama import llama_backend_init, LLAMA_BACKEND_CUDA, llama_available_devices
-        llama_backend_init()
-        CUDA_AVAILABLE = LLAMA_BACKEND_CUDA in llama_available_devices()
-    except ImportError:
-        # LLAMA_CPP_AVAILABLE = False
-        pass
-
-# Backend capabilities
+# Backend capabilities. "cuda" of llama_cpp is None until cuda_available() probes it
 BACKEND_CAPABILITIES = {
     "llama_cpp": {
         "available": LLAMA_CPP_AVAILABLE,
-        "cuda": CUDA_AVAILABLE,
+        "cuda": None,
         "grammar": True
     },
     "lmstudio": {
         "available": True,  # Always available
         "cuda": False,
         "grammar": False
+    },
+    "synthetic": {
+        "available": True,  # no model, see backend.synthetic_model
+        "cuda": False,
+        "grammar": False
     }
 }
 
+
+
+@cache
+def cuda_available() -> bool:
+    """
+    Whether llama_cpp sees a CUDA device.
+    Probed on the first call rather than at import: it loads llama_cpp and initializes its backend
+    """
+    cuda = False
+    if LLAMA_CPP_AVAILABLE:
+        try:
+            from llama_cpp.llama import llama_backend_init, LLAMA_BACKEND_CUDA, llama_available_devices
+            llama_backend_init()
+            cuda = LLAMA_BACKEND_CUDA in llama_available_devices()
+        except ImportError:
+            pass
+    BACKEND_CAPABILITIES["llama_cpp"]["cuda"] = cuda
+    return cuda
+
+
+def __getattr__(name: str):
+    # CUDA_AVAILABLE is kept as a module attribute, computed on first access
+    if name == "CUDA_AVAILABLE":
+        return cuda_available()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 LMSTUDIO_ADDRESS = '95.165.10.219'
 LMSTUDIO_PORT = 1234
+# 'host:port' list of LM Studio servers to load-balance between (see backend.lmstudio_pool).
+# Empty list means a single server at LMSTUDIO_ADDRESS:LMSTUDIO_PORT
+LMSTUDIO_ENDPOINTS: list[str] = []
+
+DEFAULT_LLM_MODEL = 'qwq-32b@q4_k_m'
+
+# Directory with .gguf models of the llama_cpp backend (see utils.model_registry)
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+
+# Directory for the on-disk tier of the compiled grammar cache (see formatting.get_grammar).
+# None keeps grammars in process memory only
+GRAMMAR_CACHE_DIR = None
+
+
+# Directory for the on-disk HTTP response cache of web tools (see tools.http_cache).
+# None disables caching
+HTTP_CACHE_DIR = None
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+HTTP_CACHE_PAGE_TTL = 24 * 60 * 60  # seconds before a scraped page is revalidated
+HTTP_CACHE_SEARCH_TTL = 60 * 60  # seconds before a search query is repeated
+
+# Page scraping in web_search: parallel fetches and seconds to wait for all of them.
+# Pages not scraped by the deadline are left out of the results
+WEB_SEARCH_SCRAPE_WORKERS = 8
+WEB_SEARCH_SCRAPE_DEADLINE = 30.0
+
+# Process pool for pdf_read: number of workers and the page count from which a document
+# is split between them. Spawned workers import the entry script, so None uses all cores only in
+# interactive sessions and notebooks, and extracts serially when running a script. Set it to use
+# the pool from scripts whose top-level code is under `if __name__ == '__main__'`
+PDF_WORKERS = None
+PDF_PARALLEL_MIN_PAGES = 32
+
+# Cache of parsed pdfs keyed by file content and images directory (see tools.pdf_cache).
+# Kept in memory and, if PDF_CACHE_DIR is set, on disk; each tier is limited to PDF_CACHE_MAX_BYTES
+PDF_CACHE_DIR = None
+PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024
 
-DEFAULT_LLM_MODEL = 'qwq-32b@q4_k_m'
\ No newline at end of file
+# download_file: parallel range requests per file, smallest segment size,
+# and retries of a segment after a dropped connection
+DOWNLOAD_SEGMENTS = 4
+DOWNLOAD_MIN_SEGMENT_BYTES = 8 * 1024 * 1024
+DOWNLOAD_RETRIES = 3
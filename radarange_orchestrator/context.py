@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import threading
+import warnings
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from .chat import AnyCompleteMessage, Chat, HumanMessage, SystemMessage
+from .chat.conversion_cache import message_fingerprint
+from .utils.extract_tool_calls import remove_think_block
+
+if TYPE_CHECKING:
+    from .llm_backend import Model
+
+# Key in message.additional_kwargs marking messages that context policies never drop
+PINNED_KEY = 'pinned'
+
+
+def pin(message: AnyCompleteMessage) -> AnyCompleteMessage:
+    """Marks message to be always kept in the prompt"""
+    message.additional_kwargs[PINNED_KEY] = True
+    return message
+
+
+def is_pinned(message: AnyCompleteMessage) -> bool:
+    return bool(message.additional_kwargs.get(PINNED_KEY, False))
+
+
+def _split_turns(chat: Chat) -> tuple[list[int], list[list[int]]]:
+    """
+    Splits chat message indices into kept ones (leading system prompt, the first user message
+    with the task, pinned messages) and droppable turns, oldest first.
+    Tool results stay in one turn with the message that called them.
+    The last turn holds the current prompt and is never returned as droppable.
+    """
+    kept: list[int] = []
+    turns: list[list[int]] = []
+    leading = True
+    task_seen = False
+    for i, message in enumerate(chat.messages):
+        if leading and message.type == 'system':
+            kept.append(i)
+            continue
+        leading = False
+
+        if message.type == 'human' and not task_seen:
+            # kept, so that the task stays in the prompt and model replies always follow a user message
+            task_seen = True
+            kept.append(i)
+        elif is_pinned(message):
+            kept.append(i)
+        elif message.type == 'tool' and len(turns) > 0:
+            turns[-1].append(i)
+        else:
+            turns.append([i])
+    return kept, turns[:-1]
+
+
+def _without(chat: Chat, dropped: set[int]) -> Chat:
+    return Chat(
+        messages=[m for i, m in enumerate(chat.messages) if i not in dropped],
+        tools=chat.tools,
+    )
+
+
+def _warn_over_budget(tokens: int, budget: int) -> None:
+    warnings.warn(
+        f'Prompt of {tokens} tokens does not fit the context budget of {budget} tokens '
+        'after dropping every droppable turn: kept messages alone exceed it',
+        RuntimeWarning,
+        stacklevel=3,
+    )
+
+
+class ContextPolicy:
+    """
+    Fits chat into the model context before each completion.
+
+    fit() returns the chat to be sent: either chat itself or a trimmed copy.
+    Subclasses implement it; llm.respond and llm.act call it with the prompt token budget.
+    """
+
+    # Tokens left for generation when max_tokens is not limited
+    reserve_tokens: int = 4096
+
+    def fit(self, chat: Chat, budget: int, model: Model) -> Chat:
+        raise NotImplementedError
+
+
+class SlidingWindowPolicy(ContextPolicy):
+    """
+    Drops the oldest turns until the prompt fits.
+    System prompt, the first user message, pinned messages and the last turn are always kept.
+    Original chat is not modified. Warns if the prompt still does not fit.
+    """
+
+    def __init__(self, reserve_tokens: int = 4096):
+        self.reserve_tokens = reserve_tokens
+
+    def fit(self, chat: Chat, budget: int, model: Model) -> Chat:
+        if model.count_tokens(chat) <= budget:
+            return chat
+
+        _, turns = _split_turns(chat)
+        dropped: set[int] = set()
+        candidate = chat
+        for turn in turns:
+            dropped.update(turn)
+            candidate = _without(chat, dropped)
+            if model.count_tokens(candidate) <= budget:
+                return candidate
+        _warn_over_budget(model.count_tokens(candidate), budget)
+        return candidate
+
+
+class SummarizePolicy(ContextPolicy):
+    """
+    Replaces the oldest turns with a model-written summary once the prompt no longer fits.
+    The summary is merged into the leading system prompt of the returned copy; the original chat
+    is not modified. Summaries are remembered by the messages they cover, so later rounds reuse
+    them and only summarize newly dropped turns on top of the previous summary.
+    Falls back to the sliding window if the summary does not make the prompt fit.
+    """
+
+    instruction = (
+        'Summarize the following conversation fragment. Keep facts, decisions, '
+        'tool results and open questions that may matter later. Be concise.'
+    )
+    summary_header = 'Summary of the earlier conversation:\n'
+    max_remembered = 8
+
+    def __init__(self, reserve_tokens: int = 4096, summary_tokens: int = 1024):
+        self.reserve_tokens = reserve_tokens
+        self.summary_tokens = summary_tokens
+        # fingerprints of summarized messages -> summary text
+        self._summaries: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fit(self, chat: Chat, budget: int, model: Model) -> Chat:
+        if model.count_tokens(chat) <= budget:
+            return chat
+
+        # pick the oldest turns whose removal leaves room for the summary
+        _, turns = _split_turns(chat)
+        dropped: list[int] = []
+        for turn in turns:
+            dropped.extend(turn)
+            if (
+                model.count_tokens(_without(chat, set(dropped)))
+                <= budget - self.summary_tokens
+            ):
+                break
+        if len(dropped) == 0:
+            return SlidingWindowPolicy().fit(chat, budget, model)
+
+        summary = self._summary([chat.messages[i] for i in dropped], budget, model)
+        summarized = _without(chat, set(dropped))
+        messages = summarized.messages
+        if len(messages) > 0 and messages[0].type == 'system':
+            system = messages[0]
+            messages[0] = SystemMessage(
+                content=f'{system.content}\n\n{summary}',
+                additional_kwargs=system.additional_kwargs,
+            )
+        else:
+            messages.insert(0, SystemMessage(content=summary))
+
+        return SlidingWindowPolicy().fit(summarized, budget, model)
+
+    def _summary(
+        self, messages: list[AnyCompleteMessage], budget: int, model: Model
+    ) -> str:
+        key = tuple(message_fingerprint(m) for m in messages)
+        with self._lock:
+            # longest already summarized prefix of the dropped messages
+            n_covered, previous = 0, None
+            for n in range(len(key), 0, -1):
+                previous = self._summaries.get(key[:n])
+                if previous is not None:
+                    n_covered = n
+                    self._summaries.move_to_end(key[:n])
+                    break
+        if n_covered == len(key):
+            return previous
+
+        transcript = [
+            f'{m.type}: {remove_think_block(str(m.content))}'
+            for m in messages[n_covered:]
+        ]
+        if previous is not None:
+            transcript.insert(0, previous)
+        summary = self.summary_header + self._summarize(
+            '\n'.join(transcript), budget, model
+        )
+
+        with self._lock:
+            self._summaries[key] = summary
+            while len(self._summaries) > self.max_remembered:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def _summarize(self, transcript: str, budget: int, model: Model) -> str:
+        # rough limit so that the summarization prompt itself fits
+        max_chars = max(budget - self.summary_tokens, 1) * 3
+        transcript = transcript[-max_chars:]
+
+        request = Chat()
+        request.add_message(SystemMessage(content=self.instruction))
+        request.add_message(HumanMessage(content=transcript))
+        response = model.create_chat_completion(
+            request, [], temperature=0.3, max_tokens=self.summary_tokens
+        )
+        return remove_think_block(response.content).strip()
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import re
+import threading
 from typing import TYPE_CHECKING, Any, Optional, Union
 
 from jsonref import JsonRef
 from pydantic import BaseModel
 
+from . import config
 from .config import BACKEND_CAPABILITIES
 
 # Define JSON type for type hints
@@ -42,6 +47,94 @@ def flat_json(model: JsonType | BaseModel) -> JsonType:
     return schema_flat
 
 
+# Process-wide cache of compiled grammars keyed by schema_key()
+_grammar_cache: dict[str, LlamaGrammar] = {}
+_grammar_cache_lock = threading.Lock()
+
+# Allow arbitrary whitespace between json tokens instead of llama_cpp default single space
+_SPACE_RULE = r'[ \t\n]*'
+
+
+def schema_key(json_schema: JsonType, keep_reasoning: bool = False) -> str:
+    """Stable hash of flattened json schema and grammar options"""
+    payload = json.dumps(json_schema, sort_keys=True) + f'|keep_reasoning={keep_reasoning}'
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _build_gbnf(json_schema: JsonType, keep_reasoning: bool) -> str:
+    from llama_cpp.llama_grammar import json_schema_to_gbnf
+
+    grammar_json = json_schema_to_gbnf(json.dumps(json_schema))
+    # Substitute the space rule in the output rather than patching the
+    # module-global llama_cpp.llama_grammar.SPACE_RULE, which is not thread-safe
+    grammar_json = re.sub(
+        r'^space ::= .*$',
+        lambda _: f'space ::= {_SPACE_RULE}',
+        grammar_json,
+        flags=re.MULTILINE,
+    )
+
+    if keep_reasoning:
+        base_rules = """
+        root ::= "<think>" [^<]+ "</think>" [\\n]* json-schema
+        """
+    else:
+        base_rules = """
+        root ::= json-schema
+        """
+    return base_rules + grammar_json.replace('root', 'json-schema')
+
+
+def _load_gbnf(key: str) -> Optional[str]:
+    if config.GRAMMAR_CACHE_DIR is None:
+        return None
+    try:
+        with open(os.path.join(config.GRAMMAR_CACHE_DIR, f'{key}.gbnf')) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _store_gbnf(key: str, gbnf: str) -> None:
+    if config.GRAMMAR_CACHE_DIR is None:
+        return
+    os.makedirs(config.GRAMMAR_CACHE_DIR, exist_ok=True)
+    path = os.path.join(config.GRAMMAR_CACHE_DIR, f'{key}.gbnf')
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(gbnf)
+    os.replace(tmp_path, path)
+
+
+def get_grammar(json_schema: JsonType, keep_reasoning: bool = False) -> LlamaGrammar:
+    """
+    Returns compiled llama_cpp grammar for a flattened json schema.
+    Grammars are cached per process and, if config.GRAMMAR_CACHE_DIR is set, on disk.
+    """
+    import llama_cpp
+
+    key = schema_key(json_schema, keep_reasoning)
+    with _grammar_cache_lock:
+        grammar = _grammar_cache.get(key)
+        if grammar is not None:
+            return grammar
+
+        gbnf = _load_gbnf(key)
+        if gbnf is None:
+            gbnf = _build_gbnf(json_schema, keep_reasoning)
+            _store_gbnf(key, gbnf)
+
+        grammar = llama_cpp.LlamaGrammar.from_string(gbnf)
+        _grammar_cache[key] = grammar
+        return grammar
+
+
+def clear_grammar_cache() -> None:
+    """Drops in-memory compiled grammars. On-disk tier is left untouched"""
+    with _grammar_cache_lock:
+        _grammar_cache.clear()
+
+
 class ResponseFormat:
     """
     Wrapper for gbnf grammars.
@@ -67,30 +160,7 @@ class ResponseFormat:
             'llama_cpp' in BACKEND_CAPABILITIES
             and BACKEND_CAPABILITIES['llama_cpp']['available']
         ):
-            import llama_cpp
-            import llama_cpp.llama_grammar
-
-            old_space_rule = llama_cpp.llama_grammar.SPACE_RULE
-            llama_cpp.llama_grammar.SPACE_RULE = r'[ \t\n]*'
-
-            grammar_json = llama_cpp.LlamaGrammar.from_json_schema(
-                json.dumps(self.json_schema)
-            )
-            if keep_reasoning:
-                base_rules = """
-                root ::= "<think>" [^<]+ "</think>" [\\n]* json-schema
-                """
-            else:
-                base_rules = """
-                root ::= json-schema
-                """
-            grammar_json = base_rules + grammar_json._grammar.replace(
-                'root', 'json-schema'
-            )
-
-            self.grammar = llama_cpp.LlamaGrammar.from_string(grammar_json)
-            # restore original space rule
-            llama_cpp.llama_grammar.SPACE_RULE = old_space_rule
+            self.grammar = get_grammar(self.json_schema, keep_reasoning)
 
     def __repr__(self) -> str:
         """Returns visual representation of the response format to be used as prompt hint for an LLM"""
@@ -1,4 +1,11 @@
-from typing import Iterator, Optional
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from pydantic import BaseModel
 
 from .chat import (
     Chat,
@@ -10,9 +17,13 @@ from .chat import (
     EmptyMessageHandler,
 )
 from .config import DEFAULT_LLM_MODEL
+from .context import ContextPolicy
 from .formatting import ResponseFormat
-from .llm_backend import AVAILABLE_BACKEND, LLM_Config, Model
+from .llm_backend import AVAILABLE_BACKEND, LOCAL_ACT_BACKENDS, LLM_Config, Model
 from .tools import Tool, ToolCall, InvalidToolCall
+from .utils.extract_tool_calls import ToolCallStreamParser
+from .utils.tool_budget import apply_tool_budget
+from .utils.tool_threads import ToolCallRound
 
 
 class llm:
@@ -32,6 +43,8 @@ class llm:
         model: str = DEFAULT_LLM_MODEL,
         backend: AVAILABLE_BACKEND = 'remote',
         config: LLM_Config = LLM_Config(),
+        context_policy: Optional[ContextPolicy] = None,
+        backend_options: Optional[BaseModel] = None,
     ):
         """
         Initialize the llm instance with a specific model, backend, and configuration.
@@ -40,14 +53,28 @@ class llm:
             model: Name of the language model to use (default is from DEFAULT_LLM_MODEL).
             backend: The execution environment for the model ('remote', 'local', etc.). See available backends in llm_backend.AVAILABLE_BACKEND.
             config: LLM_Config object containing additional settings.
+            context_policy: Default policy fitting chats into config.ctx_size before each completion. None disables it.
+            backend_options: Backend specific settings, e.g. SyntheticConfig of the synthetic backend.
         """
 
         self.config = config
-        self.model = Model(model, backend, config)
+        self.context_policy = context_policy
+        self.model = Model(model, backend, config, backend_options)
+        self._tool_semaphores = {
+            name: threading.BoundedSemaphore(limit)
+            for name, limit in config.tool_concurrency.items()
+        }
+        # asyncio semaphores are bound to the loop they are first used in, so they are kept per loop
+        self._tool_asemaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
 
     def close(self) -> None:
         self.model.close()
 
+    async def aclose(self) -> None:
+        await self.model.aclose()
+
     def chat(self, system_prompt: str = '', tools: list[Tool] = []) -> Chat:
         """
         Create a new chat session with an optional system prompt and available tools.
@@ -67,6 +94,31 @@ class llm:
     def count_tokens(self, prompt: str | Chat) -> int:
         return self.model.count_tokens(prompt)
 
+    def _fit_context(
+        self, chat: Chat, max_tokens: int, context_policy: Optional[ContextPolicy]
+    ) -> Chat:
+        """Applies context policy, returning the chat to be sent to the model"""
+        policy = context_policy if context_policy is not None else self.context_policy
+        if policy is None:
+            return chat
+
+        reserve = max_tokens if max_tokens > 0 else policy.reserve_tokens
+        # the model config holds the context the backend actually loaded
+        return policy.fit(chat, self.model.config.ctx_size - reserve, self.model)
+
+    @staticmethod
+    def _forward_response(
+        chat_completion: Iterator[AIMessageChunk], prompt_chat: Chat, chat: Chat
+    ) -> Iterator[AIMessageChunk]:
+        """Passes stream through, then copies the final message from trimmed prompt chat to the original"""
+        n_messages = len(prompt_chat.messages)
+        try:
+            yield from chat_completion
+        finally:
+            # backends also record a message when the consumer stops the stream early
+            if len(prompt_chat.messages) > n_messages:
+                chat.add_message(prompt_chat[-1])
+
     def respond_stream(
         self,
         prompt: Chat | str,
@@ -74,6 +126,7 @@ class llm:
         temperature: float = 0.7,
         max_tokens: int = -1,
         response_format: Optional[ResponseFormat] = None,
+        context_policy: Optional[ContextPolicy] = None,
     ) -> Iterator[AIMessageChunk]:
         """
         Generate a streaming response for the given prompt.
@@ -84,24 +137,29 @@ class llm:
             temperature: Controls randomness in output (0.0-1.0, default=0.7).
             max_tokens: Maximum number of tokens to generate (-1 for no limit).
             response_format: Optional format constraint for the response.
+            context_policy: Overrides llm.context_policy for this call.
 
         Returns:
             Iterator yielding AIMessageChunk chunks as they arrive.
+            Once exhausted, the assembled AIMessage (with tool calls, stop reason and usage) is added to the chat.
         """
 
         chat: Chat = prompt if isinstance(prompt, Chat) else Chat()
         if not isinstance(prompt, Chat):
             chat.add_user_message(prompt)
 
+        prompt_chat = self._fit_context(chat, max_tokens, context_policy)
         chat_completion = self.model.create_chat_completion(
-            chat,
+            prompt_chat,
             tools,
             response_format=response_format,
             temperature=temperature,
             max_tokens=max_tokens,
             stream=True,
         )
-        return chat_completion  # TODO
+        if prompt_chat is not chat:
+            return self._forward_response(chat_completion, prompt_chat, chat)
+        return chat_completion
 
     def respond(
         self,
@@ -110,6 +168,7 @@ class llm:
         temperature: float = 0.7,
         max_tokens: int = -1,
         response_format: Optional[ResponseFormat] = None,
+        context_policy: Optional[ContextPolicy] = None,
     ) -> AIMessage:
         """
         Generate a complete non-streaming response for the given prompt.
@@ -120,6 +179,7 @@ class llm:
             temperature: Controls randomness in output (0.0-1.0, default=0.7).
             max_tokens: Maximum number of tokens to generate (-1 for no limit).
             response_format: Optional format constraint for the response.
+            context_policy: Overrides llm.context_policy for this call.
 
         Returns:
             A complete AIMessage containing the generated content.
@@ -132,22 +192,201 @@ class llm:
         else:
             chat = prompt
 
+        prompt_chat = self._fit_context(chat, max_tokens, context_policy)
         chat_completion = self.model.create_chat_completion(
-            chat,
+            prompt_chat,
+            tools,
+            response_format=response_format,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=False,
+        )
+        if prompt_chat is not chat:
+            chat.add_message(chat_completion)
+        return chat_completion
+
+    async def arespond_stream(
+        self,
+        prompt: Chat | str,
+        tools: list[Tool] = [],
+        temperature: float = 0.7,
+        max_tokens: int = -1,
+        response_format: Optional[ResponseFormat] = None,
+        context_policy: Optional[ContextPolicy] = None,
+    ) -> AsyncIterator[AIMessageChunk]:
+        """
+        Async counterpart of respond_stream. Use as `async for chunk in llm.arespond_stream(...)`.
+        """
+
+        chat: Chat = prompt if isinstance(prompt, Chat) else Chat()
+        if not isinstance(prompt, Chat):
+            chat.add_user_message(prompt)
+
+        prompt_chat = await asyncio.to_thread(
+            self._fit_context, chat, max_tokens, context_policy
+        )
+        chat_completion = await self.model.acreate_chat_completion(
+            prompt_chat,
+            tools,
+            response_format=response_format,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        n_messages = len(prompt_chat.messages)
+        try:
+            async for chunk in chat_completion:
+                yield chunk
+        finally:
+            # closing the stream early makes backends record the message generated so far
+            aclose = getattr(chat_completion, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+            if prompt_chat is not chat and len(prompt_chat.messages) > n_messages:
+                chat.add_message(prompt_chat[-1])
+
+    async def arespond(
+        self,
+        prompt: Chat | str,
+        tools: list[Tool] = [],
+        temperature: float = 0.7,
+        max_tokens: int = -1,
+        response_format: Optional[ResponseFormat] = None,
+        context_policy: Optional[ContextPolicy] = None,
+    ) -> AIMessage:
+        """
+        Async counterpart of respond. Does not block the event loop:
+        lmstudio backend uses its async client, llama_cpp runs in a worker thread.
+        """
+
+        chat: Chat
+        if isinstance(prompt, str):
+            chat = Chat()
+            chat.add_user_message(prompt)
+        else:
+            chat = prompt
+
+        prompt_chat = await asyncio.to_thread(
+            self._fit_context, chat, max_tokens, context_policy
+        )
+        chat_completion = await self.model.acreate_chat_completion(
+            prompt_chat,
             tools,
             response_format=response_format,
             temperature=temperature,
             max_tokens=max_tokens,
             stream=False,
         )
+        if prompt_chat is not chat:
+            chat.add_message(chat_completion)
         return chat_completion
 
+    def respond_batch(
+        self,
+        prompts: list[Chat | str],
+        max_concurrency: int = 4,
+        temperature: float = 0.7,
+        max_tokens: int = -1,
+        response_format: Optional[ResponseFormat] = None,
+    ) -> list[AIMessage | Exception]:
+        """
+        Generate responses for independent prompts, sending up to max_concurrency requests at once.
+
+        Args:
+            prompts: User inputs as strings or Chat objects. Chats get their response appended as in respond.
+            max_concurrency: Maximum number of requests in flight.
+            temperature: Controls randomness in output (0.0-1.0, default=0.7).
+            max_tokens: Maximum number of tokens to generate (-1 for no limit).
+            response_format: Optional format constraint for every response.
+
+        Returns:
+            List in the order of prompts. A failed item holds its exception instead of AIMessage,
+            other items are not affected.
+        """
+
+        results: list[AIMessage | Exception] = [None] * len(prompts)
+        for i, result in self.respond_batch_iter(
+            prompts, max_concurrency, temperature, max_tokens, response_format
+        ):
+            results[i] = result
+        return results
+
+    def respond_batch_iter(
+        self,
+        prompts: list[Chat | str],
+        max_concurrency: int = 4,
+        temperature: float = 0.7,
+        max_tokens: int = -1,
+        response_format: Optional[ResponseFormat] = None,
+    ) -> Iterator[tuple[int, AIMessage | Exception]]:
+        """
+        Same as respond_batch, but yields (prompt index, result) pairs in completion order.
+        Stopping the iteration early cancels requests that are not yet sent.
+        """
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(max_concurrency, 1), thread_name_prefix='respond_batch'
+        )
+        try:
+            futures: dict[Future[AIMessage], int] = {
+                executor.submit(
+                    self.respond,
+                    prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format=response_format,
+                ): i
+                for i, prompt in enumerate(prompts)
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def arespond_batch(
+        self,
+        prompts: list[Chat | str],
+        max_concurrency: int = 4,
+        temperature: float = 0.7,
+        max_tokens: int = -1,
+        response_format: Optional[ResponseFormat] = None,
+    ) -> list[AIMessage | Exception]:
+        """
+        Async counterpart of respond_batch, built on arespond.
+        """
+
+        in_flight = asyncio.Semaphore(max(max_concurrency, 1))
+
+        async def respond(prompt: Chat | str) -> AIMessage:
+            async with in_flight:
+                return await self.arespond(
+                    prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    response_format=response_format,
+                )
+
+        return list(
+            await asyncio.gather(
+                *[respond(prompt) for prompt in prompts], return_exceptions=True
+            )
+        )
+
     def invoke_tool_calls(
         self, tool_calls: list[ToolCall | InvalidToolCall], tools: list[Tool]
     ) -> list[ToolMessage]:
         """
         Execute a series of tool calls against the provided functions/tools.
 
+        With config.tool_workers > 1 the calls run concurrently, limited per tool
+        by config.tool_concurrency. Calls running longer than config.tool_timeout
+        (or their config.tool_timeouts entry) are reported as errors and abandoned:
+        they keep running in daemon threads, which do not block interpreter exit.
+        Results are always returned in the order of tool_calls, trimmed to config.tool_budget.
+
         Args:
             tool_calls: List of ToolCall objects specifying which tools to call.
             tools: Available tools that can be executed.
@@ -156,36 +395,210 @@ class llm:
             List of ToolMessage objects containing execution outcomes, including errors.
         """
 
+        find_tool = self._tool_finder(tools)
+        if self.config.tool_workers <= 1 and not (
+            self.config.tool_timeout or self.config.tool_timeouts
+        ):
+            return self._apply_tool_budget(
+                tool_calls,
+                [self._invoke_tool_call(call, find_tool) for call in tool_calls],
+            )
+
+        tool_round = self._tool_round()
+        for call in tool_calls:
+            self._submit_tool_call(tool_round, call, find_tool)
+        return self._collect_tool_results(tool_calls, tool_round)
+
+    @staticmethod
+    def _tool_finder(tools: list[Tool]) -> Callable[[str], Optional[Tool]]:
         def find_tool(name: str) -> Optional[Tool]:
             for t in tools:
                 if t.name == name:
                     return t
 
-        res: list[ToolMessage] = []
-        for call in tool_calls:
-            tool = find_tool(call['name']) if call['type'] == 'tool_call' else None
-            if not tool:
-                res.append(
-                    ToolMessage(
-                        'Tool call format error',
-                        tool_call_id='invalid_tool_call',
-                        status='error',
-                    )
+        return find_tool
+
+    def _tool_round(self) -> ToolCallRound[ToolMessage]:
+        return ToolCallRound(self.config.tool_workers, self._tool_semaphores)
+
+    def _submit_tool_call(
+        self,
+        tool_round: ToolCallRound[ToolMessage],
+        call: ToolCall | InvalidToolCall,
+        find_tool: Callable[[str], Optional[Tool]],
+    ) -> None:
+        # the round holds the tool_concurrency slot, so the call runs without it
+        tool_round.submit(
+            call['name'],
+            lambda: self._run_tool_call(call, find_tool),
+            self.config.tool_timeouts.get(call['name'], self.config.tool_timeout),
+        )
+
+    def _collect_tool_results(
+        self,
+        tool_calls: list[ToolCall | InvalidToolCall],
+        tool_round: ToolCallRound[ToolMessage],
+    ) -> list[ToolMessage]:
+        """Waits for the calls of a round, reporting the ones that ran out of time"""
+
+        def timed_out(i: int) -> ToolMessage:
+            name = tool_calls[i]['name']
+            timeout = self.config.tool_timeouts.get(name, self.config.tool_timeout)
+            return ToolMessage(
+                f'Tool call error: {name} timed out after {timeout} seconds',
+                tool_call_id='invalid_tool_call',
+                status='error',
+            )
+
+        return self._apply_tool_budget(tool_calls, tool_round.results(timed_out))
+
+    def _respond_dispatching_tools(
+        self,
+        chat: Chat,
+        tools: list[Tool],
+        temperature: float,
+        max_tokens: int,
+        context_policy: Optional[ContextPolicy],
+    ) -> tuple[AIMessage, list[ToolMessage]]:
+        """
+        Streams a response and starts each tool call as soon as its </tool_call> is generated.
+        Generation stops once anything but further tool calls follows them.
+        Returns the response (already added to chat) and the results of its tool calls.
+        """
+        find_tool = self._tool_finder(chat.tools + tools)
+        parser = ToolCallStreamParser()
+        tool_round = self._tool_round()
+        stream = self.respond_stream(
+            chat,
+            tools,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            context_policy=context_policy,
+        )
+        try:
+            for chunk in stream:
+                for call in parser.feed(chunk.content):
+                    self._submit_tool_call(tool_round, call, find_tool)
+                if parser.after_tool_calls:
+                    break
+        finally:
+            stream.close()
+
+        response: AIMessage = chat[-1]
+        results = self._collect_tool_results(parser.calls, tool_round)
+        if len(parser.calls) > 0:
+            response.response_metadata['stop_reason'] = 'tool_call'
+            # the response was parsed from the same text, in the same order,
+            # so results of the dispatched calls take the ids of its calls
+            for call, final, result in zip(parser.calls, response.tool_calls, results):
+                if result.tool_call_id == call['id']:
+                    result.tool_call_id = final['id']
+        return response, results
+
+    def _invoke_tool_call(
+        self,
+        call: ToolCall | InvalidToolCall,
+        find_tool: Callable[[str], Optional[Tool]],
+    ) -> ToolMessage:
+        with self._tool_semaphores.get(call['name'], nullcontext()):
+            return self._run_tool_call(call, find_tool)
+
+    def _run_tool_call(
+        self,
+        call: ToolCall | InvalidToolCall,
+        find_tool: Callable[[str], Optional[Tool]],
+    ) -> ToolMessage:
+        tool = find_tool(call['name']) if call['type'] == 'tool_call' else None
+        if not tool:
+            return ToolMessage(
+                'Tool call format error',
+                tool_call_id='invalid_tool_call',
+                status='error',
+            )
+
+        try:
+            return tool.run(tool_input=call['args'], tool_call_id=call['id'])
+        except Exception as e:
+            return ToolMessage(
+                f'Tool call error: {e}\nTraceback: {e.__traceback__}',
+                tool_call_id='invalid_tool_call',
+                status='error',
+            )
+
+    async def ainvoke_tool_calls(
+        self, tool_calls: list[ToolCall | InvalidToolCall], tools: list[Tool]
+    ) -> list[ToolMessage]:
+        """
+        Async counterpart of invoke_tool_calls.
+        Tools run via langchain coroutine path (sync tools are off-loaded to threads by langchain),
+        limited by config.tool_workers, config.tool_concurrency and timeouts the same way.
+        Timed out calls are cancelled.
+        """
+
+        find_tool = self._tool_finder(tools)
+        workers = asyncio.Semaphore(max(self.config.tool_workers, 1))
+
+        res = list(
+            await asyncio.gather(
+                *[self._ainvoke_tool_call(call, find_tool, workers) for call in tool_calls]
+            )
+        )
+        return await asyncio.to_thread(self._apply_tool_budget, tool_calls, res)
+
+    def _apply_tool_budget(
+        self, tool_calls: list[ToolCall | InvalidToolCall], results: list[ToolMessage]
+    ) -> list[ToolMessage]:
+        """Trims tool outputs of one round to config.tool_budget"""
+        if self.config.tool_budget is None:
+            return results
+        return apply_tool_budget(
+            results,
+            [call['name'] for call in tool_calls],
+            self.config.tool_budget,
+            self.model.count_tokens,
+        )
+
+    async def _ainvoke_tool_call(
+        self,
+        call: ToolCall | InvalidToolCall,
+        find_tool: Callable[[str], Optional[Tool]],
+        workers: asyncio.Semaphore,
+    ) -> ToolMessage:
+        tool = find_tool(call['name']) if call['type'] == 'tool_call' else None
+        if not tool:
+            return ToolMessage(
+                'Tool call format error',
+                tool_call_id='invalid_tool_call',
+                status='error',
+            )
+
+        if tool.name in self.config.tool_concurrency:
+            semaphores = self._tool_asemaphores.setdefault(asyncio.get_running_loop(), {})
+            semaphore = semaphores.setdefault(
+                tool.name, asyncio.Semaphore(self.config.tool_concurrency[tool.name])
+            )
+        else:
+            semaphore = nullcontext()
+
+        timeout = self.config.tool_timeouts.get(call['name'], self.config.tool_timeout)
+        try:
+            async with workers, semaphore:
+                # the timeout starts once the call holds its slots
+                return await asyncio.wait_for(
+                    tool.arun(tool_input=call['args'], tool_call_id=call['id']), timeout
                 )
-            else:
-                try:
-                    res.append(
-                        tool.run(tool_input=call['args'], tool_call_id=call['id'])
-                    )
-                except Exception as e:
-                    res.append(
-                        ToolMessage(
-                            f'Tool call error: {e}\nTraceback: {e.__traceback__}',
-                            tool_call_id='invalid_tool_call',
-                            status='error',
-                        )
-                    )
-        return res
+        except asyncio.TimeoutError:
+            return ToolMessage(
+                f'Tool call error: {call["name"]} timed out after {timeout} seconds',
+                tool_call_id='invalid_tool_call',
+                status='error',
+            )
+        except Exception as e:
+            return ToolMessage(
+                f'Tool call error: {e}\nTraceback: {e.__traceback__}',
+                tool_call_id='invalid_tool_call',
+                status='error',
+            )
 
     def act(
         self,
@@ -196,11 +609,12 @@ class llm:
         max_tokens_per_message: int = -1,
         max_prediction_rounds: int = 3,
         response_format: Optional[ResponseFormat] = None,  # BETA
+        context_policy: Optional[ContextPolicy] = None,
     ) -> AIMessage:
         """
         Execute a multi-turn interaction where the model generates responses and potentially calls tools.
 
-        For local/llama_cpp backends, performs up to max_prediction_rounds of message/tool call cycles.
+        For local/llama_cpp and synthetic backends, performs up to max_prediction_rounds of message/tool call cycles.
         Remote/lmstudio delegates directly to model.act. Raises error for unsupported backends.
 
         Args:
@@ -210,40 +624,93 @@ class llm:
             temperature: Controls response randomness (0.0-1.0, default=0.7).
             max_tokens_per_message: Maximum tokens per message generation (-1 for no limit).
             max_prediction_rounds: Max number of reasoning/tool call cycles to perform.
+            context_policy: Overrides llm.context_policy, applied before each round.
 
         Returns:
             The final AIMessage from the interaction sequence.
         """
         
-        chat: Chat
-        if isinstance(prompt, str):
-            chat = Chat()
-            chat.add_user_message(prompt)
-        else:
-            chat = prompt.model_copy(deep=True)
+        chat = self._prepare_act_chat(prompt, response_format)
 
-        if response_format is not None and response_format.__repr__() != '':
-            chat.add_message(
-                SystemMessage(
-                    content=f"""
-User wants you to answer in the following format:
-{response_format.__repr__()}"""
-                )
+        assert max_prediction_rounds > 0
+        if self.model.backend in LOCAL_ACT_BACKENDS:
+            for i in range(max_prediction_rounds):
+                if self.config.early_tool_dispatch:
+                    response, results = self._respond_dispatching_tools(
+                        chat,
+                        tools,
+                        temperature,
+                        max_tokens_per_message,
+                        context_policy,
+                    )
+                else:
+                    response: AIMessage = self.respond(
+                        chat,
+                        tools=tools,
+                        temperature=temperature,
+                        max_tokens=max_tokens_per_message,
+                        context_policy=context_policy,
+                    )
+                on_message(response)
+                if response.response_metadata.get('stop_reason', 'stop') == 'tool_call':
+                    if not self.config.early_tool_dispatch:
+                        results: list[ToolMessage] = self.invoke_tool_calls(
+                            response.tool_calls + response.invalid_tool_calls,
+                            chat.tools + tools,
+                        )
+                    chat.add_messages(results)
+                    for message in results:
+                        on_message(message)
+                else:
+                    break
+        elif self.model.backend == 'lmstudio':
+            # lmstudio runs all rounds server-side, so the policy applies once before them
+            chat = self._fit_context(chat, max_tokens_per_message, context_policy)
+            response = self.model.act(
+                chat,
+                tools,
+                on_message,
+                temperature,
+                max_tokens_per_message,
+                max_prediction_rounds,
             )
+        else:
+            raise NotImplementedError(
+                f'llm.act is not implemented for {self.model.backend}'
+            )
+
+        return response
+
+    async def aact(
+        self,
+        prompt: Chat | str,
+        tools: list[Tool] = [],
+        on_message: MessageHandler = EmptyMessageHandler,
+        temperature: float = 0.7,
+        max_tokens_per_message: int = -1,
+        max_prediction_rounds: int = 3,
+        response_format: Optional[ResponseFormat] = None,  # BETA
+        context_policy: Optional[ContextPolicy] = None,
+    ) -> AIMessage:
+        """
+        Async counterpart of act. Model rounds use arespond, tool calls use ainvoke_tool_calls.
+        """
+
+        chat = self._prepare_act_chat(prompt, response_format)
 
         assert max_prediction_rounds > 0
-        if self.model.backend == 'llama_cpp':
+        if self.model.backend in LOCAL_ACT_BACKENDS:
             for i in range(max_prediction_rounds):
-                response: AIMessage = self.respond(
+                response: AIMessage = await self.arespond(
                     chat,
                     tools=tools,
                     temperature=temperature,
                     max_tokens=max_tokens_per_message,
+                    context_policy=context_policy,
                 )
                 on_message(response)
-                chat.add_message(response)
                 if response.response_metadata.get('stop_reason', 'stop') == 'tool_call':
-                    results: list[ToolMessage] = self.invoke_tool_calls(
+                    results: list[ToolMessage] = await self.ainvoke_tool_calls(
                         response.tool_calls + response.invalid_tool_calls,
                         chat.tools + tools,
                     )
@@ -253,7 +720,10 @@ User wants you to answer in the following format:
                 else:
                     break
         elif self.model.backend == 'lmstudio':
-            response = self.model.act(
+            chat = await asyncio.to_thread(
+                self._fit_context, chat, max_tokens_per_message, context_policy
+            )
+            response = await self.model.aact(
                 chat,
                 tools,
                 on_message,
@@ -263,7 +733,28 @@ User wants you to answer in the following format:
             )
         else:
             raise NotImplementedError(
-                f'llm.act is not implemented for {self.model.backend}'
+                f'llm.aact is not implemented for {self.model.backend}'
             )
 
         return response
+
+    @staticmethod
+    def _prepare_act_chat(
+        prompt: Chat | str, response_format: Optional[ResponseFormat]
+    ) -> Chat:
+        chat: Chat
+        if isinstance(prompt, str):
+            chat = Chat()
+            chat.add_user_message(prompt)
+        else:
+            chat = prompt.model_copy(deep=True)
+
+        if response_format is not None and response_format.__repr__() != '':
+            chat.add_message(
+                SystemMessage(
+                    content=f"""
+User wants you to answer in the following format:
+{response_format.__repr__()}"""
+                )
+            )
+        return chat
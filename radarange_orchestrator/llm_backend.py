@@ -1,4 +1,5 @@
-from typing import Iterator, Literal, Optional
+import asyncio
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, Literal, Optional
 
 from pydantic import BaseModel
 
@@ -14,16 +15,43 @@ from .chat import (
 from .config import BACKEND_CAPABILITIES
 from .formatting import ResponseFormat
 from .tools import Tool
+from .utils.tool_budget import ToolBudget
 
-AVAILABLE_BACKEND = Literal['llama_cpp', 'lmstudio', 'local', 'remote']
+if TYPE_CHECKING:
+    from .utils.model_registry import ModelInfo
+
+AVAILABLE_BACKEND = Literal['llama_cpp', 'lmstudio', 'synthetic', 'local', 'remote']
 DEFAULT_LOCAL_BACKEND = 'llama_cpp'
 DEFAULT_REMOTE_BACKEND = 'lmstudio'
+# backends whose act() rounds and tool calls run in llm.act rather than in the backend
+LOCAL_ACT_BACKENDS = ('llama_cpp', 'synthetic')
+
+
+def lmstudio_hosts() -> list[str]:
+    """LM Studio hosts from config, read at call time so runtime overrides of config apply"""
+    from . import config
+
+    if len(config.LMSTUDIO_ENDPOINTS) > 0:
+        return list(config.LMSTUDIO_ENDPOINTS)
+    return [f'{config.LMSTUDIO_ADDRESS}:{config.LMSTUDIO_PORT}']
 
 
 class LLM_Config(BaseModel):
     ttl: int = 300
     gpus: list[int] = [0, 1]
     ctx_size: int = 80000
+    # tool execution in llm.invoke_tool_calls
+    tool_workers: int = 1  # >1 runs tool calls of one round concurrently
+    tool_timeout: Optional[float] = None  # seconds, counted from the start of each call
+    tool_timeouts: dict[str, float] = {}  # per-tool overrides of tool_timeout
+    tool_concurrency: dict[str, int] = {}  # max simultaneous calls per tool name
+    tool_budget: Optional[ToolBudget] = None  # token limits of tool outputs, None keeps them whole
+    # llama_cpp act(): stream responses, start each tool call as soon as it is generated
+    # and stop generation after the last one
+    early_tool_dispatch: bool = False
+    # llama_cpp: choose context, batch, threads and gpu offload from the model metadata
+    # and free memory (see backend.llama_cpp_autoconfig); ctx_size is then an upper bound
+    auto_config: bool = False
 
 
 class Model:
@@ -35,6 +63,7 @@ class Model:
     model_path: str
     backend: AVAILABLE_BACKEND
     config: LLM_Config
+    backend_options: Optional[BaseModel]
     model: GenericModel
 
     def __init__(
@@ -42,6 +71,7 @@ class Model:
         model: str,
         backend: AVAILABLE_BACKEND = 'remote',
         config: Optional[LLM_Config] = None,
+        backend_options: Optional[BaseModel] = None,
     ):
         self.model_path = model
         self.backend = backend
@@ -52,6 +82,8 @@ class Model:
                 self.backend = DEFAULT_REMOTE_BACKEND
 
         self.config = config
+        # passed to the backend constructor as is, e.g. SyntheticConfig of the synthetic backend
+        self.backend_options = backend_options
 
         self.init_model()
 
@@ -78,6 +110,11 @@ class Model:
                     model = model[0]
 
                 self.model = llama_cpp_model.LlamaModel(model, config)
+                if self.model.config.ctx_size != self.config.ctx_size:
+                    # context picked by the backend; copied, since the config may be shared
+                    self.config = self.config.model_copy(
+                        update={'ctx_size': self.model.config.ctx_size}
+                    )
             case 'lmstudio':
                 if (
                     'lmstudio' not in BACKEND_CAPABILITIES
@@ -86,12 +123,23 @@ class Model:
                     raise NotImplementedError('lmstudio backend is not enabled')
 
                 from .backend import lmstudio_remote_model
-                from .config import LMSTUDIO_ADDRESS, LMSTUDIO_PORT
 
                 config = lmstudio_remote_model.to_lms_config(self.config)
 
-                self.model = lmstudio_remote_model.LMSModel(
-                    f'{LMSTUDIO_ADDRESS}:{LMSTUDIO_PORT}', self.model_path, config
+                hosts = lmstudio_hosts()
+                if len(hosts) > 1:
+                    from .backend import lmstudio_pool
+
+                    self.model = lmstudio_pool.LMSPool(hosts, self.model_path, config)
+                else:
+                    self.model = lmstudio_remote_model.LMSModel(
+                        hosts[0], self.model_path, config
+                    )
+            case 'synthetic':
+                from .backend import synthetic_model
+
+                self.model = synthetic_model.SyntheticModel(
+                    self.model_path, self.backend_options
                 )
 
     def count_tokens(self, prompt: str | Chat) -> int:
@@ -128,6 +176,32 @@ class Model:
             chat, tools, response_format, temperature, max_tokens, stream
         )
 
+    async def acreate_chat_completion(
+        self,
+        chat: Chat,
+        tools: list[Tool],
+        response_format: Optional[ResponseFormat] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 5000,
+        stream: bool = False,
+    ) -> AIMessage | AsyncIterator[AIMessageChunk]:
+        if not hasattr(self, 'model'):
+            await asyncio.to_thread(self.init_model)
+
+        await self.model.aassure_loaded()
+
+        if response_format is not None and response_format.__repr__() != '':
+            chat.add_message(
+                SystemMessage(f"""
+            User wants you to answer in the following format:
+            {response_format.__repr__()}
+            """)
+            )
+
+        return await self.model.acreate_chat_completion(
+            chat, tools, response_format, temperature, max_tokens, stream
+        )
+
     def act(
         self,
         chat: Chat,
@@ -157,21 +231,62 @@ class Model:
             max_prediction_rounds,
         )
 
+    async def aact(
+        self,
+        chat: Chat,
+        tools: list[Tool] = [],
+        on_message: MessageHandler = EmptyMessageHandler,
+        temperature: float = 0.7,
+        max_tokens_per_message: int = -1,
+        max_prediction_rounds: int = 3,
+    ) -> AIMessage:
+        if not hasattr(self, 'model'):
+            await asyncio.to_thread(self.init_model)
+
+        await self.model.aassure_loaded()
+
+        if not hasattr(self.model, 'aact'):
+            raise NotImplementedError(
+                f'Model.aact is not implemented for {self.backend}'
+            )
+
+        return await self.model.aact(
+            chat,
+            tools,
+            on_message,
+            temperature,
+            max_tokens_per_message,
+            max_prediction_rounds,
+        )
+
+    async def aclose(self) -> None:
+        if hasattr(self, 'model'):
+            await self.model.aclose()
+            del self.model
+
+    @staticmethod
+    def local_models() -> list['ModelInfo']:
+        """Local .gguf models with their header metadata (architecture, size, quantization, context)"""
+        from .utils import model_registry
+
+        return model_registry.models()
+
     @staticmethod
     def available_models(backend: AVAILABLE_BACKEND = 'remote') -> list[str]:
         if backend == 'llama_cpp' or backend == 'local':
-            from .utils import find_model
+            from .utils import model_registry
 
-            models = find_model('*')
-            if isinstance(models, str):
-                models = [models]
-            return models
+            return [model.path for model in model_registry.models()]
         elif backend == 'lmstudio' or backend == 'remote':
             import lmstudio as lms
 
-            from .config import LMSTUDIO_ADDRESS, LMSTUDIO_PORT
-
-            with lms.Client(f'{LMSTUDIO_ADDRESS}:{LMSTUDIO_PORT}') as client:
-                return [mod.model_key for mod in client.list_downloaded_models()]
+            hosts = lmstudio_hosts()
+            for host in hosts:
+                try:
+                    with lms.Client(host) as client:
+                        return [mod.model_key for mod in client.list_downloaded_models()]
+                except OSError:
+                    if host == hosts[-1]:
+                        raise
         else:
             raise NotImplementedError(backend)
@@ -7,6 +7,7 @@ from .listdir_tool import ls_tool
 from .net_scrape_tool import scrape_tool
 from .net_search_tool import net_tool
 from .pdf_parse_tool import pdf_tool
+from .http_client import HTTPConfig, configure_http
 
 # Dynamically collect all Tool instances into a list
 all_tools = [value for name, value in globals().items() if isinstance(value, Tool)]
@@ -19,6 +20,8 @@ __all__ = [
     'scrape_tool',
     'net_tool',
     'pdf_tool',
+    'HTTPConfig',
+    'configure_http',
     'Tool',
     'ToolMessage',
     'ToolCall',
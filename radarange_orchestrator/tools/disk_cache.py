@@ -0,0 +1,66 @@
+import hashlib
+import os
+import threading
+
+
+def atomic_write(path: str, data: str) -> None:
+    """Writes via a temporary file, so that concurrent readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def touch(path: str) -> None:
+    """Marks cache file as recently used"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict_lru(directory: str, max_bytes: int, suffix: str = '.json') -> None:
+    """Removes least recently used (by mtime) cache files until the directory fits max_bytes"""
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(suffix)]
+    except OSError:
+        return
+
+    stats = []
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            stats.append((path, os.stat(path)))
+        except OSError:
+            continue
+
+    total = sum(st.st_size for _, st in stats)
+    for path, st in sorted(stats, key=lambda s: s[1].st_mtime):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= st.st_size
+
+
+# path -> (size, mtime_ns, sha256), so that unchanged files are not hashed again
+_hash_memo: dict[str, tuple[int, int, str]] = {}
+
+
+def file_hash(path: str) -> str:
+    """Content hash of the file, recomputed only when its size or mtime changes"""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    memo = _hash_memo.get(path)
+    if memo is not None and memo[:2] == (st.st_size, st.st_mtime_ns):
+        return memo[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    _hash_memo[path] = (st.st_size, st.st_mtime_ns, digest.hexdigest())
+    return digest.hexdigest()
@@ -1,11 +1,9 @@
 import os
 import time
-
-import requests
 from langchain_core.tools import StructuredTool
 
 
-def download(href: str, filename: str) -> str:
+def download(href: str, filename: str, sha256: str = '') -> str:
     print(
         f'Called download_file with href: {href} and filename: {filename}', flush=True
     )
@@ -16,21 +14,13 @@ def download(href: str, filename: str) -> str:
     if not href.startswith(('http://', 'https://')):
         raise RuntimeError(f"Invalid URL protocol: {href}")
 
-    # Download file with streaming
-    with requests.get(href, stream=True, timeout=10) as response:
-        response.raise_for_status()
-
-        # Create parent directories if needed
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-        # Write file in chunks
-        with open(filename, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+    from .downloader import fetch_file
 
-        # Add success message
-        file_size = os.path.getsize(filename)
-        stdout = f'Downloaded {file_size} bytes to {filename}'
+    result = fetch_file(href, filename, sha256 or None)
+    if result.skipped:
+        stdout = f'{filename} is already up to date ({result.size} bytes, sha256 {result.sha256})'
+    else:
+        stdout = f'Downloaded {result.size} bytes to {filename} (sha256 {result.sha256})'
 
     print(f'Taken {time.time() - ts:.1f} seconds to complete.')
     return stdout
@@ -44,5 +34,6 @@ download_tool = StructuredTool.from_function(
     description='Retrieves and saves the contents of a file from a specified URL. Supports common file formats like PDF, DOCX, images, and binaries. \
         Arguments:\
             - href: string -Full URL (including protocol) of the file to download. Must point directly to a downloadable resource.\
-            - filename: string - Target download file name (including extension). The file is going to be placed at the ./downloads/`filename` path.',
+            - filename: string - Target download file name (including extension). The file is going to be placed at the ./downloads/`filename` path.\
+            - sha256: string - optional expected sha256 of the file. The download is skipped if the file already has it and fails if the downloaded file does not.',
 )
\ No newline at end of file
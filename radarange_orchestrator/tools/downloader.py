@@ -0,0 +1,324 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from pydantic import BaseModel
+
+from .. import config
+from . import http_client
+from .disk_cache import atomic_write, file_hash
+
+_CHUNK_SIZE = (
+    1 << 16
+)  # small enough to keep most of the bytes read before a dropped connection
+_STATE_SAVE_INTERVAL = 1.0  # seconds between progress snapshots for resume
+
+# Errors after which a segment request is repeated from the last written byte
+_TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class Segment(BaseModel):
+    start: int
+    end: int  # exclusive
+    done: int = 0  # bytes written from start
+
+    @property
+    def complete(self) -> bool:
+        return self.done >= self.end - self.start
+
+
+class DownloadState(BaseModel):
+    """Remote validators and progress of a download, stored next to the target file"""
+
+    url: str
+    size: Optional[int] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    accept_ranges: bool = False
+    segments: list[Segment] = []
+    complete: bool = False
+    sha256: Optional[str] = None
+
+    def same_resource(self, other: 'DownloadState') -> bool:
+        """Whether both states describe the same version of the same remote file"""
+        if self.url != other.url or self.size != other.size:
+            return False
+        if self.etag is not None and other.etag is not None:
+            return self.etag == other.etag
+        if self.last_modified is not None and other.last_modified is not None:
+            return self.last_modified == other.last_modified
+        return False
+
+    @property
+    def validator(self) -> Optional[str]:
+        return self.etag if self.etag is not None else self.last_modified
+
+    def downloaded_prefix(self) -> int:
+        """Bytes from the file start that are already written"""
+        total = 0
+        for segment in self.segments:
+            total += segment.done
+            if not segment.complete:
+                break
+        return total
+
+
+class DownloadResult(BaseModel):
+    path: str
+    size: int
+    sha256: str
+    skipped: bool = False  # target already matched the remote file
+    resumed_bytes: int = 0  # bytes kept from an interrupted download
+
+
+def _state_path(path: str) -> str:
+    return os.path.join(
+        os.path.dirname(path), f'.{os.path.basename(path)}.download.json'
+    )
+
+
+def _load_state(path: str) -> Optional[DownloadState]:
+    try:
+        with open(_state_path(path)) as f:
+            return DownloadState.model_validate_json(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(path: str, state: DownloadState) -> None:
+    atomic_write(_state_path(path), state.model_dump_json())
+
+
+def _probe(url: str) -> DownloadState:
+    """Remote size and validators from a HEAD request. Missing fields if the server does not answer it"""
+    try:
+        response = http_client.head(url, headers={'Accept-Encoding': 'identity'})
+    except requests.RequestException:
+        return DownloadState(url=url)
+    if not response.ok:
+        return DownloadState(url=url)
+
+    size = response.headers.get('Content-Length')
+    return DownloadState(
+        url=url,
+        size=int(size)
+        if size is not None and 'Content-Encoding' not in response.headers
+        else None,
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+        accept_ranges=response.headers.get('Accept-Ranges', '').lower() == 'bytes',
+    )
+
+
+def _plan_segments(size: int) -> list[Segment]:
+    n_segments = max(
+        min(config.DOWNLOAD_SEGMENTS, size // config.DOWNLOAD_MIN_SEGMENT_BYTES), 1
+    )
+    bounds = [size * i // n_segments for i in range(n_segments + 1)]
+    return [Segment(start=bounds[i], end=bounds[i + 1]) for i in range(n_segments)]
+
+
+def fetch_file(url: str, path: str, sha256: Optional[str] = None) -> DownloadResult:
+    """
+    Downloads url to path.
+
+    Skips the download if path already holds the expected sha256, or the same remote version
+    (by ETag/Last-Modified and size) that was downloaded before.
+    Servers supporting byte ranges are fetched in parallel segments, and an interrupted download
+    continues from the written bytes. The sha256 is computed while the file is written.
+    """
+    remote = _probe(url)
+    state = _load_state(path)
+
+    if os.path.exists(path):
+        if sha256 is not None and file_hash(path) == sha256:
+            return DownloadResult(
+                path=path, size=os.path.getsize(path), sha256=sha256, skipped=True
+            )
+        if (
+            sha256 is None
+            and state is not None
+            and state.complete
+            and state.same_resource(remote)
+            and os.path.getsize(path) == state.size
+        ):
+            return DownloadResult(
+                path=path, size=state.size, sha256=state.sha256, skipped=True
+            )
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    part_path = f'{path}.part'
+    segmented = remote.accept_ranges and remote.size is not None and remote.size > 0
+    resumed_bytes = 0
+    if (
+        segmented
+        and state is not None
+        and not state.complete
+        and state.same_resource(remote)
+        and os.path.exists(part_path)
+    ):
+        resumed_bytes = sum(segment.done for segment in state.segments)
+    else:
+        state = remote
+        if segmented:
+            state.segments = _plan_segments(remote.size)
+            with open(part_path, 'wb') as f:
+                f.truncate(remote.size)
+
+    if segmented:
+        digest = _fetch_segments(url, path, part_path, state)
+    else:
+        digest = _fetch_stream(url, part_path, state)
+
+    size = os.path.getsize(part_path)
+    if state.size is not None and size != state.size:
+        raise RuntimeError(f'Downloaded {size} bytes from {url}, expected {state.size}')
+    if sha256 is not None and digest != sha256:
+        os.remove(part_path)
+        raise RuntimeError(
+            f'Checksum mismatch for {url}: expected {sha256}, got {digest}'
+        )
+
+    os.replace(part_path, path)
+    state.size = size
+    state.segments = []
+    state.complete = True
+    state.sha256 = digest
+    _save_state(path, state)
+    return DownloadResult(
+        path=path, size=size, sha256=digest, resumed_bytes=resumed_bytes
+    )
+
+
+def _fetch_stream(url: str, part_path: str, state: DownloadState) -> str:
+    """Single request download for servers without range support"""
+    digest = hashlib.sha256()
+    with http_client.get(url, stream=True) as response:
+        response.raise_for_status()
+        state.etag = state.etag or response.headers.get('ETag')
+        state.last_modified = state.last_modified or response.headers.get(
+            'Last-Modified'
+        )
+        with open(part_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fetch_segment(
+    url: str,
+    part_path: str,
+    state: DownloadState,
+    segment: Segment,
+    progress: threading.Condition,
+    stop: threading.Event,
+) -> None:
+    retries = 0
+    with open(part_path, 'r+b') as f:
+        while not segment.complete and not stop.is_set():
+            headers = {
+                'Range': f'bytes={segment.start + segment.done}-{segment.end - 1}',
+                'Accept-Encoding': 'identity',
+            }
+            if state.validator is not None:
+                # server sends the whole file instead of the range if it changed
+                headers['If-Range'] = state.validator
+            try:
+                with http_client.get(url, headers=headers, stream=True) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise RuntimeError(
+                            f'{url} changed during download or ignored the range request'
+                        )
+                    for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                        chunk = chunk[: segment.end - segment.start - segment.done]
+                        f.seek(segment.start + segment.done)
+                        f.write(chunk)
+                        f.flush()
+                        with progress:
+                            segment.done += len(chunk)
+                            progress.notify_all()
+                        if segment.complete or stop.is_set():
+                            break
+            except _TRANSIENT_ERRORS:
+                if retries >= config.DOWNLOAD_RETRIES:
+                    raise
+            else:
+                if not segment.complete and retries >= config.DOWNLOAD_RETRIES:
+                    raise RuntimeError(f'{url} keeps closing the connection early')
+            retries += 1
+
+
+def _fetch_segments(url: str, path: str, part_path: str, state: DownloadState) -> str:
+    """
+    Fetches segments in parallel while hashing the file prefix that is already written.
+    Progress is saved periodically, and on failure, for a later resume.
+    """
+    progress = threading.Condition()
+    stop = threading.Event()
+    pending = [segment for segment in state.segments if not segment.complete]
+    executor = ThreadPoolExecutor(max_workers=max(len(pending), 1))
+    futures: list[Future] = [
+        executor.submit(_fetch_segment, url, part_path, state, segment, progress, stop)
+        for segment in pending
+    ]
+
+    def on_done(future: Future) -> None:
+        # one failed segment fails the download, the rest stop at the next chunk
+        if future.exception() is not None:
+            stop.set()
+        with progress:
+            progress.notify_all()
+
+    for future in futures:
+        future.add_done_callback(on_done)
+
+    digest = hashlib.sha256()
+    hashed = 0
+    last_save = time.monotonic()
+    try:
+        # unbuffered: read-ahead would cache bytes that segments have not written yet
+        with open(part_path, 'rb', buffering=0) as f:
+            while True:
+                with progress:
+                    progress.wait_for(
+                        lambda: (
+                            state.downloaded_prefix() > hashed
+                            or all(future.done() for future in futures)
+                        ),
+                        timeout=_STATE_SAVE_INTERVAL,
+                    )
+                    prefix = state.downloaded_prefix()
+                    finished = all(future.done() for future in futures)
+
+                f.seek(hashed)
+                while hashed < prefix:
+                    data = f.read(min(_CHUNK_SIZE, prefix - hashed))
+                    if not data:
+                        break
+                    digest.update(data)
+                    hashed += len(data)
+
+                if time.monotonic() - last_save >= _STATE_SAVE_INTERVAL:
+                    with progress:
+                        _save_state(path, state)
+                    last_save = time.monotonic()
+                if finished:
+                    break
+        for future in futures:
+            future.result()
+    finally:
+        stop.set()
+        executor.shutdown(cancel_futures=True)
+        with progress:
+            _save_state(path, state)
+    return digest.hexdigest()
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pydantic import BaseModel
+
+from .. import config
+from .disk_cache import atomic_write, evict_lru, touch
+from . import http_client
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of url used as a cache key.
+    Lowercases scheme and host, drops default port, fragment and utm_* tracking params, sorts query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port is not None and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.startswith('utm_')
+    )
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+class CacheEntry(BaseModel):
+    url: str
+    stored_at: float
+    raw: str
+    markdown: Optional[str] = None  # cleaned page content, if the caller processed it
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.stored_at < ttl
+
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers for revalidation"""
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """
+    On-disk cache of HTTP responses, one json file per normalized url.
+    Least recently used entries are evicted once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.json')
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = CacheEntry.model_validate_json(f.read())
+        except (OSError, ValueError):
+            return None
+        touch(path)
+        return entry if entry.url == key else None
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        atomic_write(
+            self._path(key), entry.model_copy(update={'url': key}).model_dump_json()
+        )
+        with self._lock:
+            evict_lru(self.directory, self.max_bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            evict_lru(self.directory, 0)
+
+
+_cache: Optional[HTTPCache] = None
+
+
+def get_http_cache() -> Optional[HTTPCache]:
+    """Shared cache configured by config.HTTP_CACHE_DIR, None if caching is disabled"""
+    global _cache
+    if config.HTTP_CACHE_DIR is None:
+        return None
+    if _cache is None or _cache.directory != config.HTTP_CACHE_DIR:
+        _cache = HTTPCache(config.HTTP_CACHE_DIR, config.HTTP_CACHE_MAX_BYTES)
+    return _cache
+
+
+def cached_get(
+    url: str,
+    ttl: float,
+    headers: Optional[dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> CacheEntry:
+    """
+    GET url through the shared cache.
+    Fresh entries are returned without a request, stale ones are revalidated with ETag/Last-Modified.
+    Returned entry keeps markdown from the cached copy while the page is unchanged,
+    otherwise markdown is None and the caller may fill it in with store().
+    """
+    cache = get_http_cache()
+    key = normalize_url(url)
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None and entry.is_fresh(ttl):
+        return entry
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        request_headers.update(entry.validators())
+    response = http_client.get(url, headers=request_headers, timeout=timeout)
+
+    if response.status_code == 304 and entry is not None:
+        entry.stored_at = time.time()
+        cache.put(key, entry)
+        return entry
+
+    response.raise_for_status()
+    entry = CacheEntry(
+        url=key,
+        stored_at=time.time(),
+        raw=response.text,
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+    )
+    if cache is not None:
+        cache.put(key, entry)
+    return entry
+
+
+def get_fresh(key: str, ttl: float) -> Optional[CacheEntry]:
+    """Cached entry under key if it is younger than ttl, without any request"""
+    cache = get_http_cache()
+    entry = cache.get(key) if cache is not None else None
+    if entry is not None and entry.is_fresh(ttl):
+        return entry
+    return None
+
+
+def store(entry: CacheEntry) -> None:
+    """Writes back an entry returned by cached_get, e.g. after filling in markdown"""
+    cache = get_http_cache()
+    if cache is not None:
+        cache.put(entry.url, entry)
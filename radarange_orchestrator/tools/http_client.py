@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    import requests
+
+
+class HTTPConfig(BaseModel):
+    pool_connections: int = 16  # hosts with kept-alive connections
+    pool_maxsize: int = 8  # connections kept per host
+    retries: int = 3
+    backoff_factor: float = (
+        0.5  # sleep between retries is backoff_factor * 2 ** (retry - 1)
+    )
+    retry_statuses: list[int] = [429, 500, 502, 503, 504]
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    user_agent: str = 'Mozilla/5.0'
+
+
+_http_config = HTTPConfig()
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def configure_http(http_config: HTTPConfig) -> None:
+    """Replaces settings of the shared session. Connections of the previous session are closed"""
+    global _http_config, _session
+    with _session_lock:
+        _http_config = http_config
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _make_session(http_config: HTTPConfig) -> requests.Session:
+    # requests is loaded with the first session rather than with the tools
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=http_config.retries,
+        backoff_factor=http_config.backoff_factor,
+        status_forcelist=http_config.retry_statuses,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=http_config.pool_connections,
+        pool_maxsize=http_config.pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = http_config.user_agent
+    return session
+
+
+def get_session() -> requests.Session:
+    """Process-wide session shared by network tools, keeping connections alive per host"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _make_session(_http_config)
+        return _session
+
+
+def get(url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+    """GET with the shared session. Without timeout, configured connect/read timeouts apply"""
+    if timeout is None:
+        timeout = (_http_config.connect_timeout, _http_config.read_timeout)
+    return get_session().get(url, timeout=timeout, **kwargs)
+
+
+def head(url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+    """HEAD with the shared session, following redirects"""
+    if timeout is None:
+        timeout = (_http_config.connect_timeout, _http_config.read_timeout)
+    kwargs.setdefault('allow_redirects', True)
+    return get_session().head(url, timeout=timeout, **kwargs)
@@ -1,29 +1,33 @@
 import time
 
-import requests
-from html2text import HTML2Text
 from langchain_core.tools import StructuredTool
-from readability import Document
+
+from .. import config
+from .http_cache import cached_get, store
 
 
 def _get_clean_page_content(url: str, n_truncate: int):
+    # imported on first scrape, so that importing the tools stays fast
+    from html2text import HTML2Text
+    from readability import Document
+
     try:
-        # 1. Fetch page
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        # 1. Fetch page, unless cached
+        entry = cached_get(url, config.HTTP_CACHE_PAGE_TTL, timeout=15)
 
-        # 2. Extract main content
-        doc = Document(response.text)
-        cleaned_html = doc.summary()
+        if entry.markdown is None:
+            # 2. Extract main content
+            doc = Document(entry.raw)
+            cleaned_html = doc.summary()
 
-        # 3. Convert to clean Markdown
-        h = HTML2Text()
-        h.ignore_links = False
-        markdown_content = h.handle(cleaned_html)
+            # 3. Convert to clean Markdown
+            h = HTML2Text()
+            h.ignore_links = False
+            entry.markdown = h.handle(cleaned_html)
+            store(entry)
 
         # 4. Truncate for LLM context
-        return markdown_content[:n_truncate]
+        return entry.markdown[:n_truncate]
 
     except Exception as e:
         return f'Failed to retrieve content: {str(e)}'
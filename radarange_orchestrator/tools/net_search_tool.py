@@ -1,12 +1,17 @@
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Any, Optional
+from urllib.parse import urlencode
 
-import requests
 from langchain_core.tools import StructuredTool
 from pydantic import BaseModel
 
+from .. import config
+from . import http_client
+from .http_cache import CacheEntry, get_fresh, store
 from .net_scrape_tool import scrape_web_page
+from .search_instances import InstanceManager
 
 _good_instances = [
     'https://4get.dcs0.hu',
@@ -20,15 +25,29 @@ _good_instances = [
     'https://4get.kuuro.net',
 ]
 
-_instance = _good_instances[0]
+_instances = InstanceManager(_good_instances)
 
 
-def _raw(inst: str, prompt: str) -> Optional[dict[str, Any]]:
-    try:
-        r = requests.get(f'{inst}/api/v1/web?s={prompt}')
-    except Exception:
-        return None
-    return json.loads(r.content.decode())
+def _fetch(inst: str, path: str) -> CacheEntry:
+    response = http_client.get(f'{inst}{path}')
+    response.raise_for_status()
+    # mirrors answer rate limits and upstream failures with a non-ok status
+    if json.loads(response.text).get('status') != 'ok':
+        raise RuntimeError(f'{inst} failed to answer {path}')
+    return CacheEntry(url=path, stored_at=time.time(), raw=response.text)
+
+
+def _raw(prompt: str) -> Optional[dict[str, Any]]:
+    # cached by query alone, so that any mirror's answer is reused
+    path = f'/api/v1/web?{urlencode({"s": prompt})}'
+    entry = get_fresh(path, config.HTTP_CACHE_SEARCH_TTL)
+    if entry is None:
+        try:
+            entry = _instances.request(lambda inst: _fetch(inst, path))
+        except Exception:
+            return None
+        store(entry)
+    return json.loads(entry.raw)
 
 
 def _extract_answer(query: dict[str, Any]) -> Optional[dict[str, Any]]:
@@ -57,6 +76,32 @@ def _extract_links(query: dict[str, Any]) -> list[SearchResult]:
     return results
 
 
+def _scrape_results(results: list[SearchResult], truncate_content: int) -> list[dict]:
+    """
+    Scrapes result pages in parallel, keeping search order.
+    Pages not finished by config.WEB_SEARCH_SCRAPE_DEADLINE are dropped.
+    """
+    if len(results) == 0:
+        return []
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(config.WEB_SEARCH_SCRAPE_WORKERS, len(results))
+    )
+    futures = [
+        executor.submit(scrape_web_page, res.url, truncate_content, 'web_search')
+        for res in results
+    ]
+    wait(futures, timeout=config.WEB_SEARCH_SCRAPE_DEADLINE)
+    # do not block on pages still loading, they finish in background
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    return [
+        {'title': res.title, 'url': res.url, 'content': future.result()}
+        for res, future in zip(results, futures)
+        if future.done() and not future.cancelled()
+    ]
+
+
 def web_search(
     query: str, scrape_pages: bool, max_results: int = 10, truncate_content: int = 10000
 ) -> list[dict]:
@@ -66,26 +111,17 @@ def web_search(
     )
     ts = time.time()
 
-    results = _extract_links(_raw(_instance, query))
+    results = _extract_links(_raw(query))[:max_results]
 
     print(f'Taken {time.time() - ts:.1f} seconds to complete search.')
     if scrape_pages:
         ts = time.time()
-        results = [
-            {
-                'title': res.title,
-                'url': res.url,
-                'content': scrape_web_page(res.url, truncate_content, source='web_search'),
-            }
-            for res in results
-        ]
+        results = _scrape_results(results, truncate_content)
         print(
-            f'Taken {time.time() - ts:.1f} seconds to complete scraping pages with mean scrape time {(time.time() - ts) / len(results):.1f} seconds.'
+            f'Taken {time.time() - ts:.1f} seconds to complete scraping {len(results)} pages.'
         )
     else:
-        results = [
-            link.model_dump_json() for link in _extract_links(_raw(_instance, query))
-        ]
+        results = [link.model_dump_json() for link in results]
 
     return results
 
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from pydantic import BaseModel
+
+from .. import config
+from .disk_cache import atomic_write, evict_lru, file_hash, touch
+from .pdf_extract import PageContent, iter_pdf_pages
+
+
+class ParsedPDF(BaseModel):
+    sha256: str  # of the file content
+    images_path: str = ''
+    pages: list[PageContent]
+
+    @property
+    def key(self) -> str:
+        return cache_key(self.sha256, self.images_path)
+
+    def images_exist(self) -> bool:
+        return all(
+            os.path.exists(image) for page in self.pages for image in page.images
+        )
+
+
+def cache_key(sha256: str, images_path: str) -> str:
+    """Pages hold paths of their images: the same content read into another directory is another entry"""
+    return hashlib.sha256(
+        f'{sha256}\0{os.path.abspath(images_path)}'.encode()
+    ).hexdigest()
+
+
+class PDFCache:
+    """
+    Parsed pdfs keyed by file content hash and images directory.
+    Kept in memory up to config.PDF_CACHE_MAX_BYTES and, if config.PDF_CACHE_DIR is set,
+    on disk with the same limit. Least recently used documents are evicted first.
+    """
+
+    def __init__(self):
+        self._memory: OrderedDict[str, tuple[ParsedPDF, int]] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[ParsedPDF]:
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                return cached[0]
+
+        path = self._disk_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path) as f:
+                data = f.read()
+            parsed = ParsedPDF.model_validate_json(data)
+        except (OSError, ValueError):
+            return None
+        touch(path)
+        self._remember(parsed, len(data))
+        return parsed
+
+    def put(self, parsed: ParsedPDF) -> None:
+        data = parsed.model_dump_json()
+        self._remember(parsed, len(data))
+
+        path = self._disk_path(parsed.key)
+        if path is not None:
+            atomic_write(path, data)
+            with self._lock:
+                evict_lru(config.PDF_CACHE_DIR, config.PDF_CACHE_MAX_BYTES)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def _remember(self, parsed: ParsedPDF, size: int) -> None:
+        with self._lock:
+            previous = self._memory.pop(parsed.key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[1]
+            self._memory[parsed.key] = (parsed, size)
+            self._memory_bytes += size
+            while (
+                self._memory_bytes > config.PDF_CACHE_MAX_BYTES
+                and len(self._memory) > 1
+            ):
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+
+    @staticmethod
+    def _disk_path(key: str) -> Optional[str]:
+        if config.PDF_CACHE_DIR is None:
+            return None
+        return os.path.join(config.PDF_CACHE_DIR, f'{key}.json')
+
+
+pdf_cache = PDFCache()
+
+
+def read_pdf(path: str, images_path: str) -> list[PageContent]:
+    """
+    Extracted pages of the pdf, parsed only if this content was not read into images_path before
+    or its extracted images were removed since.
+    Images are named by the content hash, so pdfs sharing images_path do not overwrite each other's.
+    """
+    sha256 = file_hash(path)
+    parsed = pdf_cache.get(cache_key(sha256, images_path))
+    if parsed is None or not parsed.images_exist():
+        pages = iter_pdf_pages(path, images_path, image_prefix=sha256[:16])
+        parsed = ParsedPDF(
+            sha256=sha256, images_path=os.path.abspath(images_path), pages=list(pages)
+        )
+        pdf_cache.put(parsed)
+    return parsed.pages
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import accumulate
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from pydantic import BaseModel
+
+from .. import config
+
+if TYPE_CHECKING:
+    import pymupdf
+
+# (x0, y0, x1, y1, text, block_no, block_type) as returned by page.get_text('blocks')
+Block = tuple[float, float, float, float, str, int, int]
+
+
+class PageContent(BaseModel):
+    number: int
+    text: str
+    blocks: list[Block]
+    images: list[str]  # paths of saved images
+
+
+def _extract_page(
+    doc: pymupdf.Document,
+    number: int,
+    images_path: str,
+    image_n: int,
+    image_prefix: str,
+) -> PageContent:
+    import pymupdf
+
+    page = doc[number]
+    blocks = [tuple(block) for block in page.get_text('blocks')]
+    images = []
+    for image in page.get_images():
+        fn = os.path.join(images_path, f'{image_prefix}_{image_n}.png')
+        image_n += 1
+        pymupdf.Pixmap(doc, image[0]).save(fn)
+        images.append(fn)
+    return PageContent(
+        number=number,
+        text=''.join(block[4] for block in blocks),
+        blocks=blocks,
+        images=images,
+    )
+
+
+def _extract_range(
+    path: str, start: int, stop: int, images_path: str, image_n: int, image_prefix: str
+) -> list[PageContent]:
+    """Process pool worker: extracts pages [start, stop), numbering images from image_n"""
+    import pymupdf
+
+    pages = []
+    with pymupdf.open(path) as doc:
+        for number in range(start, stop):
+            page = _extract_page(doc, number, images_path, image_n, image_prefix)
+            image_n += len(page.images)
+            pages.append(page)
+    return pages
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_broken = (
+    False  # workers died once, e.g. on an unguarded entry script: no new pools
+)
+_pool_lock = threading.Lock()
+
+
+def _reruns_main() -> bool:
+    """Whether spawned workers would import (and so run) the entry script of this process"""
+    main = sys.modules.get('__main__')
+    return (
+        getattr(main, '__spec__', None) is not None
+        or getattr(main, '__file__', None) is not None
+    )
+
+
+def _workers() -> int:
+    if _pool_broken:
+        return 1
+    if config.PDF_WORKERS:
+        return config.PDF_WORKERS
+    if _reruns_main():
+        return 1
+    return os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Pool shared between calls, so that worker startup is paid once"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs tools in threads is not safe
+            _pool = ProcessPoolExecutor(
+                max_workers=_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool, _pool_broken
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+        _pool_broken = True
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_serial(
+    doc: pymupdf.Document, start: int, images_path: str, image_n: int, image_prefix: str
+) -> Iterator[PageContent]:
+    for number in range(start, doc.page_count):
+        page = _extract_page(doc, number, images_path, image_n, image_prefix)
+        image_n += len(page.images)
+        yield page
+
+
+def iter_pdf_pages(
+    path: str, images_path: str, image_prefix: str = 'im'
+) -> Iterator[PageContent]:
+    """
+    Yields pages of the pdf in order as soon as they are extracted, saving images to images_path
+    as {image_prefix}_{n}.png.
+    Documents of at least config.PDF_PARALLEL_MIN_PAGES pages are split into page ranges
+    extracted by a process pool. If the pool breaks, the rest of the pages, and later documents,
+    are extracted serially.
+    """
+    # pymupdf is loaded with the first pdf rather than with the tools
+    import pymupdf
+
+    os.makedirs(images_path, exist_ok=True)
+    with pymupdf.open(path) as doc:
+        n_pages = doc.page_count
+        if n_pages < config.PDF_PARALLEL_MIN_PAGES or _workers() == 1:
+            yield from _iter_serial(doc, 0, images_path, 0, image_prefix)
+            return
+
+        # image names are numbered through the document, so each range needs its offset
+        image_offsets = [0] + list(
+            accumulate(len(doc.get_page_images(number)) for number in range(n_pages))
+        )
+
+    # several ranges per worker to balance load and yield early pages sooner
+    range_size = max(-(-n_pages // (_workers() * 4)), 4)
+    pool = _get_pool()
+    futures = []
+    next_page = 0
+    try:
+        for start in range(0, n_pages, range_size):
+            stop = min(start + range_size, n_pages)
+            futures.append(
+                pool.submit(
+                    _extract_range,
+                    path,
+                    start,
+                    stop,
+                    images_path,
+                    image_offsets[start],
+                    image_prefix,
+                )
+            )
+        for future in futures:
+            for page in future.result():
+                yield page
+                next_page = page.number + 1
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        with pymupdf.open(path) as doc:
+            yield from _iter_serial(
+                doc, next_page, images_path, image_offsets[next_page], image_prefix
+            )
+    finally:
+        for future in futures:
+            future.cancel()
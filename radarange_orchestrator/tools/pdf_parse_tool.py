@@ -1,29 +1,19 @@
 import os
 import time
 
-import pymupdf
 from langchain_core.tools import StructuredTool
 
+from .pdf_cache import read_pdf
+
 
 def pdf_tool_handle(path: str) -> dict:
     print(f'Called pdf_read with path: {path}', flush=True)
     ts = time.time()
 
-    doc = pymupdf.open(path)
-    text = ''
-    for page in doc:  # iterate the document pages
-        for block in page.get_text('blocks'):
-            text += block[4]
-    images = []
-    image_n = 0
     images_path = os.path.join(os.path.dirname(path), 'images')
-    os.makedirs(images_path, exist_ok=True)
-    for page in doc:
-        for image in page.get_images():
-            fn = os.path.join(images_path, f'im_{image_n}.png')
-            image_n += 1
-            pymupdf.Pixmap(doc, image[0]).save(fn)
-            images.append(fn)
+    pages = read_pdf(path, images_path)
+    text = ''.join(page.text for page in pages)
+    images = [image for page in pages for image in page.images]
 
     result = {'content': text, 'images': images}
 
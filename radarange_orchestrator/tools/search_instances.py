@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar('T')
+
+
+class InstanceConfig(BaseModel):
+    window: int = 20  # recent requests kept per instance
+    max_error_rate: float = 0.5  # instances failing more often are skipped
+    min_samples: int = 3  # requests before error rate and p90 are trusted
+    cooldown: float = 60.0  # seconds before a skipped instance is tried again
+    default_latency: float = 2.0  # assumed latency of instances without history
+    min_hedge_delay: float = 0.3  # never hedge earlier than this
+
+
+class InstanceStats:
+    """Rolling latency and outcome history of one search instance"""
+
+    url: str
+    last_failure: float = 0.0
+
+    def __init__(self, url: str, window: int):
+        self.url = url
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+
+    @property
+    def error_rate(self) -> float:
+        if len(self.outcomes) == 0:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def latency(self, quantile: float, default: float) -> float:
+        if len(self.latencies) == 0:
+            return default
+        ordered = sorted(self.latencies)
+        return ordered[min(int(quantile * len(ordered)), len(ordered) - 1)]
+
+    def __repr__(self) -> str:
+        return (
+            f'InstanceStats({self.url}, p50={self.latency(0.5, float("nan")):.2f}s, '
+            f'errors={self.error_rate:.0%})'
+        )
+
+
+class InstanceManager:
+    """
+    Routes requests across mirrors of the same service.
+
+    Each request goes to the healthy instance with the lowest median latency, weighted by error rate.
+    If it does not answer within its p90 latency, the same request is hedged to the next
+    instance and the first successful answer wins. Late answers still update the statistics.
+    When both fail, remaining instances are tried one by one.
+    """
+
+    def __init__(self, instances: list[str], config: Optional[InstanceConfig] = None):
+        if len(instances) == 0:
+            raise ValueError('InstanceManager requires at least one instance')
+
+        self.config = config if config is not None else InstanceConfig()
+        self.stats = [InstanceStats(url, self.config.window) for url in instances]
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * len(instances), thread_name_prefix='search-instance'
+        )
+
+    def ranked(self) -> list[InstanceStats]:
+        """Instances from the most to the least preferred"""
+        now = time.time()
+        with self._lock:
+            for stats in self.stats:
+                # give instances skipped for long enough a fresh start
+                if (
+                    self._failing(stats)
+                    and now - stats.last_failure >= self.config.cooldown
+                ):
+                    stats.outcomes.clear()
+                    stats.latencies.clear()
+            # median latency scaled by expected attempts until success
+            return sorted(
+                self.stats,
+                key=lambda s: (
+                    self._failing(s),
+                    s.latency(0.5, self.config.default_latency)
+                    / max(1.0 - s.error_rate, 0.1),
+                ),
+            )
+
+    def request(self, fn: Callable[[str], T]) -> T:
+        """Calls fn(instance_url), hedging and failing over as described in the class doc"""
+        ranked = self.ranked()
+        primary = ranked[0]
+        futures: dict[Future, InstanceStats] = {self._submit(fn, primary): primary}
+
+        hedge_delay = max(
+            primary.latency(0.9, self.config.default_latency)
+            if len(primary.latencies) >= self.config.min_samples
+            else self.config.default_latency,
+            self.config.min_hedge_delay,
+        )
+        done, _ = wait(futures, timeout=hedge_delay)
+        if len(done) == 0 and len(ranked) > 1:
+            futures[self._submit(fn, ranked[1])] = ranked[1]
+
+        last_error: Optional[Exception] = None
+        pending = set(futures)
+        while len(pending) > 0:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+
+        for stats in ranked[len(futures) :]:
+            try:
+                return self._submit(fn, stats).result()
+            except Exception as e:
+                last_error = e
+        raise RuntimeError(f'All instances failed: {self.stats}') from last_error
+
+    def _submit(self, fn: Callable[[str], T], stats: InstanceStats) -> Future:
+        return self._executor.submit(self._timed, fn, stats)
+
+    def _timed(self, fn: Callable[[str], T], stats: InstanceStats) -> T:
+        ts = time.time()
+        try:
+            result = fn(stats.url)
+        except Exception:
+            with self._lock:
+                stats.outcomes.append(False)
+                stats.last_failure = time.time()
+            raise
+        with self._lock:
+            stats.outcomes.append(True)
+            stats.latencies.append(time.time() - ts)
+        return result
+
+    def _failing(self, stats: InstanceStats) -> bool:
+        return (
+            len(stats.outcomes) >= self.config.min_samples
+            and stats.error_rate > self.config.max_error_rate
+        )
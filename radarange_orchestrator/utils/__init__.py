@@ -1,9 +1,12 @@
 from .display import display_thoughts, show_final_answer, display_message
 from .find_model import find_model
+from .model_registry import ModelInfo, model_registry
 
 __all__ = [
     'display_thoughts',
     'show_final_answer',
     'display_message',
-    'find_model'
+    'find_model',
+    'ModelInfo',
+    'model_registry',
 ]
\ No newline at end of file
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Coroutine, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+_exhausted = object()
+
+
+async def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    Adapts blocking iterator to async one.
+    Each next() call runs in a worker thread, so event loop is never blocked.
+    On cancellation the running next() is awaited before the iterator is closed:
+    a generator cannot be closed while it is executing.
+    """
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            pending = asyncio.ensure_future(
+                asyncio.to_thread(next, iterator, _exhausted)
+            )
+            # shielded, so that cancelling the consumer does not abandon the running next()
+            item = await asyncio.shield(pending)
+            if item is _exhausted:
+                break
+            yield item
+    finally:
+        if pending is not None and not pending.done():
+            await asyncio.wait([pending])
+            if not pending.cancelled():
+                pending.exception()  # retrieved, the consumer is gone
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await asyncio.to_thread(close)
+
+
+class LoopThread:
+    """
+    Event loop running in a daemon thread.
+    Hosts clients bound to the loop they were opened in, so that callers from any loop,
+    e.g. consecutive asyncio.run() calls, share one client instead of opening one per loop.
+    """
+
+    def __init__(self, name: str):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name=name, daemon=True
+        )
+        self._thread.start()
+
+    async def run(self, coro: Coroutine[object, object, T]) -> T:
+        """Awaits coro running in the loop thread. Cancelling the caller cancels it too"""
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coro, self.loop)
+        )
+
+    def run_sync(self, coro: Coroutine[object, object, T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def iterate(self, iterator: AsyncIterator[T]) -> AsyncIterator[T]:
+        """Adapts an async iterator living in the loop thread to the caller loop"""
+
+        async def next_item() -> T:
+            return await iterator.__anext__()
+
+        try:
+            while True:
+                try:
+                    item = await self.run(next_item())
+                except StopAsyncIteration:
+                    break
+                yield item
+        finally:
+            aclose = getattr(iterator, 'aclose', None)
+            if aclose is not None:
+                await self.run(aclose())
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
@@ -1,10 +1,19 @@
-from IPython.display import HTML, Markdown, display
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 
 from ..chat.messages import AnyCompleteMessage
 from .extract_tool_calls import remove_think_block
 
+if TYPE_CHECKING:
+    from IPython.display import HTML
+
+# IPython is imported by each helper: it takes longer to load than the rest of the package
+
 
 def display_thoughts(text: str):
+    from IPython.display import HTML, display
+
     prefix = """
     <style>
         think {
@@ -31,6 +40,8 @@ def display_thoughts(text: str):
 
 
 def show_final_answer(messages: list[dict], hide_reasoning: bool = True):
+    from IPython.display import Markdown, display
+
     last_message = messages[-1]['choices'][0]['message']['content']
     text = remove_think_block(last_message)
     display(Markdown(text))
@@ -41,6 +52,8 @@ def display_message(
     skip_reasoning: bool = False,
     truncate_tool_response: bool = True,
 ) -> HTML:
+    from IPython.display import HTML
+
     background = '#1e1e1e'
     message.type
     if message.type == 'tool':
@@ -1,5 +1,6 @@
 import json
 import re
+from typing import Literal, Optional
 
 from ..tools import ToolCall, InvalidToolCall
 
@@ -10,6 +11,41 @@ def remove_think_block(text: str) -> str:
 
 tool_call_counter: int = 0
 
+TOOL_CALL_BEGIN, TOOL_CALL_END = '<tool_call>', '</tool_call>'
+THINK_BEGIN, THINK_END = '<think>', '</think>'
+
+
+def _invalid_tool_call(number: int, name: str = 'invalid') -> InvalidToolCall:
+    return InvalidToolCall(name=name, args='', id=f'invalid_{number}')
+
+
+def parse_tool_call(tool_block: str, number: Optional[int] = None) -> ToolCall | InvalidToolCall:
+    """
+    Parses json content between <tool_call> tags.
+    The id is numbered by the global counter, which makes it unique, unless number is given
+    """
+    global tool_call_counter
+    if number is None:
+        tool_call_counter += 1
+        number = tool_call_counter
+
+    try:
+        # Parse the JSON content of the tool call
+        tool_data = json.loads(tool_block)
+    except json.JSONDecodeError:
+        return _invalid_tool_call(number)
+
+    tool_name = tool_data.get('name') if isinstance(tool_data, dict) else None
+    if not tool_name:
+        return _invalid_tool_call(number)
+
+    return ToolCall(
+        name=tool_name,
+        args=tool_data.get('arguments', {}),
+        id=f'{tool_name}_{number}',
+        type='tool_call',
+    )
+
 
 def extract_tool_calls(
     text: str, skip_reasoning: bool = True
@@ -18,44 +54,91 @@ def extract_tool_calls(
     Extracts a sequence of ToolCall from text.
     Optionally skips <think></think> block from parsing
     """
-    global tool_call_counter
-
-    def invalid_tool_call(
-        tool_call_counter: int, name: str = 'invalid'
-    ) -> InvalidToolCall:
-        return InvalidToolCall(name=name, args='', id=f'invalid_{tool_call_counter}')
-
     # If we need to skip <think> blocks, remove them from the text
     if skip_reasoning:
         # This will remove everything from <think> to </think>, including newlines.
         text = remove_think_block(text)
 
-    tag_begin, tag_end = '<tool_call>', '</tool_call>'
-    results: list[ToolCall | InvalidToolCall] = []
-    for tool_block in re.findall(
-        rf'{re.escape(tag_begin)}(.*?){re.escape(tag_end)}', text, re.DOTALL
-    ):
-        tool_call_counter += 1
+    return [
+        parse_tool_call(tool_block)
+        for tool_block in re.findall(
+            rf'{re.escape(TOOL_CALL_BEGIN)}(.*?){re.escape(TOOL_CALL_END)}', text, re.DOTALL
+        )
+    ]
+
+
+class ToolCallStreamParser:
+    """
+    Incremental counterpart of extract_tool_calls for streamed text.
+
+    feed() takes text chunks as they are generated and returns tool calls closed by the chunk,
+    so they can be dispatched before generation ends. Tags split between chunks are handled.
+    after_tool_calls turns True once anything but whitespace or another tool call follows
+    a closed tool call: generation can be stopped there.
+    Ids of the calls are numbered within the stream and do not advance the global counter:
+    unique ids are assigned once the complete message is parsed.
+    """
+
+    def __init__(self, skip_reasoning: bool = True):
+        self.skip_reasoning = skip_reasoning
+        self.calls: list[ToolCall | InvalidToolCall] = []
+        self.after_tool_calls = False
+        self._state: Literal['text', 'think', 'call'] = 'text'
+        self._pending = ''  # text not scanned yet, may end with a partial tag
+        self._block = ''  # content of the current tool call
+
+    def feed(self, text: str) -> list[ToolCall | InvalidToolCall]:
+        self._pending += text
+        closed: list[ToolCall | InvalidToolCall] = []
+        while True:
+            if self._state == 'text':
+                tags = [TOOL_CALL_BEGIN] + ([THINK_BEGIN] if self.skip_reasoning else [])
+                index, tag = self._find_first(tags)
+                if tag is None:
+                    self._consume_text(self._hold_back(tags))
+                    return closed
+                self._consume_text(index)
+                # reasoning after a tool call counts as text that follows it
+                if tag == THINK_BEGIN and len(self.calls) > 0:
+                    self.after_tool_calls = True
+                self._pending = self._pending[len(tag) :]
+                self._state = 'call' if tag == TOOL_CALL_BEGIN else 'think'
+
+            elif self._state == 'think':
+                index = self._pending.find(THINK_END)
+                if index < 0:
+                    self._pending = self._pending[self._hold_back([THINK_END]) :]
+                    return closed
+                self._pending = self._pending[index + len(THINK_END) :]
+                self._state = 'text'
+
+            else:
+                index = self._pending.find(TOOL_CALL_END)
+                if index < 0:
+                    keep = self._hold_back([TOOL_CALL_END])
+                    self._block += self._pending[:keep]
+                    self._pending = self._pending[keep:]
+                    return closed
+                call = parse_tool_call(self._block + self._pending[:index], len(self.calls) + 1)
+                self.calls.append(call)
+                closed.append(call)
+                self._block = ''
+                self._pending = self._pending[index + len(TOOL_CALL_END) :]
+                self._state = 'text'
+
+    def _find_first(self, tags: list[str]) -> tuple[int, Optional[str]]:
+        found = [(self._pending.find(tag), tag) for tag in tags]
+        found = [(index, tag) for index, tag in found if index >= 0]
+        return min(found) if found else (-1, None)
+
+    def _hold_back(self, tags: list[str]) -> int:
+        """Index from which pending text may be the beginning of one of tags"""
+        for start in range(max(len(self._pending) - max(map(len, tags)) + 1, 0), len(self._pending)):
+            if any(tag.startswith(self._pending[start:]) for tag in tags):
+                return start
+        return len(self._pending)
 
-        try:
-            # Parse the JSON content of the tool call
-            tool_data = json.loads(tool_block)
-        except json.JSONDecodeError:
-            results.append(invalid_tool_call(tool_call_counter))
-        else:
-            tool_name = tool_data.get('name')
-            args = tool_data.get('arguments', {})
-            if not tool_name:
-                results.append(invalid_tool_call(tool_call_counter))
-                continue
-
-            results.append(
-                ToolCall(
-                    name=tool_name,
-                    args=args,
-                    id=f'{tool_name}_{tool_call_counter}',
-                    type='tool_call',
-                )
-            )
-
-    return results
+    def _consume_text(self, end: int) -> None:
+        if len(self.calls) > 0 and self._pending[:end].strip():
+            self.after_tool_calls = True
+        self._pending = self._pending[end:]
@@ -1,18 +1,18 @@
 import os
 from glob import glob
 
+from .model_registry import model_registry
+
 
 def find_model(path: str) -> list[str] | str:
     """
-    Makes absolute path from a model filename
+    Makes absolute path from a model filename or glob pattern, resolved in config.MODELS_DIR.
+    Absolute paths are globbed as they are
     """
-    BASE_DIR = os.path.dirname(
-        os.path.abspath('/root/radarange-orchestrator/utils/find_model.py')
-    )
-    # Construct the path to your model file
-    model_candidate = os.path.join(BASE_DIR, '../models', path)
-    models = glob(model_candidate)
-    models = list(filter(lambda e: e.endswith('.gguf'), models))
+    if os.path.isabs(path):
+        models = [model for model in glob(path) if model.endswith('.gguf')]
+    else:
+        models = [model.path for model in model_registry.find(path)]
 
     if len(models) == 1:
         return models[0]
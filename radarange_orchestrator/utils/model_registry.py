@@ -0,0 +1,334 @@
+import mmap
+import os
+import struct
+import threading
+from fnmatch import fnmatch
+from typing import Any, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from .. import config
+from ..tools.disk_cache import atomic_write
+
+GGUF_MAGIC = b'GGUF'
+
+# Scanned models are remembered here, inside the models directory, for the next process
+_INDEX_NAME = '.gguf_index.json'
+_INDEX_VERSION = 2  # indexes of another version are scanned anew
+
+# GGUF metadata value types
+_STRING = 8
+_ARRAY = 9
+_SCALAR_FORMATS = {
+    0: '<B',
+    1: '<b',
+    2: '<H',
+    3: '<h',
+    4: '<I',
+    5: '<i',
+    6: '<f',
+    7: '<?',
+    10: '<Q',
+    11: '<q',
+    12: '<d',
+}
+
+# Longer arrays (tokenizer vocabulary, merges, scores) are skipped rather than kept in metadata
+_MAX_ARRAY_ITEMS = 64
+
+# general.file_type (llama_ftype) names
+_FILE_TYPES = {
+    0: 'F32',
+    1: 'F16',
+    2: 'Q4_0',
+    3: 'Q4_1',
+    7: 'Q8_0',
+    8: 'Q5_0',
+    9: 'Q5_1',
+    10: 'Q2_K',
+    11: 'Q3_K_S',
+    12: 'Q3_K_M',
+    13: 'Q3_K_L',
+    14: 'Q4_K_S',
+    15: 'Q4_K_M',
+    16: 'Q5_K_S',
+    17: 'Q5_K_M',
+    18: 'Q6_K',
+    19: 'IQ2_XXS',
+    20: 'IQ2_XS',
+    21: 'Q2_K_S',
+    22: 'IQ3_XS',
+    23: 'IQ3_XXS',
+    24: 'IQ1_S',
+    25: 'IQ4_NL',
+    26: 'IQ3_S',
+    27: 'IQ3_M',
+    28: 'IQ2_S',
+    29: 'IQ2_M',
+    30: 'IQ4_XS',
+    31: 'IQ1_M',
+    32: 'BF16',
+    36: 'TQ1_0',
+    37: 'TQ2_0',
+}
+
+
+class _SkippedArray(int):
+    """Length of an array that was too long to keep"""
+
+
+class _Reader:
+    """Sequential little-endian reader over the mapped header"""
+
+    def __init__(self, buffer: mmap.mmap):
+        self.buffer = buffer
+        self.offset = 0
+
+    def scalar(self, fmt: str) -> Any:
+        (value,) = struct.unpack_from(fmt, self.buffer, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return value
+
+    def string(self) -> str:
+        length = self.scalar('<Q')
+        value = self.buffer[self.offset : self.offset + length]
+        self.offset += length
+        return value.decode('utf-8', errors='replace')
+
+    def value(self, value_type: int) -> Any:
+        if value_type == _STRING:
+            return self.string()
+        if value_type == _ARRAY:
+            item_type = self.scalar('<I')
+            count = self.scalar('<Q')
+            if count > _MAX_ARRAY_ITEMS:
+                self.skip_array(item_type, count)
+                return _SkippedArray(count)
+            return [self.value(item_type) for _ in range(count)]
+        return self.scalar(_SCALAR_FORMATS[value_type])
+
+    def skip_array(self, item_type: int, count: int) -> None:
+        if item_type == _STRING:
+            # only the lengths are read, strings themselves are never decoded
+            for _ in range(count):
+                self.offset += 8 + struct.unpack_from('<Q', self.buffer, self.offset)[0]
+        elif item_type == _ARRAY:
+            for _ in range(count):
+                self.skip_array(self.scalar('<I'), self.scalar('<Q'))
+        else:
+            self.offset += struct.calcsize(_SCALAR_FORMATS[item_type]) * count
+
+
+def read_gguf_header(path: str) -> tuple[dict[str, Any], dict[str, int], int]:
+    """
+    Metadata, lengths of arrays left out of metadata, and parameter count of a GGUF file,
+    read from its header through mmap.
+    Tensor data is never touched. Raises ValueError for files that are not GGUF v2+.
+    """
+    with open(path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            raise ValueError(f'{path} is not a GGUF file')
+        with buffer:
+            if buffer[:4] != GGUF_MAGIC:
+                raise ValueError(f'{path} is not a GGUF file')
+            reader = _Reader(buffer)
+            reader.offset = 4
+            version = reader.scalar('<I')
+            if version < 2:
+                raise ValueError(f'{path}: GGUF version {version} is not supported')
+            try:
+                n_tensors = reader.scalar('<Q')
+                n_metadata = reader.scalar('<Q')
+
+                metadata = {}
+                skipped_arrays = {}
+                for _ in range(n_metadata):
+                    key = reader.string()
+                    value = reader.value(reader.scalar('<I'))
+                    if isinstance(value, _SkippedArray):
+                        skipped_arrays[key] = int(value)
+                    else:
+                        metadata[key] = value
+
+                parameter_count = 0
+                for _ in range(n_tensors):
+                    reader.string()  # tensor name
+                    n_dims = reader.scalar('<I')
+                    elements = 1
+                    for _ in range(n_dims):
+                        elements *= reader.scalar('<Q')
+                    reader.offset += 4 + 8  # tensor type and data offset
+                    parameter_count += elements
+            except (struct.error, KeyError) as e:
+                raise ValueError(f'{path}: malformed GGUF header') from e
+    return metadata, skipped_arrays, parameter_count
+
+
+class ModelInfo(BaseModel):
+    path: str
+    size: int
+    mtime_ns: int
+    name: Optional[str] = None
+    architecture: Optional[str] = None
+    parameter_count: int = 0
+    quantization: Optional[str] = None
+    context_length: Optional[int] = None  # native context of the model
+    vocab_size: Optional[int] = None
+    chat_template: Optional[str] = None
+    metadata: dict[str, Any] = {}  # all header fields except long arrays
+
+    @property
+    def filename(self) -> str:
+        return os.path.basename(self.path)
+
+
+def read_model_info(path: str) -> ModelInfo:
+    stat = os.stat(path)
+    metadata, skipped_arrays, parameter_count = read_gguf_header(path)
+    architecture = metadata.get('general.architecture')
+    tokens = metadata.get('tokenizer.ggml.tokens')
+    file_type = metadata.get('general.file_type')
+    return ModelInfo(
+        path=path,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        name=metadata.get('general.name'),
+        architecture=architecture,
+        parameter_count=parameter_count,
+        quantization=_FILE_TYPES.get(
+            file_type, None if file_type is None else str(file_type)
+        ),
+        context_length=metadata.get(f'{architecture}.context_length'),
+        vocab_size=metadata.get(
+            f'{architecture}.vocab_size',
+            len(tokens)
+            if tokens is not None
+            else skipped_arrays.get('tokenizer.ggml.tokens'),
+        ),
+        chat_template=metadata.get('tokenizer.chat_template'),
+        metadata=metadata,
+    )
+
+
+class _Index(BaseModel):
+    version: int = _INDEX_VERSION
+    models: dict[str, ModelInfo] = {}  # by path relative to the models directory
+
+
+class ModelRegistry:
+    """
+    GGUF models found under a directory (config.MODELS_DIR by default), with header metadata.
+    Each lookup re-lists the directory, but only files with a changed mtime or size are read again.
+    The scan is saved to an index in the directory, so that a new process starts from it.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+        self._index: Optional[_Index] = None
+        self._index_directory: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        return os.path.abspath(self._directory or config.MODELS_DIR)
+
+    def models(self) -> list[ModelInfo]:
+        """Models sorted by path"""
+        index = self._refresh()
+        return [index.models[key] for key in sorted(index.models)]
+
+    def find(self, pattern: str) -> list[ModelInfo]:
+        """
+        Models matching a glob pattern over paths relative to the directory.
+        Patterns without '/' match file names in any subdirectory.
+        """
+        index = self._refresh()
+        return [
+            index.models[key]
+            for key in sorted(index.models)
+            if fnmatch(key if '/' in pattern else os.path.basename(key), pattern)
+        ]
+
+    def info(self, path: str) -> Optional[ModelInfo]:
+        """Metadata of the model at path, which does not need to be inside the directory"""
+        path = os.path.abspath(path)
+        key = os.path.relpath(path, self.directory)
+        if not key.startswith('..'):
+            return self._refresh().models.get(key)
+        try:
+            return read_model_info(path)
+        except (OSError, ValueError):
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index = None
+
+    def _refresh(self) -> _Index:
+        directory = self.directory
+        with self._lock:
+            if self._index is None or self._index_directory != directory:
+                self._index = self._load_index(directory)
+                self._index_directory = directory
+
+            models = {}
+            changed = False
+            for key, stat in self._scan(directory):
+                cached = self._index.models.get(key)
+                if (
+                    cached is not None
+                    and cached.mtime_ns == stat.st_mtime_ns
+                    and cached.size == stat.st_size
+                ):
+                    models[key] = cached
+                    continue
+                try:
+                    models[key] = read_model_info(os.path.join(directory, key))
+                except (OSError, ValueError):
+                    continue  # not a model, or still being written
+                changed = True
+
+            if changed or len(models) != len(self._index.models):
+                self._index = _Index(models=models)
+                self._save_index(directory, self._index)
+            return self._index
+
+    @staticmethod
+    def _scan(directory: str) -> list[tuple[str, os.stat_result]]:
+        found = []
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for filename in files:
+                if filename.endswith('.gguf'):
+                    path = os.path.join(root, filename)
+                    try:
+                        found.append((os.path.relpath(path, directory), os.stat(path)))
+                    except OSError:
+                        continue
+        return found
+
+    @staticmethod
+    def _load_index(directory: str) -> _Index:
+        try:
+            with open(os.path.join(directory, _INDEX_NAME)) as f:
+                index = _Index.model_validate_json(f.read())
+        except (OSError, ValidationError, ValueError):
+            return _Index()
+        if index.version != _INDEX_VERSION:
+            return _Index()
+        # paths are stored relative, so the index stays valid if the directory moves
+        for key, model in index.models.items():
+            model.path = os.path.join(directory, key)
+        return index
+
+    @staticmethod
+    def _save_index(directory: str, index: _Index) -> None:
+        try:
+            atomic_write(os.path.join(directory, _INDEX_NAME), index.model_dump_json())
+        except OSError:
+            pass  # read-only directory: the scan is only kept in memory
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,105 @@
+import weakref
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+
+from ..chat.messages import (
+    AIMessage,
+    AnyCompleteMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+
+# id(message) -> model key -> (counted content, tokens). Kept beside the messages, so that cached
+# counts never show up in message data; entries are dropped when their message is collected
+_token_counts: dict[int, dict[str, tuple[str, int]]] = {}
+
+_PROBE_TEXT = 'x'
+
+_PROBE_MESSAGES: dict[str, AnyCompleteMessage] = {
+    'system': SystemMessage(content=_PROBE_TEXT),
+    'human': HumanMessage(content=_PROBE_TEXT),
+    'ai': AIMessage(content=_PROBE_TEXT),
+    'tool': ToolMessage(content=_PROBE_TEXT, tool_call_id='probe'),
+}
+
+
+class TemplateOverhead(BaseModel):
+    """Tokens added by a chat template on top of message contents"""
+
+    fixed: int = 0  # per prompt: bos, generation prompt, etc.
+    per_message: dict[str, int] = {}  # by message type: role headers, separators
+
+
+def measure_template_overhead(
+    render: Callable[[list[AnyCompleteMessage]], str],
+    count_text: Callable[[str], int],
+) -> TemplateOverhead:
+    """
+    Measures template overhead by rendering probe chats.
+    Roles that the template refuses to render alone are assumed to have no overhead.
+    """
+    overhead = TemplateOverhead()
+    try:
+        overhead.fixed = count_text(render([]))
+    except Exception:
+        pass
+
+    probe_tokens = count_text(_PROBE_TEXT)
+    for message_type, message in _PROBE_MESSAGES.items():
+        try:
+            rendered = count_text(render([message]))
+        except Exception:
+            continue
+        overhead.per_message[message_type] = max(
+            rendered - probe_tokens - overhead.fixed, 0
+        )
+    return overhead
+
+
+def message_tokens(
+    message: AnyCompleteMessage, model_key: str, count_text: Callable[[str], int]
+) -> int:
+    """
+    Number of tokens in message content.
+    Cached per message and model, recomputed only when the content changes.
+    """
+    content = (
+        message.content if isinstance(message.content, str) else str(message.content)
+    )
+
+    counts = _counts_of(message)
+    cached: Optional[tuple[str, int]] = counts.get(model_key)
+    if cached is not None and (cached[0] is content or cached[0] == content):
+        return cached[1]
+
+    n_tokens = count_text(content) if content else 0
+    counts[model_key] = (content, n_tokens)
+    return n_tokens
+
+
+def _counts_of(message: AnyCompleteMessage) -> dict[str, tuple[str, int]]:
+    key = id(message)
+    counts = _token_counts.get(key)
+    if counts is None:
+        counts = _token_counts.setdefault(key, {})
+        if len(counts) == 0:
+            # messages are not hashable, so entries are keyed by id until the message is collected.
+            # A second finalizer from a racing thread is harmless
+            weakref.finalize(message, _token_counts.pop, key, None)
+    return counts
+
+
+def count_chat_tokens(
+    messages: list[AnyCompleteMessage],
+    model_key: str,
+    count_text: Callable[[str], int],
+    overhead: TemplateOverhead,
+) -> int:
+    """Number of prompt tokens for messages, including chat template overhead"""
+    return overhead.fixed + sum(
+        message_tokens(message, model_key, count_text)
+        + overhead.per_message.get(message.type, 0)
+        for message in messages
+    )
@@ -0,0 +1,190 @@
+import json
+import threading
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel
+
+from ..chat.messages import ToolMessage
+
+# Key in ToolMessage.response_metadata describing how much of the tool output was cut
+TRUNCATION_KEY = 'truncation'
+
+# Shrink factor for another trimming attempt when the first one still exceeds the budget
+_RETRY_SHRINK = 0.8
+_MAX_ATTEMPTS = 4
+
+
+class ToolBudget(BaseModel):
+    """Token limits for tool outputs before they enter the chat"""
+
+    per_call: Optional[int] = None  # limit of a single tool output
+    per_tool: dict[str, int] = {}  # per-tool overrides of per_call
+    per_round: Optional[int] = None  # limit of all outputs of one round together
+    head_ratio: float = (
+        0.7  # share of kept tokens taken from the beginning, the rest from the end
+    )
+
+    def call_limit(self, tool_name: str) -> Optional[int]:
+        return self.per_tool.get(tool_name, self.per_call)
+
+
+def _marker(cut_tokens: int) -> str:
+    return f'\n\n[... {cut_tokens} tokens cut ...]\n\n'
+
+
+def trim_text(
+    text: str,
+    max_tokens: int,
+    count_tokens: Callable[[str], int],
+    head_ratio: float = 0.7,
+    n_tokens: Optional[int] = None,
+) -> str:
+    """
+    Trims text to max_tokens of the model tokenizer, keeping its head and tail around a cut marker.
+    n_tokens is the token count of text, if already known.
+    """
+    if n_tokens is None:
+        n_tokens = count_tokens(text)
+    if n_tokens <= max_tokens:
+        return text
+
+    chars_per_token = len(text) / max(n_tokens, 1)
+    target = max_tokens
+    trimmed = _marker(n_tokens)
+    for _ in range(_MAX_ATTEMPTS):
+        if target <= 0:
+            break
+        keep_chars = int(target * chars_per_token)
+        head = int(keep_chars * head_ratio)
+        tail = keep_chars - head
+        trimmed = (
+            text[:head]
+            + _marker(n_tokens - target)
+            + (text[-tail:] if tail > 0 else '')
+        )
+        if count_tokens(trimmed) <= max_tokens:
+            return trimmed
+        target = int(target * _RETRY_SHRINK)
+    return trimmed
+
+
+def fair_shares(sizes: list[int], total: int) -> list[int]:
+    """Splits total between sizes so that no size gets more than it needs and the rest share equally"""
+    shares = [0] * len(sizes)
+    remaining = total
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for k, i in enumerate(order):
+        shares[i] = min(sizes[i], remaining // (len(sizes) - k))
+        remaining -= shares[i]
+    return shares
+
+
+def encode_output(output: Any) -> str:
+    """Tool output as text, JSON-encoded the way lmstudio and langchain put non-str outputs into messages"""
+    if isinstance(output, str):
+        return output
+    try:
+        return json.dumps(output, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return str(output)
+
+
+def record_truncation(
+    message: ToolMessage, original_tokens: int, kept_tokens: int
+) -> None:
+    message.response_metadata[TRUNCATION_KEY] = {
+        'original_tokens': original_tokens,
+        'kept_tokens': kept_tokens,
+        'cut_tokens': original_tokens - kept_tokens,
+    }
+
+
+def apply_tool_budget(
+    messages: list[ToolMessage],
+    tool_names: list[str],
+    budget: ToolBudget,
+    count_tokens: Callable[[str], int],
+) -> list[ToolMessage]:
+    """
+    Trims outputs of one round of tool calls in place: each to its per-call limit,
+    then all together to the per-round limit, shared fairly between them.
+    Trimmed messages get the original and kept token counts in response_metadata['truncation'].
+    """
+    texts = [encode_output(message.content) for message in messages]
+    sizes = [count_tokens(text) for text in texts]
+    limits = []
+    for name, size in zip(tool_names, sizes):
+        limit = budget.call_limit(name)
+        limits.append(size if limit is None else min(size, limit))
+    if budget.per_round is not None and sum(limits) > budget.per_round:
+        limits = fair_shares(limits, budget.per_round)
+
+    for message, text, size, limit in zip(messages, texts, sizes, limits):
+        if size > limit:
+            message.content = trim_text(
+                text, limit, count_tokens, budget.head_ratio, n_tokens=size
+            )
+            record_truncation(message, size, limit)
+    return messages
+
+
+class ToolBudgetTracker:
+    """
+    Enforces ToolBudget on tool outputs one by one, as they are produced,
+    for backends that run tools themselves. Per-round limit goes to calls in the order they finish.
+    A trimmed output is returned as str.
+
+    The backend reports each tool call request with expect() and each result with annotate().
+    Tools only see their arguments, so a trimmed output is matched to its request
+    by tool name and arguments, and to its ToolMessage by the tool_call_id of the request.
+    """
+
+    def __init__(self, budget: ToolBudget, count_tokens: Callable[[str], int]):
+        self.budget = budget
+        self.count_tokens = count_tokens
+        self.used = 0
+        # (tool name, arguments, original_tokens, kept_tokens) of trimmed outputs, in order
+        self.trimmed: list[tuple[str, Any, int, int]] = []
+        # tool_call_id -> (tool name, arguments) of requests not annotated yet
+        self.requests: dict[str, tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def new_round(self) -> None:
+        with self._lock:
+            self.used = 0
+
+    def limit(self, tool_name: str, arguments: Any, output: Any) -> Any:
+        text = encode_output(output)
+        size = self.count_tokens(text)
+        limit = self.budget.call_limit(tool_name)
+        kept = size if limit is None else min(size, limit)
+        with self._lock:
+            if self.budget.per_round is not None:
+                kept = min(kept, max(self.budget.per_round - self.used, 0))
+            self.used += kept
+        if kept == size:
+            return output
+
+        trimmed = trim_text(text, kept, self.count_tokens, self.budget.head_ratio, size)
+        with self._lock:
+            self.trimmed.append((tool_name, arguments, size, kept))
+        return trimmed
+
+    def expect(self, tool_call_id: str, tool_name: str, arguments: Any) -> None:
+        with self._lock:
+            self.requests[tool_call_id] = (tool_name, arguments)
+
+    def annotate(self, message: ToolMessage) -> None:
+        """Records truncation in metadata of the ToolMessage of a trimmed call"""
+        with self._lock:
+            request = self.requests.pop(message.tool_call_id, None)
+            if request is None:
+                return
+            for i, (tool_name, arguments, size, kept) in enumerate(self.trimmed):
+                # arguments compare by value: tools get them converted to their parameter types
+                if (tool_name, arguments) == request:
+                    del self.trimmed[i]
+                    break
+            else:
+                return
+        record_truncation(message, size, kept)
@@ -0,0 +1,102 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class _Call(Generic[T]):
+    def __init__(self, timeout: Optional[float]):
+        self.timeout = timeout
+        self.future: Future[T] = Future()
+        self.started_at: Optional[float] = None
+        self.slots: list[
+            threading.Semaphore
+        ] = []  # held while running, until released once
+
+    @property
+    def deadline(self) -> Optional[float]:
+        if self.timeout is None or self.started_at is None:
+            return None
+        return self.started_at + self.timeout
+
+
+class ToolCallRound(Generic[T]):
+    """
+    Tool calls of one round, each in its own daemon thread, so that a hung tool
+    never blocks interpreter exit.
+
+    At most `workers` calls run at once, and no more calls of a tool than its semaphore allows.
+    Timeouts count from the moment a call gets its slots and starts running, so time spent queued
+    is not held against it. A timed out call is abandoned: its thread keeps running until
+    the tool returns, but its slots go back to the calls still queued.
+    """
+
+    def __init__(self, workers: int, semaphores: dict[str, threading.Semaphore]):
+        self._workers = threading.Semaphore(max(workers, 1))
+        self._semaphores = semaphores
+        self._lock = threading.Lock()
+        self._progress = threading.Event()  # set whenever a call starts or finishes
+        self._calls: list[_Call[T]] = []
+
+    def submit(self, name: str, fn: Callable[[], T], timeout: Optional[float]) -> None:
+        call = _Call(timeout)
+        self._calls.append(call)
+        threading.Thread(
+            target=self._run, args=(call, name, fn), name='tool_call', daemon=True
+        ).start()
+
+    def _run(self, call: _Call[T], name: str, fn: Callable[[], T]) -> None:
+        slots = [self._workers]
+        if name in self._semaphores:
+            slots.append(self._semaphores[name])
+        for slot in slots:
+            slot.acquire()
+        with self._lock:
+            call.slots = slots
+            call.started_at = time.monotonic()
+        self._progress.set()
+        try:
+            call.future.set_result(fn())
+        except BaseException as e:
+            call.future.set_exception(e)
+        finally:
+            self._release(call)
+            self._progress.set()
+
+    def _release(self, call: _Call[T]) -> None:
+        with self._lock:
+            slots, call.slots = call.slots, []
+        for slot in slots:
+            slot.release()
+
+    def results(self, timed_out: Callable[[int], T]) -> list[T]:
+        """
+        Waits for every submitted call. Returns their results in submission order,
+        with timed_out(index) in place of calls abandoned after their timeout.
+        """
+        results: dict[int, T] = {}
+        while len(results) < len(self._calls):
+            self._progress.clear()
+            now = time.monotonic()
+            deadlines = []
+            for i, call in enumerate(self._calls):
+                if i in results:
+                    continue
+                if call.future.done():
+                    results[i] = call.future.result()
+                    continue
+                with self._lock:
+                    deadline = call.deadline
+                if deadline is None:
+                    continue
+                if now >= deadline:
+                    self._release(call)
+                    results[i] = timed_out(i)
+                else:
+                    deadlines.append(deadline)
+            if len(results) < len(self._calls):
+                wait = min(deadlines) - now if deadlines else None
+                self._progress.wait(wait)
+        return [results[i] for i in range(len(self._calls))]
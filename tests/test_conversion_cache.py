@@ -0,0 +1,39 @@
+from radarange_orchestrator.chat import AIMessage, Chat
+
+
+def convert(message) -> dict:
+    return {
+        'content': message.content,
+        'tool_calls': [dict(tc) for tc in getattr(message, 'tool_calls', [])],
+    }
+
+
+def make_chat() -> Chat:
+    chat = Chat()
+    chat.add_user_message('hi')
+    chat.add_message(
+        AIMessage(
+            content='',
+            tool_calls=[{'name': 'search', 'args': {'query': 'a'}, 'id': '1'}],
+        )
+    )
+    return chat
+
+
+def test_unchanged_messages_are_reused():
+    chat = make_chat()
+    first = chat.converted('test', convert)
+    assert all(a is b for a, b in zip(first, chat.converted('test', convert)))
+
+
+def test_edited_tool_call_args_are_converted_again():
+    chat = make_chat()
+    chat.converted('test', convert)
+
+    chat[-1].tool_calls[0]['args']['query'] = 'b'
+    assert chat.converted('test', convert)[-1]['tool_calls'][0]['args'] == {
+        'query': 'b'
+    }
+
+    chat[-1].tool_calls[0]['name'] = 'fetch'
+    assert chat.converted('test', convert)[-1]['tool_calls'][0]['name'] == 'fetch'
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import pytest
+import requests
+
+from radarange_orchestrator import config
+from radarange_orchestrator.tools import downloader
+
+SIZE = 64 * 1024
+
+
+class FileServer:
+    """Serves one file with ETag and byte ranges, recording the headers of every GET"""
+
+    def __init__(self, content: bytes, etag: str):
+        self.content = content
+        self.etag = etag
+        self.requests: list[dict] = []
+        # range requests starting here or later get a 404
+        self.fail_from: Optional[int] = None
+        self.change_after_head: Optional[tuple[bytes, str]] = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_HEAD(self) -> None:
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(server.content)))
+                self.send_header('ETag', server.etag)
+                self.send_header('Accept-Ranges', 'bytes')
+                self.end_headers()
+                if server.change_after_head is not None:
+                    server.content, server.etag = server.change_after_head
+
+            def do_GET(self) -> None:
+                server.requests.append(dict(self.headers))
+                match = re.fullmatch(
+                    r'bytes=(\d+)-(\d+)', self.headers.get('Range', '')
+                )
+                if_range = self.headers.get('If-Range')
+                if match is None or (if_range is not None and if_range != server.etag):
+                    body, status = server.content, 200
+                else:
+                    start, end = int(match[1]), int(match[2])
+                    if server.fail_from is not None and start >= server.fail_from:
+                        self.send_error(404)
+                        return
+                    body, status = server.content[start : end + 1], 206
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', server.etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/model.bin'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def ranges(self) -> list[str]:
+        return [request.get('Range') for request in self.requests]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(config, 'DOWNLOAD_SEGMENTS', 4)
+    monkeypatch.setattr(config, 'DOWNLOAD_MIN_SEGMENT_BYTES', 1024)
+    server = FileServer(os.urandom(SIZE), '"v1"')
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def test_segmented_download(server, tmp_path):
+    path = str(tmp_path / 'model.bin')
+    result = downloader.fetch_file(server.url, path)
+
+    with open(path, 'rb') as f:
+        assert f.read() == server.content
+    assert result.sha256 == sha256(server.content) and result.resumed_bytes == 0
+    quarter = SIZE // 4
+    assert sorted(server.ranges()) == sorted(
+        f'bytes={i * quarter}-{(i + 1) * quarter - 1}' for i in range(4)
+    )
+    assert all(request['If-Range'] == '"v1"' for request in server.requests)
+
+    # same remote version: nothing is fetched again
+    server.requests.clear()
+    assert downloader.fetch_file(server.url, path).skipped
+    assert server.requests == []
+
+
+def test_resume_after_failed_segment(server, tmp_path):
+    path = str(tmp_path / 'model.bin')
+    server.fail_from = SIZE // 2
+    with pytest.raises(requests.HTTPError):
+        downloader.fetch_file(server.url, path)
+    state = downloader._load_state(path)
+    assert not state.complete and state.downloaded_prefix() == SIZE // 2
+
+    server.fail_from = None
+    server.requests.clear()
+    result = downloader.fetch_file(server.url, path)
+
+    assert result.resumed_bytes == SIZE // 2
+    assert result.sha256 == sha256(server.content)
+    assert sorted(server.ranges()) == [
+        f'bytes={SIZE // 2}-{SIZE * 3 // 4 - 1}',
+        f'bytes={SIZE * 3 // 4}-{SIZE - 1}',
+    ]
+    with open(path, 'rb') as f:
+        assert f.read() == server.content
+
+
+def test_changed_resource_fails_if_range(server, tmp_path):
+    path = str(tmp_path / 'model.bin')
+    server.change_after_head = (os.urandom(SIZE), '"v2"')
+    with pytest.raises(RuntimeError, match='changed during download'):
+        downloader.fetch_file(server.url, path)
+    assert not os.path.exists(path)
+
+    # the interrupted state belongs to "v1", so the next attempt starts over
+    server.change_after_head = None
+    server.requests.clear()
+    result = downloader.fetch_file(server.url, path)
+    assert result.resumed_bytes == 0 and len(server.requests) == 4
+    with open(path, 'rb') as f:
+        assert f.read() == server.content
+
+
+def test_checksum_mismatch(server, tmp_path):
+    path = str(tmp_path / 'model.bin')
+    with pytest.raises(RuntimeError, match='Checksum mismatch'):
+        downloader.fetch_file(server.url, path, sha256=sha256(b'other content'))
+    assert not os.path.exists(path) and not os.path.exists(f'{path}.part')
+
+    result = downloader.fetch_file(server.url, path, sha256=sha256(server.content))
+    assert result.sha256 == sha256(server.content)
@@ -0,0 +1,50 @@
+import pytest
+
+from radarange_orchestrator.utils.extract_tool_calls import (
+    ToolCallStreamParser,
+    extract_tool_calls,
+)
+
+TEXTS = [
+    (
+        '<tool_call>{"name": "a", "arguments": {}}</tool_call>\n'
+        '<tool_call>{"name": "b", "arguments": {"x": 1}}</tool_call>'
+    ),
+    '<think>let me call a</think>\n\n<tool_call>{"name": "a", "arguments": {}}</tool_call>',
+    'Sure, calling it. <tool_call>{"name": "a", "arguments": {"q": "text"}}</tool_call>',
+    'no tool calls here',
+]
+
+
+def _signature(calls) -> list[tuple]:
+    return [(call['type'], call['name'], call['args']) for call in calls]
+
+
+def _feed(text: str, chunk_size: int) -> ToolCallStreamParser:
+    parser = ToolCallStreamParser()
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start : start + chunk_size])
+    return parser
+
+
+@pytest.mark.parametrize('text', TEXTS)
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 10**6])
+def test_stream_parser_matches_extract_tool_calls(text: str, chunk_size: int):
+    parser = _feed(text, chunk_size)
+    assert _signature(parser.calls) == _signature(extract_tool_calls(text))
+
+
+def test_text_and_tag_in_one_chunk():
+    parser = ToolCallStreamParser()
+    calls = parser.feed(
+        'Calling: <tool_call>{"name": "a", "arguments": {}}</tool_call>'
+    )
+    assert _signature(calls) == [('tool_call', 'a', {})]
+    assert not parser.after_tool_calls
+
+
+def test_after_tool_calls():
+    parser = _feed('<tool_call>{"name": "a", "arguments": {}}</tool_call>\n', 4)
+    assert not parser.after_tool_calls
+    parser.feed('and some text')
+    assert parser.after_tool_calls
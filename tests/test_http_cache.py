@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import pytest
+
+from radarange_orchestrator import config
+from radarange_orchestrator.tools import http_cache
+from radarange_orchestrator.tools.http_cache import CacheEntry, HTTPCache
+
+
+class PageServer:
+    """Serves one page with optional validators, answering matching conditional GETs with 304"""
+
+    def __init__(self):
+        self.body = 'first version'
+        self.etag: Optional[str] = '"v1"'
+        self.last_modified: Optional[str] = 'Mon, 05 Oct 2026 10:00:00 GMT'
+        self.requests: list[dict] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                server.requests.append(dict(self.headers))
+                if_none_match = self.headers.get('If-None-Match')
+                if_modified_since = self.headers.get('If-Modified-Since')
+                if if_none_match is not None:
+                    unchanged = if_none_match == server.etag
+                else:
+                    unchanged = (
+                        if_modified_since is not None
+                        and if_modified_since == server.last_modified
+                    )
+                if unchanged:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = server.body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if server.etag is not None:
+                    self.send_header('ETag', server.etag)
+                if server.last_modified is not None:
+                    self.send_header('Last-Modified', server.last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/page?utm_source=x'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'HTTP_CACHE_DIR', str(tmp_path / 'http'))
+    server = PageServer()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def test_fresh_entry_is_served_without_request(server):
+    entry = http_cache.cached_get(server.url, ttl=60)
+    assert entry.raw == 'first version' and entry.url.endswith('/page')
+    assert http_cache.cached_get(server.url, ttl=60).raw == 'first version'
+    assert len(server.requests) == 1
+
+
+def test_unchanged_page_is_revalidated_with_etag(server):
+    entry = http_cache.cached_get(server.url, ttl=60)
+    entry.markdown = 'first version, cleaned'
+    http_cache.store(entry)
+
+    stored_at = entry.stored_at
+    entry = http_cache.cached_get(server.url, ttl=0)
+    assert server.requests[-1]['If-None-Match'] == '"v1"'
+    assert server.requests[-1]['If-Modified-Since'] == server.last_modified
+    assert entry.markdown == 'first version, cleaned'
+    assert entry.stored_at > stored_at
+
+    # a changed page replaces the entry and its markdown
+    server.body, server.etag = 'second version', '"v2"'
+    entry = http_cache.cached_get(server.url, ttl=0)
+    assert (entry.raw, entry.etag, entry.markdown) == ('second version', '"v2"', None)
+    assert http_cache.get_fresh(entry.url, ttl=60).raw == 'second version'
+
+
+def test_unchanged_page_is_revalidated_with_last_modified(server):
+    server.etag = None
+    http_cache.cached_get(server.url, ttl=60)
+    entry = http_cache.cached_get(server.url, ttl=0)
+    assert 'If-None-Match' not in server.requests[-1]
+    assert server.requests[-1]['If-Modified-Since'] == server.last_modified
+    assert entry.raw == 'first version' and len(server.requests) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    directory = str(tmp_path / 'http')
+    entry = CacheEntry(url='', stored_at=0, raw='x' * 1000)
+    entry_size = len(entry.model_copy(update={'url': 'a'}).model_dump_json())
+    cache = HTTPCache(directory, max_bytes=3 * entry_size)
+
+    now = time.time()
+    for i, key in enumerate('abc'):
+        cache.put(key, entry)
+        os.utime(cache._path(key), (now - 100 + i, now - 100 + i))
+    # reading marks 'a' as recently used, so 'b' is the oldest
+    assert cache.get('a') is not None
+    cache.put('d', entry)
+
+    assert [key for key in 'abcd' if cache.get(key) is not None] == ['a', 'c', 'd']
+    cache.clear()
+    assert os.listdir(directory) == []
@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from radarange_orchestrator.backend.lmstudio_pool import (
+    HostFailedError,
+    LMSPool,
+    PoolConfig,
+)
+from radarange_orchestrator.chat import AIMessage, AIMessageChunk, Chat
+
+
+class FakeModel:
+    """Stands in for LMSModel of one host; down hosts fail every call with a host error"""
+
+    def __init__(self, host: str, down: set[str], connected: list[str]):
+        connected.append(host)
+        if host in down:
+            raise OSError(f'{host} is down')
+        self.host = host
+        self.disconnected = False
+
+    def assure_loaded(self) -> None:
+        pass
+
+    async def aassure_loaded(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def disconnect(self) -> None:
+        self.disconnected = True
+
+    def act(self, chat, *args):
+        chat.add_message(AIMessage(content='calling a tool'))
+        raise OSError(f'{self.host} went down')
+
+    async def acreate_chat_completion(
+        self,
+        chat,
+        tools,
+        response_format=None,
+        temperature=0.7,
+        max_tokens=5000,
+        stream=False,
+    ):
+        if stream:
+            return self._astream(chat)
+        message = AIMessage(content=self.host)
+        chat.add_message(message)
+        return message
+
+    async def _astream(self, chat):
+        for part in ('from ', self.host):
+            yield AIMessageChunk(content=part)
+        chat.add_message(AIMessage(content='from ' + self.host))
+
+
+def make_pool(
+    hosts: list[str], down: set[str], pool_config: PoolConfig = PoolConfig()
+) -> tuple[LMSPool, list[str]]:
+    connected = []
+    pool = LMSPool(
+        hosts,
+        'model',
+        pool_config=pool_config,
+        model_factory=lambda host, model, config: FakeModel(host, down, connected),
+    )
+    return pool, connected
+
+
+def test_async_completion_fails_over():
+    pool, connected = make_pool(['a', 'b'], down={'a'})
+    chat = Chat()
+    chat.add_user_message('hi')
+
+    message = asyncio.run(pool.acreate_chat_completion(chat, []))
+
+    assert message.content == 'b'
+    assert connected == ['a', 'b']
+    assert pool.endpoints[0].failures == 1
+
+
+def test_async_stream():
+    pool, _ = make_pool(['a'], down=set())
+    chat = Chat()
+    chat.add_user_message('hi')
+
+    async def collect() -> list[str]:
+        stream = await pool.acreate_chat_completion(chat, [], stream=True)
+        return [chunk.content async for chunk in stream]
+
+    assert asyncio.run(collect()) == ['from ', 'a']
+    assert chat[-1].content == 'from a'
+    assert pool.endpoints[0].in_flight == 0
+
+
+def test_half_open_host_is_probed_once():
+    pool, _ = make_pool(['a'], down=set())
+    recovering = pool.endpoints[0]
+    recovering.opened_at = time.monotonic() - pool.pool_config.cooldown
+
+    probe_started = threading.Event()
+    release_probe = threading.Event()
+    probes = []
+
+    def slow_factory(host, model, config):
+        probes.append(host)
+        probe_started.set()
+        release_probe.wait(5)
+        return FakeModel(host, set(), [])
+
+    pool.model_factory = slow_factory
+    prober = threading.Thread(target=pool._acquire, args=(set(),))
+    prober.start()
+    assert probe_started.wait(5)
+
+    # while the probe is running, other requests skip the recovering host
+    assert pool._acquire(set()) is None
+    assert not pool._probe(recovering)
+    assert probes == ['a']
+
+    release_probe.set()
+    prober.join(5)
+    assert recovering.healthy and not recovering.probing
+
+
+def test_health_is_refreshed_lazily():
+    pool, connected = make_pool(['a', 'b'], {'b'}, PoolConfig(health_interval=0.01))
+    time.sleep(0.02)
+
+    endpoint = pool._acquire(set())
+    pool._release(endpoint)
+    pool._health_thread.join(5)
+
+    assert sorted(connected) == ['a', 'b']
+    assert pool.endpoints[1].failures == 1
+
+
+def test_host_failing_mid_act_opens_circuit():
+    pool, _ = make_pool(['a', 'b'], set(), PoolConfig(failure_threshold=1))
+    chat = Chat()
+    chat.add_user_message('hi')
+
+    with pytest.raises(HostFailedError):
+        pool.act(chat)
+
+    failed = next(e for e in pool.endpoints if not e.healthy)
+    assert failed.failures == 1 and failed.model is None
+    # the other host was not tried, the messages are already delivered
+    assert sum(e.served for e in pool.endpoints) == 1
+
+
+def test_failure_disconnects_dropped_model():
+    pool, _ = make_pool(['a'], set())
+    endpoint = pool.endpoints[0]
+    model = pool._connect(endpoint)
+
+    pool._record_failure(endpoint)
+
+    assert model.disconnected and endpoint.model is None
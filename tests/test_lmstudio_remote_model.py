@@ -0,0 +1,53 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from radarange_orchestrator.backend.lmstudio_remote_model import (
+    Gpu,
+    LMSConfig,
+    LMSModel,
+)
+
+
+class FakeAsyncClient:
+    opened: list['FakeAsyncClient'] = []
+
+    def __init__(self, host: str):
+        self.loop = None
+        self.closed = False
+        model = SimpleNamespace(identifier='model')
+
+        async def load(*args, **kwargs):
+            return model
+
+        async def list_loaded():
+            return [model]
+
+        self.llm = SimpleNamespace(model=load, list_loaded=list_loaded)
+        FakeAsyncClient.opened.append(self)
+
+    async def __aenter__(self) -> 'FakeAsyncClient':
+        self.loop = asyncio.get_running_loop()
+        return self
+
+    async def aclose(self) -> None:
+        assert asyncio.get_running_loop() is self.loop
+        self.closed = True
+
+
+def test_async_client_is_shared_across_loops_and_closed():
+    FakeAsyncClient.opened = []
+    with (
+        mock.patch('lmstudio.Client'),
+        mock.patch('lmstudio.AsyncClient', FakeAsyncClient),
+    ):
+        model = LMSModel('host', 'model', LMSConfig(gpu=Gpu()))
+        asyncio.run(model.aassure_loaded())
+        asyncio.run(model.aassure_loaded())
+
+        assert len(FakeAsyncClient.opened) == 1
+        model.close()
+
+    assert FakeAsyncClient.opened[0].closed
+    assert not any(t.name == 'lms_async_client' for t in threading.enumerate())
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+pymupdf = pytest.importorskip('pymupdf')
+
+from radarange_orchestrator import config
+from radarange_orchestrator.tools import pdf_extract
+
+N_PAGES = 40
+
+
+def write_pdf(path: str, image_path: str) -> None:
+    pixmap = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 4, 4), False)
+    pixmap.clear_with(200)
+    pixmap.save(image_path)
+    doc = pymupdf.open()
+    for number in range(N_PAGES):
+        page = doc.new_page()
+        page.insert_text((72, 72), f'page {number}')
+        # uneven image counts, so every range starts at a different image offset
+        for i in range(number % 3):
+            rect = pymupdf.Rect(72, 100 + 40 * i, 104, 132 + 40 * i)
+            page.insert_image(rect, filename=image_path)
+    doc.save(path)
+    doc.close()
+
+
+def extract(path: str, images_path: str) -> list[tuple]:
+    return [
+        (
+            page.number,
+            page.text,
+            page.blocks,
+            [os.path.basename(fn) for fn in page.images],
+        )
+        for page in pdf_extract.iter_pdf_pages(path, images_path)
+    ]
+
+
+def test_parallel_extraction_matches_serial(tmp_path, monkeypatch):
+    path = str(tmp_path / 'doc.pdf')
+    write_pdf(path, str(tmp_path / 'pixel.png'))
+    monkeypatch.setattr(pdf_extract, '_pool', None)
+    monkeypatch.setattr(pdf_extract, '_pool_broken', False)
+
+    monkeypatch.setattr(config, 'PDF_WORKERS', 1)
+    serial = extract(path, str(tmp_path / 'serial'))
+
+    monkeypatch.setattr(config, 'PDF_WORKERS', 2)
+    monkeypatch.setattr(config, 'PDF_PARALLEL_MIN_PAGES', 8)
+    try:
+        parallel = extract(path, str(tmp_path / 'parallel'))
+        assert pdf_extract._pool is not None and not pdf_extract._pool_broken
+    finally:
+        if pdf_extract._pool is not None:
+            pdf_extract._pool.shutdown()
+
+    assert parallel == serial
+    assert [page[0] for page in serial] == list(range(N_PAGES))
+    images = [fn for page in serial for fn in page[3]]
+    assert (
+        images == [f'im_{n}.png' for n in range(len(images))]
+        and len(images) > N_PAGES // 2
+    )
+    assert sorted(os.listdir(tmp_path / 'parallel')) == sorted(images)
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('llama_cpp')
+
+from benchmarks.tiny_gguf import write_tiny_gguf
+from radarange_orchestrator import LLM_Config, config, llm
+
+
+@pytest.fixture(scope='module')
+def bot(tmp_path_factory):
+    models_dir = tmp_path_factory.mktemp('models')
+    write_tiny_gguf(str(models_dir / 'tiny.gguf'), context_length=2048)
+    models_dir_before = config.MODELS_DIR
+    config.MODELS_DIR = str(models_dir)
+    try:
+        bot = llm(
+            'tiny.gguf', backend='llama_cpp', config=LLM_Config(gpus=[], ctx_size=2048)
+        )
+    finally:
+        config.MODELS_DIR = models_dir_before
+    yield bot
+    bot.close()
+
+
+def test_prompt_cache_stats(bot):
+    stats = bot.model.model.prompt_cache_stats
+    chat = bot.chat(system_prompt='You are a test model.')
+    chat.add_user_message('first question')
+
+    first = bot.respond(chat, temperature=0, max_tokens=4)
+    first_prompt = first.usage_metadata['input_tokens']
+    assert (stats.hits, stats.misses) == (0, 1)
+    assert stats.evaluated_tokens == first_prompt
+
+    # the follow-up renders the previous prompt as its prefix, which stays in the KV cache
+    chat.add_user_message('second question')
+    second = bot.respond(chat, temperature=0, max_tokens=4)
+    assert (stats.hits, stats.misses) == (1, 1)
+    assert stats.reused_tokens >= first_prompt
+    assert stats.reused_tokens + stats.evaluated_tokens == (
+        first_prompt + second.usage_metadata['input_tokens']
+    )
+
+    # another conversation shares at most the template's opening tokens
+    other = bot.chat(system_prompt='Something else entirely.')
+    other.add_user_message('first question')
+    reused_before = stats.reused_tokens
+    bot.respond(other, temperature=0, max_tokens=4)
+    assert (stats.hits, stats.misses) == (1, 2)
+    assert stats.reused_tokens - reused_before < 10
@@ -0,0 +1,47 @@
+import gc
+
+from radarange_orchestrator.chat import AIMessage, HumanMessage
+from radarange_orchestrator.utils import token_counting
+from radarange_orchestrator.utils.token_counting import message_tokens
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text: str) -> int:
+        self.calls += 1
+        return len(text.split())
+
+
+def test_counts_are_cached_outside_message_data():
+    count = Counter()
+    message = AIMessage(content='one two three')
+
+    assert message_tokens(message, 'model', count) == 3
+    assert message_tokens(message, 'model', count) == 3
+    assert count.calls == 1
+    assert message.additional_kwargs == {}
+    assert 'token' not in message.model_dump_json()
+
+
+def test_edited_content_is_recounted_per_model():
+    count = Counter()
+    message = HumanMessage(content='one two')
+    message_tokens(message, 'a', count)
+    message_tokens(message, 'b', count)
+
+    message.content = 'one two three four'
+    assert message_tokens(message, 'a', count) == 4
+    assert count.calls == 3
+
+
+def test_entries_are_dropped_with_messages():
+    message = HumanMessage(content='one')
+    message_tokens(message, 'model', Counter())
+    key = id(message)
+    assert key in token_counting._token_counts
+
+    del message
+    gc.collect()
+    assert key not in token_counting._token_counts
@@ -0,0 +1,44 @@
+from langchain_core.tools import StructuredTool
+
+from benchmarks.lms_standin import StandInTimings, standin_server
+from radarange_orchestrator.backend.lmstudio_remote_model import (
+    Gpu,
+    LMSConfig,
+    LMSModel,
+)
+from radarange_orchestrator.chat import Chat
+from radarange_orchestrator.utils.tool_budget import TRUNCATION_KEY, ToolBudget
+
+
+def big_output() -> dict:
+    return {'rows': ['row'] * 500}
+
+
+big_tool = StructuredTool.from_function(
+    name='big', func=big_output, description='Returns a large table.'
+)
+
+
+def test_lmstudio_act_annotates_every_trimmed_call():
+    # both calls of a round return the same output, trimmed to the same text
+    timings = StandInTimings(
+        ttft=0,
+        prompt_tokens_per_s=1e9,
+        tokens_per_s=1e9,
+        response_tokens=4,
+        tool_rounds=2,
+        tool_calls_per_round=2,
+        tool_name='big',
+    )
+    config = LMSConfig(gpu=Gpu(), tool_budget=ToolBudget(per_call=50))
+    with standin_server(timings):
+        model = LMSModel('standin', 'standin', config)
+        chat = Chat()
+        chat.add_user_message('hi')
+        model.act(chat, tools=[big_tool], max_prediction_rounds=3)
+
+    results = [message for message in chat.messages if message.type == 'tool']
+    assert len(results) == 4
+    for message in results:
+        truncation = message.response_metadata[TRUNCATION_KEY]
+        assert truncation['kept_tokens'] <= 50 < truncation['original_tokens']
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+from langchain_core.tools import StructuredTool
+
+from radarange_orchestrator import LLM_Config, llm
+
+
+def sleep(seconds: float) -> str:
+    time.sleep(seconds)
+    return 'done'
+
+
+sleep_tool = StructuredTool.from_function(
+    name='sleep', func=sleep, description='Sleeps for the given number of seconds.'
+)
+
+
+def make_bot(**config) -> llm:
+    return llm('synthetic', backend='synthetic', config=LLM_Config(**config))
+
+
+def calls(*seconds: float) -> list[dict]:
+    return [
+        {'type': 'tool_call', 'name': 'sleep', 'args': {'seconds': s}, 'id': str(i)}
+        for i, s in enumerate(seconds)
+    ]
+
+
+def test_queued_calls_do_not_time_out():
+    bot = make_bot(tool_workers=1, tool_timeout=0.5)
+    results = bot.invoke_tool_calls(calls(0.2, 0.2, 0.2), [sleep_tool])
+    assert [r.content for r in results] == ['done'] * 3
+
+
+def test_tool_concurrency_wait_does_not_time_out():
+    bot = make_bot(tool_workers=3, tool_timeout=0.5, tool_concurrency={'sleep': 1})
+    results = bot.invoke_tool_calls(calls(0.2, 0.2, 0.2), [sleep_tool])
+    assert [r.content for r in results] == ['done'] * 3
+
+
+def test_hung_call_is_abandoned():
+    bot = make_bot(tool_workers=1, tool_timeout=0.2)
+    start = time.monotonic()
+    results = bot.invoke_tool_calls(calls(30, 0.01), [sleep_tool])
+
+    assert time.monotonic() - start < 5
+    assert results[0].status == 'error' and 'timed out' in results[0].content
+    assert results[1].content == 'done'
+    # the abandoned call does not keep the interpreter alive
+    running = [t for t in threading.enumerate() if t.name == 'tool_call']
+    assert running and all(t.daemon for t in running)
+
+
+def test_async_queued_calls_do_not_time_out():
+    bot = make_bot(tool_workers=1, tool_timeout=0.5)
+    results = asyncio.run(bot.ainvoke_tool_calls(calls(0.2, 0.2, 0.2), [sleep_tool]))
+    assert [r.content for r in results] == ['done'] * 3
+
+
+def test_early_dispatch_keeps_message_ids():
+    from radarange_orchestrator.backend.synthetic_model import (
+        SyntheticConfig,
+        SyntheticToolCall,
+    )
+    from radarange_orchestrator.utils import extract_tool_calls
+
+    round_calls = [SyntheticToolCall(name='sleep', args={'seconds': 0})] * 2
+    messages = {}
+    for early in (False, True):
+        bot = llm(
+            'synthetic',
+            backend='synthetic',
+            config=LLM_Config(early_tool_dispatch=early),
+            backend_options=SyntheticConfig(
+                response_tokens=2, tool_rounds=[round_calls] * 2
+            ),
+        )
+        chat = bot.chat()
+        chat.add_user_message('go')
+        counter = extract_tool_calls.tool_call_counter
+        bot.act(chat, tools=[sleep_tool], max_prediction_rounds=3)
+        assert extract_tool_calls.tool_call_counter - counter == 4
+        messages[early] = [
+            (
+                m.type,
+                m.tool_call_id
+                if m.type == 'tool'
+                else [tc['id'] for tc in m.tool_calls],
+            )
+            for m in chat.messages
+            if m.type in ('ai', 'tool')
+        ]
+        # ids numbered from the same counter start in both modes
+        extract_tool_calls.tool_call_counter = counter
+
+    assert messages[True] == messages[False]
+    ai_ids = [i for kind, ids in messages[True] if kind == 'ai' for i in ids]
+    assert [ids for kind, ids in messages[True] if kind == 'tool'] == ai_ids